@@ -0,0 +1,370 @@
+"""Headless benchmark harness for the screenshot tool.
+
+Feeds synthetic multi-monitor frames through the real capture pipeline
+(take_screenshot_task -> encode / frame store -> finalize -> report) instead of
+mss grabs, delivers the queued Telegram items to a local stub API that adds
+latency and errors, and times the viewer's frame preparation path. Results
+(throughput, latency percentiles, peak memory, output sizes) are written to
+benchmarks/results/ as JSON and can be compared with an earlier run:
+
+    python benchmarks/bench.py --monitors 3 --width 2560 --height 1440 --events 20
+    python benchmarks/bench.py --compare benchmarks/results/<earlier>.json
+
+Everything runs in a temporary journal directory; nothing touches the real
+journal, config or Telegram chat.
+"""
+import argparse
+import datetime
+import importlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import types
+from pathlib import Path
+
+import cv2
+import numpy as np
+import screeninfo
+from mss.screenshot import ScreenShot
+
+from telegram_stub import TelegramStub
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+PERCENTILES = (50, 95, 99)
+
+
+# ── Synthetic input ───────────────────────────────────────────────────────────
+class SyntheticGrabber:
+    """Drop-in for an mss instance: grab(region) returns a real mss ScreenShot
+    built from a synthetic chart-like frame. `static_monitors` regions never
+    change between grabs (like news or reference charts); the others scroll,
+    or with content "ticker" only their small price label changes (the case
+    near-duplicate detection must not swallow)."""
+
+    def __init__(self, content: str = "chart", static_monitors: int = 0, seed: int = 7):
+        self.content = content
+        self.static_monitors = static_monitors
+        self.rng = np.random.default_rng(seed)
+        self.frames = {}
+        self.grab_count = {}
+
+    def _base_frame(self, width: int, height: int):
+        if self.content == "noise":
+            return self.rng.integers(0, 256, (height, width, 4), dtype=np.uint8)
+        frame = np.full((height, width, 4), (24, 20, 18, 255), dtype=np.uint8)
+        frame[::40, :, :3] = 48 # grid
+        frame[:, ::80, :3] = 48
+        prices = np.cumsum(self.rng.normal(0, 3, width)) + height / 2
+        for x in range(0, width, 6): # candles
+            top = int(np.clip(prices[x] - 15, 0, height - 1))
+            bottom = int(np.clip(prices[x] + 15, top + 1, height))
+            frame[top:bottom, x:x + 4, :3] = (80, 200, 80) if x % 12 else (60, 60, 220)
+        frame[height - 60:, :, :3] = self.rng.integers(0, 255, (60, width, 3), dtype=np.uint8) # text-like strip
+        return frame
+
+    def grab(self, region: dict):
+        key = (region["left"], region["top"], region["width"], region["height"])
+        if key not in self.frames:
+            self.frames[key] = self._base_frame(region["width"], region["height"])
+            self.grab_count[key] = 0
+        monitor_index = list(self.frames).index(key)
+        frame = self.frames[key]
+        if monitor_index >= self.static_monitors:
+            self.grab_count[key] += 1
+            if self.content == "ticker":
+                frame = self._with_price(frame, 1.0850 + 0.0001 * self.grab_count[key])
+            else:
+                frame = np.roll(frame, 6 * self.grab_count[key], axis=1) # the chart moves on
+        return ScreenShot(bytearray(frame.tobytes()), region)
+
+    @staticmethod
+    def _with_price(frame, price: float):
+        """A copy of `frame` with a price label (about 80x20 px) in the top right corner."""
+        frame = frame.copy()
+        right = frame.shape[1] - 10
+        frame[8:30, right - 80:right, :3] = (24, 20, 18)
+        cv2.putText(frame, f"{price:.4f}", (right - 76, 24), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (230, 230, 230, 255), 1,
+                    cv2.LINE_AA)
+        return frame
+
+    def close(self):
+        pass
+
+
+# ── Helpers ───────────────────────────────────────────────────────────────────
+def load_app(work_dir: Path, monitors: list):
+    """Imports the trading_journal package with its log files inside work_dir.
+    Monitor enumeration returns the synthetic monitors, so no display is needed."""
+    os.chdir(work_dir)
+    screeninfo.get_monitors = lambda: list(monitors)
+    sys.path.insert(0, str(REPO_DIR))
+    importlib.import_module("trading_journal.gui") # Imports every pipeline module
+    import trading_journal
+    trading_journal.logs.console_handler.setLevel("WARNING")
+    trading_journal.lazy.warm_up().join() # Keep first-use imports out of the stage timings
+    return trading_journal
+
+
+def percentiles(values: list) -> dict:
+    if not values:
+        return {}
+    ordered = np.asarray(sorted(values), dtype=float)
+    result = {f"p{p}_ms": round(float(np.percentile(ordered, p)), 3) for p in PERCENTILES}
+    result.update(count=len(ordered), max_ms=round(float(ordered[-1]), 3), mean_ms=round(float(ordered.mean()), 3))
+    return result
+
+
+def stage_percentiles(app) -> dict:
+    with app.metrics.metrics.lock:
+        samples = {stage: list(values) for stage, values in app.metrics.metrics.samples.items()}
+    return {stage: percentiles(values) for stage, values in sorted(samples.items())}
+
+
+def unique_size(paths) -> int:
+    """Bytes on disk, counting hardlinked files (frame store) once."""
+    seen, total = set(), 0
+    for path in paths:
+        st = path.stat()
+        if (st.st_dev, st.st_ino) not in seen:
+            seen.add((st.st_dev, st.st_ino))
+            total += st.st_size
+    return total
+
+
+def peak_rss_mb():
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return round(peak / 1024 / (1024 if sys.platform == "darwin" else 1), 1)
+    except ImportError:
+        return None # Not available on Windows
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# ── Stages ────────────────────────────────────────────────────────────────────
+def make_monitors(args) -> list:
+    return [types.SimpleNamespace(x=i * args.width, y=0, width=args.width, height=args.height,
+                                  is_primary=(i == 0), name=f"Monitor {i + 1}") for i in range(args.monitors)]
+
+
+def run_pipeline(app, args, base_dir: Path, stub: TelegramStub) -> dict:
+    monitors = make_monitors(args)
+    names = ",".join(f"Monitor {i + 1}" for i in range(args.monitors))
+    chat_ids = ",".join(str(1000 + i) for i in range(args.chats))
+    grabber = SyntheticGrabber(args.content, args.static_monitors)
+    send = stub is not None
+
+    sender = None
+    if send:
+        app.telegram.TELEGRAM_API_BASE = stub.base_url
+        app.telegram.TELEGRAM_BOT_TOKEN = "12345:benchmark"
+        if args.no_rate_limits:
+            app.telegram.TELEGRAM_GLOBAL_RATE = app.telegram.TELEGRAM_PRIVATE_CHAT_RATE = app.telegram.TELEGRAM_GROUP_CHAT_RATE = (1000, 1.0)
+        sender = app.telegram.TelegramSender(app.state.telegram_outbox, args.send_workers)
+        sender.start()
+
+    capture_ms = []
+    started = time.perf_counter()
+    for i in range(args.events):
+        event = "Entry" if i % 2 == 0 else "Exit"
+        requested_at = time.perf_counter()
+        app.capture.take_screenshot_task(event, "6B", names, chat_ids, send, "Benchmark run", args.codec, args.level,
+                                 sct=grabber, current_monitors=monitors, requested_at=requested_at)
+        capture_ms.append((time.perf_counter() - requested_at) * 1000)
+        time.sleep(max(0.0, args.interval - (time.perf_counter() - requested_at)))
+
+    # The export and report stages are single-threaded: an empty task finishes after everything queued before it
+    app.capture.export_executor.submit(lambda: None).result()
+    saved_at = time.perf_counter()
+    app.reports.report_executor.submit(lambda: None).result()
+    reported_at = time.perf_counter()
+
+    delivered_at = None
+    if send:
+        deadline = time.time() + args.delivery_timeout
+        while app.state.telegram_outbox.pending_count() and time.time() < deadline:
+            time.sleep(0.1)
+        delivered_at = time.perf_counter()
+        sender.stopped = True
+        app.state.telegram_outbox.notify()
+
+    screenshots = [p for p in base_dir.rglob("*") if p.suffix.lower() in app.imaging.SCREENSHOT_EXTENSIONS
+                   and app.store.FRAME_STORE_DIR_NAME not in p.parts]
+    documents = list(base_dir.rglob("*.docx"))
+    result = {
+        "events": args.events,
+        "frames": args.events * args.monitors,
+        "megapixels_per_event": round(args.monitors * args.width * args.height / 1e6, 2),
+        "capture_call_ms": percentiles(capture_ms),
+        "events_per_second_saved": round(args.events / (saved_at - started), 3),
+        "seconds_to_saved": round(saved_at - started, 2),
+        "seconds_to_reports": round(reported_at - started, 2),
+        "screenshot_bytes": unique_size(screenshots),
+        "screenshot_files": len(screenshots),
+        "docx_bytes": sum(p.stat().st_size for p in documents),
+        "frame_store": dict(app.state.frame_store.stats) if app.state.frame_store is not None else None,
+    }
+    if send:
+        result.update({
+            "seconds_to_delivered": round(delivered_at - started, 2),
+            "undelivered_items": app.state.telegram_outbox.pending_count(),
+            "telegram_stub": dict(stub.stats),
+            "upload_megabytes": round(stub.stats["received_bytes"] / 1e6, 2),
+            "photos_per_second_delivered": round(stub.stats["photos"] / (delivered_at - started), 3),
+        })
+    return result
+
+
+def run_viewer(app, args, base_dir: Path, work_dir: Path) -> dict:
+    """Times the work behind display_image_fullscreen_on_monitor (without HighGUI):
+    a cold rendition build, a warm rendition load, an in-memory cache hit, and
+    the Entry/Exit diff."""
+    images = sorted(p for p in base_dir.rglob("*") if p.suffix.lower() in app.imaging.SCREENSHOT_EXTENSIONS
+                    and app.store.FRAME_STORE_DIR_NAME not in p.parts)[:args.viewer_images]
+    if not images:
+        return {}
+    cold_cache = app.renditions.RenditionCache(work_dir / "viewer-cache", 4 * 1024 ** 3)
+    cold_ms, warm_ms, hit_ms, diff_ms = [], [], [], []
+    frames = []
+    for path in images:
+        t = time.perf_counter()
+        cold_cache.get_display_frame(path, args.width, args.height)
+        cold_ms.append((time.perf_counter() - t) * 1000)
+    for path in images:
+        t = time.perf_counter()
+        frames.append(cold_cache.get_display_frame(path, args.width, args.height))
+        warm_ms.append((time.perf_counter() - t) * 1000)
+    app.state.rendition_cache = cold_cache
+    frame_cache = app.viewer.DisplayFrameCache(4 * 1024 ** 3)
+    app.viewer.display_frame_cache = frame_cache
+    for path in images:
+        frame_cache.get(path, args.width, args.height)
+    for path in images:
+        t = time.perf_counter()
+        frame_cache.get(path, args.width, args.height)
+        hit_ms.append((time.perf_counter() - t) * 1000)
+    for first, second in zip(frames, frames[1:]):
+        if first is not None and second is not None and first.shape == second.shape:
+            t = time.perf_counter()
+            app.viewer.compute_diff_mask(first, second)
+            diff_ms.append((time.perf_counter() - t) * 1000)
+    return {"images": len(images), "rendition_cold": percentiles(cold_ms), "rendition_warm": percentiles(warm_ms),
+            "frame_cache_hit": percentiles(hit_ms), "compare_diff": percentiles(diff_ms)}
+
+
+# ── Results ───────────────────────────────────────────────────────────────────
+def flatten(data: dict, prefix: str = "") -> dict:
+    flat = {}
+    for key, value in data.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, name + "."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def compare(current: dict, previous: dict):
+    before, after = flatten(previous["results"]), flatten(current["results"])
+    print(f"\nComparison with {previous.get('timestamp')} (rev {previous.get('revision')}):")
+    print(f"{'metric':60} {'before':>12} {'after':>12} {'change':>9}")
+    for name in sorted(set(before) & set(after)):
+        old, new = before[name], after[name]
+        change = f"{(new - old) / old * 100:+.1f}%" if old else ""
+        print(f"{name:60} {old:12.3f} {new:12.3f} {change:>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--monitors", type=int, default=3)
+    parser.add_argument("--width", type=int, default=2560)
+    parser.add_argument("--height", type=int, default=1440)
+    parser.add_argument("--events", type=int, default=10)
+    parser.add_argument("--interval", type=float, default=1.0,
+                        help="seconds between captures (file names have 1 s resolution, keep >= 0.5)")
+    parser.add_argument("--content", choices=("chart", "noise", "ticker"), default="chart",
+                        help="ticker: only a small price label changes between grabs")
+    parser.add_argument("--static-monitors", type=int, default=0, help="monitors whose picture never changes")
+    parser.add_argument("--codec", default="png")
+    parser.add_argument("--level", type=int, default=None)
+    parser.add_argument("--dedupe", choices=("off", "exact", "near"), default="exact")
+    parser.add_argument("--no-telegram", action="store_true", help="skip the upload stage")
+    parser.add_argument("--chats", type=int, default=1)
+    parser.add_argument("--send-workers", type=int, default=3)
+    parser.add_argument("--latency-ms", type=float, default=80)
+    parser.add_argument("--jitter-ms", type=float, default=40)
+    parser.add_argument("--error-rate", type=float, default=0.05)
+    parser.add_argument("--no-rate-limits", action="store_true", help="disable the client-side Telegram rate limits")
+    parser.add_argument("--delivery-timeout", type=float, default=300)
+    parser.add_argument("--viewer-images", type=int, default=12)
+    parser.add_argument("--compare", type=Path, help="earlier result file to compare with")
+    parser.add_argument("--output", type=Path, help="result file (default: benchmarks/results/<timestamp>.json)")
+    args = parser.parse_args()
+
+    tracemalloc.start()
+    with tempfile.TemporaryDirectory(prefix="journal-bench-") as tmp:
+        work_dir = Path(tmp)
+        base_dir = work_dir / "Trading Journal"
+        app = load_app(work_dir, make_monitors(args))
+        app.config.BASE_DIR = base_dir
+        app.state.telegram_outbox = app.telegram.TelegramOutbox(work_dir / "outbox.sqlite3")
+        app.state.journal_catalog = app.catalog.JournalCatalog(work_dir / "catalog.sqlite3", app.config.get_base_path())
+        app.state.rendition_cache = app.renditions.RenditionCache(base_dir / ".cache" / "renditions", 2 * 1024 ** 3)
+        app.state.frame_store = app.store.FrameStore(base_dir / app.store.FRAME_STORE_DIR_NAME, args.dedupe, 2)
+
+        stub = None
+        if not args.no_telegram:
+            stub = TelegramStub(args.latency_ms, args.jitter_ms, args.error_rate).start()
+        try:
+            pipeline = run_pipeline(app, args, base_dir, stub)
+            stage_stats = stage_percentiles(app)
+            viewer = run_viewer(app, args, base_dir, work_dir)
+        finally:
+            if stub is not None:
+                stub.stop()
+        _, traced_peak = tracemalloc.get_traced_memory()
+        app.state.telegram_outbox.conn.close()
+        app.state.journal_catalog.conn.close()
+        os.chdir(REPO_DIR)
+
+    report = {
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "revision": git_revision(),
+        "params": {k: (str(v) if isinstance(v, Path) else v) for k, v in vars(args).items()},
+        "results": {
+            "pipeline": pipeline,
+            "stages": stage_stats,
+            "viewer": viewer,
+            "memory": {"tracemalloc_peak_mb": round(traced_peak / 1e6, 1), "peak_rss_mb": peak_rss_mb()},
+        },
+    }
+    output = args.output or RESULTS_DIR / f"{datetime.datetime.now():%Y%m%d-%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2), "utf-8")
+
+    print(json.dumps(report["results"]["pipeline"], indent=2))
+    for stage, stats in report["results"]["stages"].items():
+        print(f"{stage:24} n={stats['count']:<5} p50 {stats['p50_ms']:9.1f}  p95 {stats['p95_ms']:9.1f}  "
+              f"p99 {stats['p99_ms']:9.1f} ms")
+    print(f"memory: {report['results']['memory']}")
+    print(f"Saved {output}")
+    if args.compare:
+        compare(report, json.loads(args.compare.read_text("utf-8")))
+
+
+if __name__ == "__main__":
+    threading.current_thread().name = "benchmark"
+    main()
@@ -0,0 +1,106 @@
+"""Import-time profile of the application's startup path.
+
+Runs `python -X importtime` in fresh interpreters and reports, as the median
+of --repeats runs:
+
+* startup: importing trading_journal.gui (everything the window and the
+  hotkeys need), with its slowest modules;
+* eager: the same plus every library the package defers, i.e. what startup
+  cost when the tool imported everything up front;
+* the cost of each deferred library on its own (paid on first use or by the
+  background warm-up after the window is up).
+
+It also checks that none of the deferred libraries is imported by the startup
+path. Results are written to benchmarks/results/import-<timestamp>.json.
+
+    python benchmarks/import_profile.py --repeats 7
+"""
+import argparse
+import datetime
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+STARTUP_MODULE = "trading_journal.gui"
+DEFERRED_MODULES = ("cv2", "numpy", "PIL.Image", "PIL.ImageTk", "docx", "requests", "mss", "mss.tools", "screeninfo")
+
+
+def import_times(statement: str) -> list:
+    """Runs `statement` in a fresh interpreter; returns [(module, depth, self_us, cumulative_us)]."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", statement], cwd=REPO_DIR,
+                            capture_output=True, text=True, check=True)
+    times = []
+    for line in result.stderr.splitlines():
+        parts = line[len("import time:"):].split("|")
+        if not line.startswith("import time:") or len(parts) != 3 or not parts[0].strip().isdigit():
+            continue # The header line
+        depth = (len(parts[2]) - len(parts[2].lstrip()) - 1) // 2 # Nested imports are indented by two spaces
+        times.append((parts[2].strip(), depth, int(parts[0]), int(parts[1])))
+    return times
+
+
+def median_run(statement: str, repeats: int, baseline: set = frozenset()) -> tuple:
+    """Median total import time in ms of the statement's top-level imports, leaving
+    out the interpreter's own (`baseline`) imports, and that run's details."""
+    runs = [[entry for entry in import_times(statement) if entry[0] not in baseline] for _ in range(repeats)]
+    totals = [sum(cumulative for _, depth, _, cumulative in run if depth == 0) / 1000 for run in runs]
+    median = sorted(totals)[len(totals) // 2]
+    return median, runs[totals.index(median)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="slowest startup modules to list")
+    parser.add_argument("--output", type=Path, help="result file (default: benchmarks/results/import-<timestamp>.json)")
+    args = parser.parse_args()
+
+    check = subprocess.run([sys.executable, "-c", f"import sys, {STARTUP_MODULE}; "
+                            f"print(','.join(m for m in {DEFERRED_MODULES!r} if m in sys.modules))"],
+                           cwd=REPO_DIR, capture_output=True, text=True, check=True)
+    loaded_at_startup = [m for m in check.stdout.strip().split(",") if m]
+
+    baseline = {name for name, _, _, _ in import_times("pass")} # site and what it pulls in
+    startup_ms, startup_run = median_run(f"import {STARTUP_MODULE}", args.repeats, baseline)
+    eager_ms, _ = median_run(f"import {STARTUP_MODULE}, {', '.join(DEFERRED_MODULES)}", args.repeats, baseline)
+    deferred = {}
+    for name in DEFERRED_MODULES:
+        deferred[name] = round(median_run(f"import {name}", args.repeats, baseline)[0], 1)
+    slowest = sorted(((name, self_us / 1000) for name, _, self_us, _ in startup_run),
+                     key=lambda e: e[1], reverse=True)[:args.top]
+
+    print(f"Startup path ({STARTUP_MODULE}): {startup_ms:7.1f} ms")
+    print(f"Eager (startup + all deferred):  {eager_ms:7.1f} ms  -> {eager_ms - startup_ms:.1f} ms "
+          f"({(eager_ms - startup_ms) / eager_ms:.0%}) off the startup path")
+    print("Deferred libraries, each in a fresh interpreter:")
+    for name, ms in deferred.items():
+        print(f"  {name:14} {ms:7.1f} ms")
+    print("Slowest startup modules (self time):")
+    for name, ms in slowest:
+        print(f"  {name:40} {ms:6.1f} ms")
+    if loaded_at_startup:
+        print(f"WARNING: imported by the startup path: {', '.join(loaded_at_startup)}")
+
+    report = {
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "repeats": args.repeats,
+        "results": {
+            "startup_ms": round(startup_ms, 1),
+            "eager_ms": round(eager_ms, 1),
+            "deferred_ms": deferred,
+            "slowest_startup_modules_ms": {name: round(ms, 2) for name, ms in slowest},
+            "deferred_loaded_at_startup": loaded_at_startup,
+        },
+    }
+    output = args.output or RESULTS_DIR / f"import-{datetime.datetime.now():%Y%m%d-%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2), "utf-8")
+    print(f"Saved {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Local stand-in for the Telegram Bot API used by the benchmark harness.
+
+Answers sendMessage / sendPhoto / sendMediaGroup / sendVideo like the real API
+(including photo file_ids), after an artificial latency, and fails a given
+share of the requests with 429 (retry_after) or 500 so retry and backoff paths
+are exercised. Counts requests, errors and received bytes.
+"""
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+METHOD_RE = re.compile(r'^/bot[^/]+/(?P<method>\w+)$')
+
+
+class TelegramStub:
+    def __init__(self, latency_ms: float = 80, jitter_ms: float = 40, error_rate: float = 0.0,
+                 rate_limit_share: float = 0.5, retry_after: int = 1):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.rate_limit_share = rate_limit_share # Share of the injected errors that are 429s (the rest are 500s)
+        self.retry_after = retry_after
+        self.lock = threading.Lock()
+        self.stats = {"requests": 0, "ok": 0, "rate_limited": 0, "server_errors": 0, "received_bytes": 0, "photos": 0}
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._make_handler())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, name="telegram-stub", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _count(self, **deltas):
+        with self.lock:
+            for key, value in deltas.items():
+                self.stats[key] += value
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass # Keep the benchmark output clean
+
+            def _reply(self, status: int, payload: dict):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                stub._count(requests=1, received_bytes=len(body))
+                time.sleep(max(0.0, stub.latency_ms + random.uniform(-stub.jitter_ms, stub.jitter_ms)) / 1000)
+
+                if random.random() < stub.error_rate:
+                    if random.random() < stub.rate_limit_share:
+                        stub._count(rate_limited=1)
+                        self._reply(429, {"ok": False, "error_code": 429,
+                                          "description": f"Too Many Requests: retry after {stub.retry_after}",
+                                          "parameters": {"retry_after": stub.retry_after}})
+                    else:
+                        stub._count(server_errors=1)
+                        self._reply(500, {"ok": False, "error_code": 500, "description": "Internal Server Error"})
+                    return
+
+                match = METHOD_RE.match(self.path)
+                method = match.group("method") if match else ""
+                if method == "sendMediaGroup":
+                    photo_count = max(1, body.count(b'"type": "photo"'))
+                    result = [stub._photo_message() for _ in range(photo_count)]
+                elif method == "sendPhoto":
+                    photo_count = 1
+                    result = stub._photo_message()
+                elif method == "sendVideo":
+                    photo_count = 0
+                    result = {"message_id": random.randint(1, 1 << 30), "video": {"file_id": f"stub-{uuid.uuid4().hex}"}}
+                elif method == "sendMessage":
+                    photo_count = 0
+                    result = {"message_id": random.randint(1, 1 << 30)}
+                else:
+                    self._reply(404, {"ok": False, "error_code": 404, "description": "Not Found: method not found"})
+                    return
+                stub._count(ok=1, photos=photo_count)
+                self._reply(200, {"ok": True, "result": result})
+
+        return Handler
+
+    @staticmethod
+    def _photo_message() -> dict:
+        file_id = f"stub-{uuid.uuid4().hex}"
+        return {"message_id": random.randint(1, 1 << 30),
+                "photo": [{"file_id": f"{file_id}-s", "width": 320}, {"file_id": file_id, "width": 2560}]}
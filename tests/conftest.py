@@ -0,0 +1,19 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from trading_journal import config, state  # noqa: E402
+
+
+@pytest.fixture
+def journal(tmp_path, monkeypatch):
+    """An empty journal under tmp_path, with the shared pipeline objects unset."""
+    base_dir = tmp_path / "Trading Journal"
+    monkeypatch.setattr(config, "BASE_DIR", base_dir)
+    for name in ("telegram_outbox", "telegram_sender", "journal_catalog", "rendition_cache", "frame_store",
+                 "journal_archive", "root", "app"):
+        monkeypatch.setattr(state, name, None)
+    return base_dir
@@ -0,0 +1,81 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from trading_journal import state
+from trading_journal.archive import (ARCHIVE_CACHED_INDEXES, JournalArchive, journal_file_exists, journal_file_stat,
+                                     list_journal_dir, read_archived_file)
+
+
+def make_day(base_dir, day: str, files: dict):
+    day_dir = base_dir / "2025" / "Spring(March)" / "Week_2" / "6E" / day
+    day_dir.mkdir(parents=True)
+    for name, data in files.items():
+        (day_dir / name).write_bytes(data)
+    return day_dir
+
+
+@pytest.fixture
+def archive(journal):
+    state.journal_archive = JournalArchive(journal)
+    return state.journal_archive
+
+
+def test_archiving_is_opt_in(journal):
+    assert not JournalArchive(journal).enabled
+    assert JournalArchive(journal, after_days=30).enabled
+
+
+def test_pack_then_read_round_trip(archive, journal):
+    entry, chart = b"entry screenshot" * 100, os.urandom(5000)
+    day_dir = make_day(journal, "2025-03-10", {"Entry_1.png": entry, "Entry_2.webp": chart})
+    os.link(day_dir / "Entry_1.png", day_dir / "Exit_1.png") # FrameStore hardlink of an unchanged frame
+    originals = {p.name: (p.stat().st_mtime_ns, p.stat().st_size) for p in day_dir.iterdir()}
+
+    stats = archive.compact_unit(day_dir)
+
+    assert stats["files"] == 3
+    assert not day_dir.exists()
+    assert (day_dir.parent / "2025-03-10.zip").is_file()
+    assert read_archived_file(day_dir / "Entry_1.png") == entry
+    assert read_archived_file(day_dir / "Exit_1.png") == entry
+    assert read_archived_file(day_dir / "Entry_2.webp") == chart
+    assert read_archived_file(day_dir / "Missing.png") is None
+    assert journal_file_exists(day_dir / "Exit_1.png")
+    assert {p.name: journal_file_stat(p) for p in list_journal_dir(day_dir)} == originals
+
+
+def test_folder_that_comes_back_is_merged_into_its_archive(archive, journal):
+    day_dir = make_day(journal, "2025-03-10", {"Entry_1.png": b"first"})
+    archive.compact_unit(day_dir)
+    make_day(journal, "2025-03-10", {"Exit_1.png": b"second"})
+    archive.compact_unit(day_dir)
+    assert read_archived_file(day_dir / "Entry_1.png") == b"first"
+    assert read_archived_file(day_dir / "Exit_1.png") == b"second"
+
+
+def test_concurrent_reads_across_more_archives_than_cached(archive, journal):
+    days = [f"2025-03-{day:02d}" for day in range(1, 29)] + [f"2025-04-{day:02d}" for day in range(1, 16)]
+    assert len(days) > ARCHIVE_CACHED_INDEXES
+    paths = {}
+    for day in days:
+        day_dir = make_day(journal, day, {"Entry_1.png": day.encode() * 50})
+        archive.compact_unit(day_dir)
+        paths[day_dir / "Entry_1.png"] = day.encode() * 50
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        for _ in range(3):
+            assert list(pool.map(read_archived_file, paths)) == list(paths.values())
+
+
+def test_budget_counts_only_the_journal_days(journal):
+    (journal / ".cache").mkdir(parents=True)
+    (journal / ".cache" / "renditions.bin").write_bytes(b"\0" * 1_000_000)
+    (journal / "journal_catalog.sqlite3").write_bytes(b"\0" * 1_000_000)
+    older = make_day(journal, "2025-03-10", {"Entry_1.png": b"\0" * 200_000})
+    newer = make_day(journal, "2025-03-11", {"Entry_1.png": b"\0" * 200_000})
+    state.journal_archive = JournalArchive(journal, budget_bytes=300_000)
+    assert state.journal_archive.journal_bytes() == 400_000
+    stats = state.journal_archive.compact()
+    assert stats["units"] == 1 # Packing the oldest day brings the journal under budget
+    assert not older.exists() and newer.exists()
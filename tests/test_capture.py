@@ -0,0 +1,88 @@
+import queue
+from concurrent.futures import Future
+from types import SimpleNamespace
+
+import pytest
+
+from trading_journal import capture
+from trading_journal.capture import CaptureService
+
+
+def task_args(event="Entry", inst="6E", description="Breakout"):
+    return (event, inst, "Monitor 1,Monitor 2", "", False, description, "png", None)
+
+
+@pytest.fixture
+def service(journal):
+    """A capture service whose queue is never drained (no workers started)."""
+    service = CaptureService()
+    service.configure(workers=1, queue_size=4, coalesce_ms=750)
+    service.requests = queue.Queue(maxsize=service.queue_size)
+    return service
+
+
+def test_identical_press_within_window_is_merged(service):
+    first, second = Future(), Future()
+    assert service.request_capture(10.0, *task_args(), result=first) == "accepted"
+    assert service.request_capture(10.2, *task_args(), result=second) == "merged"
+    first.set_result({"outcome": "accepted", "paths": ["a.png"]})
+    assert second.result(timeout=1) == {"outcome": "merged", "paths": ["a.png"]}
+    assert service.requests.qsize() == 1
+
+
+def test_press_after_window_is_accepted(service):
+    assert service.request_capture(10.0, *task_args()) == "accepted"
+    assert service.request_capture(10.8, *task_args()) == "accepted"
+
+
+@pytest.mark.parametrize("other", [task_args("Exit"), task_args(inst="ES"), task_args(description="Pullback")])
+def test_different_press_within_window_is_not_merged(service, other):
+    assert service.request_capture(10.0, *task_args()) == "accepted"
+    assert service.request_capture(10.1, *other) == "accepted"
+    assert service.requests.qsize() == 2
+
+
+def test_full_queue_drops_the_press(service):
+    for i in range(service.queue_size):
+        assert service.request_capture(10.0 + i, *task_args()) == "accepted"
+    result = Future()
+    assert service.request_capture(20.0, *task_args(), result=result) == "dropped"
+    assert result.result(timeout=1) == {"outcome": "dropped"}
+
+
+def test_press_without_coalescing_is_always_queued(service):
+    assert service.request_capture(10.0, *task_args()) == "accepted"
+    assert service.request_capture(10.1, *task_args(), coalesce=False) == "accepted"
+    assert service.requests.qsize() == 2
+
+
+class FakeGrabber:
+    def close(self):
+        pass
+
+
+def test_worker_captures_with_the_layout_current_at_the_press(service, monkeypatch):
+    calls = queue.Queue()
+    monkeypatch.setattr(capture, "mss", SimpleNamespace(mss=FakeGrabber))
+    monkeypatch.setattr(capture, "grab_all_monitors", lambda sct, regions: None)
+    monkeypatch.setattr(capture, "take_screenshot_task", lambda *args, **kwargs: calls.put(kwargs))
+    service.LAYOUT_POLL_SECONDS = 3600 # The worker only wakes up for requests
+    monitors = [SimpleNamespace(x=0, y=0, width=1920, height=1080)]
+    service.monitors, service.layout_signature = monitors, ((0, 0, 1920, 1080),)
+    service.set_region_profile("", None)
+    service.threads.append(capture.threading.Thread(target=service._run, daemon=True))
+    service.threads[0].start()
+
+    service.request_capture(10.0, *task_args(), coalesce=False)
+    first = calls.get(timeout=5)
+    assert first["capture_plan"][0]["label"] is None and first["current_monitors"] is monitors
+
+    service.set_region_profile("Chart", {"1": [{"left": 0, "top": 0, "width": 960, "height": 1080, "label": "Chart"}]})
+    with service.lock: # A layout change while the worker waits: the press gets a new grabber and the new monitors
+        service.monitors = [SimpleNamespace(x=0, y=0, width=2560, height=1440)]
+        service.layout_signature = ((0, 0, 2560, 1440),)
+    service.request_capture(11.0, *task_args(), coalesce=False)
+    second = calls.get(timeout=5)
+    assert [e["label"] for e in second["capture_plan"]] == ["Chart"]
+    assert second["current_monitors"][0].width == 2560
+    assert second["sct"] is not first["sct"]
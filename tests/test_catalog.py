@@ -0,0 +1,78 @@
+from pathlib import Path
+
+import pytest
+
+from trading_journal.catalog import JournalCatalog
+
+
+@pytest.fixture
+def catalog(journal, tmp_path):
+    return JournalCatalog(tmp_path / "catalog.sqlite3", journal)
+
+
+def test_parse_path_reads_the_journal_layout(catalog, journal):
+    image = journal / "2025" / "Spring(March)" / "Week_11" / "6E" / "2025-03-10" / "Entry" / "Monitor 1_09-30-15.png"
+    assert catalog.parse_path(image) == (str(image), str(image.parent), "Entry", "6E", "2025-03-10", "09-30-15",
+                                         "Monitor 1")
+
+
+@pytest.mark.parametrize("rel", [
+    "2025/Spring(March)/Week_11/6E/2025-03-10/Entry/notes.txt", # Not a screenshot
+    "2025/Spring(March)/Week_11/6E/2025-03-10/Entry/Monitor 1_09-30-15.txt",
+    "2025/Spring(March)/Week_11/6E/Entry/Monitor 1_09-30-15.png", # Missing the day folder
+    "2025/Spring(March)/Week_11/6E/March 10/Entry/Monitor 1_09-30-15.png",
+])
+def test_parse_path_rejects_other_files(catalog, journal, rel):
+    assert catalog.parse_path(journal / rel) is None
+
+
+def test_parse_path_ignores_files_outside_the_journal(catalog):
+    assert catalog.parse_path(Path("/elsewhere/2025/Spring(March)/Week_11/6E/2025-03-10/Entry/Monitor 1_09-30-15.png")) is None
+
+
+def test_added_files_are_grouped_into_events(catalog, journal):
+    event_dir = journal / "2025" / "Spring(March)" / "Week_11" / "6E" / "2025-03-10" / "Entry"
+    paths = [event_dir / "Monitor 1_09-30-15.png", event_dir / "Monitor 2_09-30-15.png", event_dir / "notes.txt"]
+    assert catalog.add_files(paths) == 2
+    assert catalog.event_images(event_dir, "09-30-15") == paths[:2]
+    [event] = catalog.find_events(instrument="6E")
+    assert (event["day"], event["ts"], event["event"], event["images"]) == ("2025-03-10", "09-30-15", "Entry", 2)
+
+
+def make_event(journal, day: str, inst: str, event: str, names: list) -> Path:
+    event_dir = journal / day[:4] / "Spring(March)" / "Week_11" / inst / day / event
+    event_dir.mkdir(parents=True)
+    for name in names:
+        (event_dir / name).write_bytes(b"png")
+    return event_dir
+
+
+def test_find_events_filters_by_day_instrument_and_event(catalog, journal):
+    make_event(journal, "2025-03-10", "6E", "Entry", ["Monitor 1_09-30-15.png"])
+    make_event(journal, "2025-03-11", "6E", "Exit", ["Monitor 1_10-00-00.png"])
+    make_event(journal, "2025-03-12", "ES", "Entry", ["Monitor 1_11-00-00.png"])
+    assert catalog.backfill()["files"] == 3
+    assert [e["day"] for e in catalog.find_events()] == ["2025-03-12", "2025-03-11", "2025-03-10"]
+    assert [e["day"] for e in catalog.find_events(day_from="2025-03-11", day_to="2025-03-11")] == ["2025-03-11"]
+    assert [e["day"] for e in catalog.find_events(instrument="6E", event="Entry")] == ["2025-03-10"]
+    assert len(catalog.find_events(limit=1)) == 1
+
+
+def test_backfill_rescans_only_changed_folders_and_drops_deleted_ones(catalog, journal):
+    kept = make_event(journal, "2025-03-10", "6E", "Entry", ["Monitor 1_09-30-15.png"])
+    gone = make_event(journal, "2025-03-11", "6E", "Entry", ["Monitor 1_10-00-00.png"])
+    catalog.backfill()
+    assert catalog.backfill()["rescanned"] == 0
+    (gone / "Monitor 1_10-00-00.png").unlink()
+    gone.rmdir()
+    stats = catalog.backfill()
+    assert (stats["rescanned"], stats["removed_dirs"]) == (0, 1)
+    assert [e["event_dir"] for e in catalog.find_events()] == [kept]
+
+
+def test_index_dir_forgets_deleted_screenshots(catalog, journal):
+    event_dir = make_event(journal, "2025-03-10", "6E", "Entry", ["Monitor 1_09-30-15.png", "Monitor 2_09-30-15.png"])
+    assert catalog.index_dir(event_dir) == 2
+    (event_dir / "Monitor 2_09-30-15.png").unlink()
+    assert catalog.index_dir(event_dir) == 1
+    assert catalog.event_images(event_dir, "09-30-15") == [event_dir / "Monitor 1_09-30-15.png"]
@@ -0,0 +1,82 @@
+import time
+from concurrent.futures import Future
+from types import SimpleNamespace
+
+import cv2
+import numpy as np
+import pytest
+
+from trading_journal import clips
+from trading_journal.clips import ClipRecorder, encode_clip_process
+
+
+def jpeg(value, width=64, height=48):
+    return cv2.imencode(".jpg", np.full((height, width, 3), value, dtype=np.uint8))[1].tobytes()
+
+
+class InlineExecutor:
+    def submit(self, fn, *args):
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+
+@pytest.fixture
+def recorder(monkeypatch):
+    recorder = ClipRecorder()
+    recorder.configure(enabled=True, pre_seconds=2, post_seconds=1, fps=10, max_side=0, quality=70, send_telegram=True)
+    queued = []
+    monkeypatch.setattr(clips, "clip_process_executor", InlineExecutor())
+    monkeypatch.setattr(clips, "add_to_telegram_queue", lambda chat_id, kind, **kwargs: queued.append((chat_id, kind, kwargs)))
+    recorder.queued = queued
+    return recorder
+
+
+def test_clip_is_played_back_in_real_time(tmp_path):
+    out_path = tmp_path / "Clip Chart_09-30-15.mp4"
+    frames = [(100.0, jpeg(0)), (100.5, jpeg(128)), (101.0, jpeg(255, 65, 49))] # Odd sizes are cropped to even
+    result = encode_clip_process(frames, str(out_path), 10, "mp4v")
+    assert (result["frames"], result["seconds"]) == (11, 1.0)
+    video = cv2.VideoCapture(str(out_path))
+    assert int(video.get(cv2.CAP_PROP_FRAME_COUNT)) == 11
+    assert (video.get(cv2.CAP_PROP_FRAME_WIDTH), video.get(cv2.CAP_PROP_FRAME_HEIGHT)) == (64, 48)
+    video.release()
+
+
+def test_begin_keeps_only_the_configured_pre_trigger_seconds(recorder):
+    recorder.thread = SimpleNamespace(is_alive=lambda: True) # No grabs: the recorder thread is not started
+    pre_frames = [(t, [(0, b"x")]) for t in (95.0, 97.5, 98.0, 99.5)]
+    recorder.begin("e1", None, "09-30-15", ["Chart"], pre_frames, trigger_time=100.0)
+    assert [t for t, _ in recorder.recordings[0]["frames"]] == [98.0, 99.5]
+    assert recorder.recordings[0]["until"] == 101.0
+    assert recorder.get_status_text() == "Clips: 1 recording, 0 encoding"
+
+
+def test_finished_recording_is_encoded_per_monitor_and_queued(recorder, tmp_path):
+    frames = [(100.0 + i * 0.5, [(0, jpeg(10 * i)), (1, jpeg(200))]) for i in range(3)]
+    recording = {"event_id": "e1", "save_dir": tmp_path, "ts": "09-30-15", "names": ["Chart"], "frames": frames,
+                 "telegram_chat_id": "1, 2", "caption": "6E Entry", "captured_at": 100.0}
+    recorder._encode(recording)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["Clip Chart_09-30-15.mp4", "Clip Monitor 2_09-30-15.mp4"]
+    assert recorder.encoding == 0
+    assert [(chat, kind, kwargs["caption"]) for chat, kind, kwargs in recorder.queued] == [
+        ("1", "video", "6E Entry (Chart)"), ("2", "video", "6E Entry (Chart)"),
+        ("1", "video", "6E Entry (Monitor 2)"), ("2", "video", "6E Entry (Monitor 2)")]
+
+
+def test_recorder_thread_shares_grabs_until_each_event_ends(recorder, monkeypatch, tmp_path):
+    shot = np.zeros((48, 64, 4), dtype=np.uint8)
+    monkeypatch.setattr(clips, "mss", SimpleNamespace(mss=lambda: SimpleNamespace(close=lambda: None)))
+    monkeypatch.setattr(clips, "grab_all_monitors", lambda sct, regions: [(shot, None, None), (shot, None, None)])
+    encoded = []
+    monkeypatch.setattr(recorder, "_encode", encoded.append)
+    now = time.time()
+    recorder.begin("e1", tmp_path, "09-30-15", ["Chart"], [], trigger_time=now)
+    recorder.begin("e2", tmp_path, "09-30-15", ["Chart"], [], trigger_time=now + 0.3)
+    deadline = time.monotonic() + 10
+    while len(encoded) < 2 and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert [r["event_id"] for r in encoded] == ["e1", "e2"]
+    assert all(len(monitor_frames) == 2 for r in encoded for _, monitor_frames in r["frames"])
+    assert len(encoded[1]["frames"]) > len(encoded[0]["frames"]) >= 5 # One second at 10 fps, less scheduling slack
+    assert recorder.recordings == []
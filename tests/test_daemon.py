@@ -0,0 +1,93 @@
+import http.client
+import json
+import queue
+import threading
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from trading_journal.capture import capture_service
+from trading_journal.daemon import TriggerHandler
+
+CFG = {"instrument": "6E", "monitor_names": "Monitor 1", "telegram_chat_id": "", "enable_telegram_send": False,
+       "default_description": "Setup", "image_codec": "png", "image_codec_level": None, "daemon_token": "secret"}
+
+
+@pytest.fixture
+def server(journal, monkeypatch):
+    """The trigger API on a free loopback port, with a capture queue nobody drains."""
+    monkeypatch.setattr(capture_service, "requests", queue.Queue(maxsize=4))
+    monkeypatch.setattr(capture_service, "last_accepted", {})
+    monkeypatch.setattr(capture_service, "last_accepted_at", None) # Else the archive job waits for captures to settle
+    server = ThreadingHTTPServer(("127.0.0.1", 0), TriggerHandler)
+    server.daemon_threads = True
+    server.cfg = dict(CFG)
+    threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def post(conn, body, path="/capture", token="secret", headers=None):
+    data = body if isinstance(body, bytes) else json.dumps(body).encode()
+    conn.request("POST", path, data, {"X-Trigger-Token": token, "Content-Type": "application/json", **(headers or {})})
+    response = conn.getresponse()
+    return response, json.loads(response.read())
+
+
+@pytest.fixture
+def conn(server):
+    conn = http.client.HTTPConnection(*server.server_address, timeout=5)
+    yield conn
+    conn.close()
+
+
+def test_queued_capture_without_waiting_is_accepted(conn):
+    response, payload = post(conn, {"event": "Entry", "wait": False})
+    assert (response.status, payload) == (202, {"outcome": "accepted"})
+    _, task_args, _ = capture_service.requests.get_nowait()
+    assert task_args[:2] == ("Entry", "6E")
+
+
+def test_null_description_falls_back_to_the_configured_one(conn):
+    post(conn, {"event": "Exit", "description": None, "instrument": None, "wait": False})
+    _, task_args, _ = capture_service.requests.get_nowait()
+    assert (task_args[1], task_args[5]) == ("6E", "Setup")
+
+
+@pytest.mark.parametrize("body", [{"event": "Scale-in"}, {"event": "Entry", "instrument": "../../etc"}, b"not json", b"[1]"])
+def test_invalid_request_is_rejected(conn, body):
+    response, payload = post(conn, body)
+    assert response.status == 400
+    assert "error" in payload
+
+
+def test_wrong_token_is_rejected_and_the_connection_closed(conn):
+    response, _ = post(conn, {"event": "Entry"}, token="guess")
+    assert response.status == 401
+    assert response.getheader("Connection") == "close" # The unread body must not become the next request
+
+
+def test_unknown_path_is_not_found(conn):
+    response, _ = post(conn, {"event": "Entry"}, path="/shutdown")
+    assert response.status == 404
+    assert response.getheader("Connection") == "close"
+
+
+def test_negative_content_length_is_rejected(server):
+    conn = http.client.HTTPConnection(*server.server_address, timeout=5)
+    conn.putrequest("POST", "/capture")
+    conn.putheader("X-Trigger-Token", "secret")
+    conn.putheader("Content-Length", "-1")
+    conn.endheaders()
+    response = conn.getresponse()
+    assert response.status == 400
+    assert response.getheader("Connection") == "close"
+    conn.close()
+
+
+def test_keep_alive_connection_serves_several_requests(conn):
+    for event in ("Entry", "Exit"):
+        response, _ = post(conn, {"event": event, "wait": False})
+        assert response.status == 202
+    assert capture_service.requests.qsize() == 2
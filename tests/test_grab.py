@@ -0,0 +1,61 @@
+from types import SimpleNamespace
+
+import pytest
+
+from trading_journal.capture import CaptureService
+from trading_journal.grab import build_capture_plan, get_plan_coverage, validate_region_profiles
+
+MONITORS = [SimpleNamespace(x=0, y=0, width=1920, height=1080), SimpleNamespace(x=1920, y=0, width=1280, height=1024)]
+
+
+def test_plan_without_profile_grabs_every_monitor_in_full():
+    plan = build_capture_plan(MONITORS)
+    assert [(e["monitor_idx"], e["label"]) for e in plan] == [(0, None), (1, None)]
+    assert plan[1]["region"] == {"top": 0, "left": 1920, "width": 1280, "height": 1024}
+    assert get_plan_coverage(MONITORS, plan) == 1.0
+
+
+def test_profile_crops_offsets_and_clips_regions():
+    profile = {"1": [{"left": 100, "top": 50, "width": 800, "height": 600, "label": "Chart"},
+                     {"left": 1800, "top": 0, "width": 400, "height": 2000}],
+               "2": []}
+    plan = build_capture_plan(MONITORS, profile)
+    assert [e["label"] for e in plan] == ["Chart", "1800,0"]
+    assert plan[0]["region"] == {"top": 50, "left": 100, "width": 800, "height": 600}
+    assert plan[1]["region"] == {"top": 0, "left": 1800, "width": 120, "height": 1080} # Clipped to monitor 1
+    assert get_plan_coverage(MONITORS, plan) == pytest.approx((800 * 600 + 120 * 1080) / (1920 * 1080 + 1280 * 1024))
+
+
+def test_region_outside_its_monitor_is_skipped():
+    plan = build_capture_plan(MONITORS, {"2": [{"left": 1500, "top": 0, "width": 100, "height": 100}]})
+    assert [e["monitor_idx"] for e in plan] == [0]
+
+
+@pytest.mark.parametrize("profiles", [
+    [],
+    {"Scalping": []},
+    {"Scalping": {"one": []}},
+    {"Scalping": {"0": []}},
+    {"Scalping": {"1": {"left": 0}}},
+    {"Scalping": {"1": ["chart"]}},
+    {"Scalping": {"1": [{"left": 0, "top": 0, "width": -5, "height": 100}]}},
+    {"Scalping": {"1": [{"left": 0, "top": 0, "width": 100}]}},
+])
+def test_malformed_profiles_are_rejected(profiles):
+    with pytest.raises(ValueError):
+        validate_region_profiles(profiles)
+
+
+def test_valid_profiles_pass_unchanged():
+    profiles = {"Scalping": {"1": [{"left": 0, "top": 0, "width": 800, "height": 600, "label": "Chart"}], "2": []}}
+    assert validate_region_profiles(profiles) is profiles
+
+
+def test_capture_service_switches_profiles(journal):
+    service = CaptureService()
+    service.monitors = MONITORS
+    coverage = service.set_region_profile("Chart only", {"1": [{"left": 0, "top": 0, "width": 960, "height": 1080}], "2": []})
+    assert [e["region"]["width"] for e in service.capture_plan] == [960]
+    assert coverage == pytest.approx(960 * 1080 / (1920 * 1080 + 1280 * 1024))
+    assert service.set_region_profile("", None) == 1.0
+    assert [e["label"] for e in service.capture_plan] == [None, None]
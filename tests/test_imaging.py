@@ -0,0 +1,10 @@
+import subprocess
+import sys
+from pathlib import Path
+
+
+def test_imaging_import_stays_headless():
+    # capture and the daemon import the codec module; it must not pull in the GUI toolkit
+    code = "import sys, trading_journal.imaging; sys.exit('tkinter' in sys.modules)"
+    result = subprocess.run([sys.executable, "-c", code], cwd=Path(__file__).resolve().parent.parent)
+    assert result.returncode == 0
@@ -0,0 +1,73 @@
+import datetime
+import gzip
+import logging
+import queue
+from types import SimpleNamespace
+
+import pytest
+
+from trading_journal import logs
+from trading_journal.logs import CompressingRotatingFileHandler, SheddingQueueHandler, log_throttled, trim_payload
+
+
+def record(message, level=logging.INFO):
+    return logging.makeLogRecord({"msg": message, "levelno": level, "levelname": logging.getLevelName(level)})
+
+
+def test_trim_payload_keeps_short_text_and_cuts_long_text():
+    assert trim_payload("ok") == "ok"
+    trimmed = trim_payload("x" * 1000)
+    assert trimmed == "x" * logs.LOG_PAYLOAD_MAX_CHARS + "... (1000 chars)"
+
+
+def test_log_throttled_counts_suppressed_repeats(monkeypatch, caplog):
+    clock = [1000.0]
+    monkeypatch.setattr(logs, "time", SimpleNamespace(monotonic=lambda: clock[0]))
+    caplog.set_level(logging.DEBUG)
+    for offset in (0, 1, 2, 59, 61, 62):
+        clock[0] = 1000.0 + offset
+        log_throttled("test-throttle", 60, logging.WARNING, "Grab failed")
+    assert [r.getMessage() for r in caplog.records] == ["Grab failed", "Grab failed (3 similar message(s) suppressed)"]
+
+
+@pytest.fixture
+def handler(tmp_path):
+    handler = CompressingRotatingFileHandler(tmp_path / "logs" / "app.log", 200, 2)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    yield handler
+    handler.close()
+
+
+def test_rotation_by_size_gzips_and_caps_the_backups(handler, tmp_path):
+    for i in range(20):
+        handler.handle(record(f"line {i:02d} " + "x" * 40))
+    log_dir = tmp_path / "logs"
+    assert sorted(p.name for p in log_dir.iterdir()) == ["app.log", "app.log.1.gz", "app.log.2.gz"]
+    newest_backup = gzip.decompress((log_dir / "app.log.1.gz").read_bytes()).decode("utf-8")
+    current = (log_dir / "app.log").read_text("utf-8")
+    assert newest_backup.splitlines()[-1].startswith("line ") and current.startswith("line 1")
+    assert (log_dir / "app.log").stat().st_size <= 200
+
+
+def test_rotation_at_midnight(handler, tmp_path):
+    handler.handle(record("yesterday"))
+    handler.current_day = datetime.date.today() - datetime.timedelta(days=1)
+    handler.handle(record("today"))
+    log_dir = tmp_path / "logs"
+    assert gzip.decompress((log_dir / "app.log.1.gz").read_bytes()) == b"yesterday\n"
+    assert (log_dir / "app.log").read_text("utf-8") == "today\n"
+    assert handler.current_day == datetime.date.today()
+
+
+def test_backed_up_queue_sheds_below_warning(monkeypatch):
+    monkeypatch.setattr(logs, "LOG_QUEUE_SHED_THRESHOLD", 3)
+    handler = SheddingQueueHandler(queue.Queue())
+    for i in range(6):
+        handler.handle(record(f"debug {i}", logging.DEBUG))
+    handler.handle(record("still there", logging.WARNING))
+    handler.handle(record("also there", logging.ERROR))
+    assert handler.shed_count == 2
+    messages = []
+    while not handler.queue.empty():
+        messages.append(handler.queue.get_nowait().getMessage())
+    assert messages == ["debug 0", "debug 1", "debug 2", "debug 3", "still there", "also there"]
@@ -0,0 +1,30 @@
+import json
+import time
+
+from trading_journal.metrics import PipelineMetrics
+
+
+def wait_for(condition, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_metrics_file_rotates_by_size(tmp_path):
+    metrics = PipelineMetrics(tmp_path / "logs" / "metrics.jsonl")
+    metrics.handler.maxBytes, metrics.handler.backupCount = 1000, 2
+    for i in range(200):
+        metrics.record(f"event-{i}", "encode", 12.5, monitor=1)
+    current = tmp_path / "logs" / "metrics.jsonl"
+    assert wait_for(lambda: current.exists() and '"event-199"' in current.read_text("utf-8"))
+    assert (tmp_path / "logs" / "metrics.jsonl.2.gz").exists()
+    assert not (tmp_path / "logs" / "metrics.jsonl.3.gz").exists()
+    assert current.stat().st_size <= 1000
+    assert json.loads(current.read_text("utf-8").splitlines()[-1])["event_id"] == "event-199"
+
+def test_summary_reports_recent_percentiles(tmp_path):
+    metrics = PipelineMetrics(tmp_path / "metrics.jsonl", window=10)
+    for duration in range(1, 21):
+        metrics.record(None, "grab", float(duration))
+    assert metrics.summary()["grab"] == {"count": 10, "p50_ms": 16.0, "p95_ms": 20.0, "max_ms": 20.0}
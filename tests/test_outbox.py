@@ -0,0 +1,63 @@
+import pytest
+
+from trading_journal.telegram import TelegramOutbox
+
+
+@pytest.fixture
+def outbox(tmp_path):
+    return TelegramOutbox(tmp_path / "outbox.sqlite3")
+
+
+def due_ids(outbox) -> list:
+    return [item_id for item_id, _, _, _ in outbox.due_heads()]
+
+
+def test_outbox_keeps_event_order_per_chat(outbox):
+    first = outbox.put({'chat_id': "-100", 'type': 'message', 'message': "a", 'event_id': "e1"})
+    second = outbox.put({'chat_id': "-100", 'type': 'message', 'message': "b", 'event_id': "e1"})
+    other = outbox.put({'chat_id': "-200", 'type': 'message', 'message': "c", 'event_id': "e1"})
+    assert due_ids(outbox) == [first, other]
+    outbox.mark_sent(first)
+    assert due_ids(outbox) == [second, other]
+
+
+def test_outbox_holds_dependent_items_until_their_dependency_is_done(outbox):
+    album = outbox.put({'chat_id': "-100", 'type': 'message', 'message': "album"})
+    clip = outbox.put({'chat_id': "-100", 'type': 'message', 'message': "clip", 'depends_on': album})
+    assert due_ids(outbox) == [album]
+    outbox.mark_failed(album, "gave up")
+    assert due_ids(outbox) == [clip]
+
+
+def test_outbox_retry_backs_off_until_released(outbox):
+    item_id = outbox.put({'chat_id': "-100", 'type': 'message', 'message': "a"})
+    outbox.mark_retry(item_id, "timeout", 60)
+    assert outbox.due_heads() == []
+    assert 59 < outbox.seconds_until_next_due() <= 60
+    assert outbox.release_backoff() == 1
+    [(due_id, _, attempts, _)] = outbox.due_heads()
+    assert (due_id, attempts) == (item_id, 1)
+
+
+def test_outbox_resumes_pending_items_after_restart(outbox):
+    outbox.put({'chat_id': "-100", 'type': 'message', 'message': "a"})
+    reopened = TelegramOutbox(outbox.path)
+    assert reopened.pending_count() == 1
+
+
+def test_outbox_restores_paths_in_photo_payloads(outbox, tmp_path):
+    image = tmp_path / "Monitor 1_09-30-15.png"
+    outbox.put({'chat_id': "-100", 'type': 'album', 'caption': "Entry",
+                'photos': [{'image_path': image, 'caption': "Monitor 1"}]})
+    [(_, item, _, _)] = outbox.due_heads()
+    assert item['photos'][0]['image_path'] == image
+
+
+def test_outbox_knows_which_folders_pending_items_use(outbox, tmp_path):
+    event_dir = tmp_path / "2025" / "Entry"
+    item_id = outbox.put({'chat_id': "-100", 'type': 'photo', 'image_path': event_dir / "Monitor 1_09-30-15.png",
+                          'caption': ""})
+    assert outbox.references(tmp_path / "2025")
+    assert not outbox.references(tmp_path / "2024")
+    outbox.mark_sent(item_id)
+    assert not outbox.references(tmp_path / "2025")
@@ -0,0 +1,60 @@
+import datetime
+
+import cv2
+import numpy as np
+
+from trading_journal.pretrigger import PreTriggerBuffer, compress_frame, save_pretrigger_task
+
+
+def buffer(seconds=30, max_mb=1):
+    buf = PreTriggerBuffer()
+    buf.configure(fps=1, seconds=seconds, max_mb=max_mb, max_side=0, quality=70)
+    return buf
+
+
+def frame(size, monitors=2):
+    return [(idx, b"x" * size) for idx in range(monitors)]
+
+
+def test_frames_older_than_the_window_are_evicted():
+    buf = buffer(seconds=5)
+    for t in range(100, 110):
+        buf._append(float(t), frame(1000))
+    assert [t for t, _ in buf.frames] == [104.0, 105.0, 106.0, 107.0, 108.0, 109.0]
+    assert buf.total_bytes == 6 * 2 * 1000
+
+
+def test_byte_budget_evicts_the_oldest_frames():
+    buf = buffer(seconds=3600, max_mb=1)
+    for t in range(10):
+        buf._append(float(t), frame(200 * 1024)) # 400 KiB per tick over two monitors
+    assert [t for t, _ in buf.frames] == [8.0, 9.0]
+    assert buf.total_bytes == 2 * 400 * 1024 <= buf.max_bytes
+
+
+def test_snapshot_stops_at_the_press_and_stop_empties_the_buffer():
+    buf = buffer()
+    for t in range(5):
+        buf._append(float(t), frame(10))
+    assert [t for t, _ in buf.snapshot(until=2.5)] == [0.0, 1.0, 2.0]
+    buf.stop()
+    assert buf.snapshot() == [] and buf.total_bytes == 0
+
+
+def test_configure_clamps_the_rate():
+    buf = PreTriggerBuffer()
+    buf.configure(fps=100, seconds=0, max_mb=0, max_side=1280, quality=60)
+    assert (buf.fps, buf.seconds, buf.max_bytes) == (10.0, 1, 1024 * 1024)
+
+
+def test_compress_frame_downscales_to_the_longest_side():
+    bgra = np.zeros((600, 1000, 4), dtype=np.uint8)
+    decoded = cv2.imdecode(np.frombuffer(compress_frame(bgra, 500, 70), np.uint8), cv2.IMREAD_COLOR)
+    assert decoded.shape == (300, 500, 3)
+
+
+def test_saved_frames_are_named_by_monitor_and_time(tmp_path):
+    wall_time = datetime.datetime(2026, 3, 2, 9, 30, 15, 250000).timestamp()
+    save_pretrigger_task([(wall_time, [(0, b"a"), (1, b"b")])], tmp_path, "09-30-16", ["Chart"])
+    out_dir = tmp_path / "Pre-Trigger_09-30-16"
+    assert sorted(p.name for p in out_dir.iterdir()) == ["Chart_09-30-15.250.jpg", "Monitor 2_09-30-15.250.jpg"]
@@ -0,0 +1,50 @@
+from trading_journal import telegram
+from trading_journal.telegram import TelegramOutbox, TelegramSender, get_telegram_item_cost
+
+
+def test_token_bucket_waits_for_refill_and_honours_blocks():
+    bucket = telegram.TokenBucket(2, 1.0)
+    assert bucket.wait_time(2) == 0
+    bucket.consume(2)
+    assert 0 < bucket.wait_time(1) <= 0.5
+    assert bucket.wait_time(10) <= 1.0 # Costs above the capacity only wait for a full bucket
+    bucket.block_for(30)
+    assert bucket.wait_time(0) > 29
+
+
+def test_limiter_separates_chats_and_uses_group_rates():
+    limiter = telegram.TelegramRateLimiter()
+    assert limiter.try_acquire("123", 1) == 0
+    assert limiter.try_acquire("123", 1) > 0 # Private chat: one message per second
+    assert limiter.try_acquire("456", 1) == 0
+    assert limiter.try_acquire("-100", 10) == 0 # Group: 20 per minute
+    assert limiter.try_acquire("-100", 10) == 0
+    assert limiter.try_acquire("-100", 1) > 0
+    limiter.block_chat("456", 60)
+    assert limiter.try_acquire("456", 1) > 59
+
+
+def test_album_costs_one_message_per_photo():
+    assert get_telegram_item_cost({'type': 'album', 'photos': [{}, {}, {}]}) == 3
+    assert get_telegram_item_cost({'type': 'message'}) == 1
+
+
+class RateLimitedResponse:
+    status_code, ok, text = 429, False, "Too Many Requests"
+
+    def json(self):
+        return {"ok": False, "description": "Too Many Requests: retry after 7", "parameters": {"retry_after": 7}}
+
+
+def test_rate_limited_send_blocks_the_chat_until_retry_after(tmp_path, monkeypatch):
+    outbox = TelegramOutbox(tmp_path / "outbox.sqlite3")
+    sender = TelegramSender(outbox)
+    item_id = outbox.put({'chat_id': "-100", 'type': 'message', 'message': "Entry"})
+    monkeypatch.setattr(telegram, "send_telegram_item", lambda *args, **kwargs: (RateLimitedResponse(), {}))
+    [(_, item, attempts, _)] = outbox.due_heads()
+    sender._attempt(item_id, item, attempts + 1)
+    assert sender.limiter.try_acquire("-100", 1) > 6
+    assert sender.limiter.try_acquire("-200", 1) == 0
+    assert outbox.due_heads() == []
+    assert 6 < outbox.seconds_until_next_due() <= 7
+    assert outbox.pending_count() == 1
@@ -0,0 +1,87 @@
+import os
+
+import cv2
+import numpy as np
+
+from trading_journal.renditions import RenditionCache
+
+
+def noise(seed, width=64, height=48):
+    return np.random.default_rng(seed).integers(0, 256, (height, width, 3), dtype=np.uint8)
+
+
+def open_cache(cache_dir, max_bytes):
+    cache = RenditionCache(cache_dir, max_bytes)
+    cache.indexed.wait(5)
+    return cache
+
+
+def stored_size(cache, name):
+    return (cache.cache_dir / name).stat().st_size
+
+
+def test_store_evicts_least_recently_used_by_bytes(tmp_path):
+    cache = open_cache(tmp_path / ".cache", 10**9)
+    for name, seed in (("a.jpg", 1), ("b.jpg", 2)):
+        cache._store(name, noise(seed), 95)
+    cache.max_bytes = cache.total_bytes + stored_size(cache, "a.jpg") // 2 # Room for two and a half frames
+    assert cache._load("a.jpg") is not None # a is now the most recently used
+    cache._store("c.jpg", noise(3), 95)
+    assert list(cache.entries) == ["a.jpg", "c.jpg"]
+    assert not (cache.cache_dir / "b.jpg").exists()
+    assert cache.total_bytes == sum(stored_size(cache, n) for n in cache.entries) <= cache.max_bytes
+
+
+def test_oversized_entry_is_kept_alone(tmp_path):
+    cache = open_cache(tmp_path / ".cache", 1)
+    cache._store("a.jpg", noise(1), 95)
+    cache._store("b.jpg", noise(2), 95)
+    assert list(cache.entries) == ["b.jpg"]
+
+
+def test_index_restores_recency_from_mtimes(tmp_path):
+    cache = open_cache(tmp_path / ".cache", 10**9)
+    for i, name in enumerate(("a.jpg", "b.jpg", "c.jpg")):
+        cache._store(name, noise(i), 95)
+        os.utime(cache.cache_dir / name, (1000 + i, 1000 + i))
+    os.utime(cache.cache_dir / "a.jpg", (2000, 2000)) # As _load() does for a hit
+    reopened = open_cache(tmp_path / ".cache", 10**9)
+    assert list(reopened.entries) == ["b.jpg", "c.jpg", "a.jpg"]
+    assert reopened.total_bytes == cache.total_bytes
+
+
+def test_unreadable_entry_is_dropped_on_load(tmp_path):
+    cache = open_cache(tmp_path / ".cache", 10**9)
+    cache._store("a.jpg", noise(1), 95)
+    (cache.cache_dir / "a.jpg").write_bytes(b"not a jpeg")
+    assert cache._load("a.jpg") is None
+    assert "a.jpg" not in cache.entries and cache.total_bytes == 0
+
+
+def test_layout_change_drops_display_renditions_but_keeps_thumbnails(tmp_path):
+    source = tmp_path / "Monitor 1 12-00-00.png"
+    cv2.imwrite(str(source), noise(1, 320, 200))
+    cache = open_cache(tmp_path / ".cache", 10**9)
+    cache.set_layout([(0, 0, 640, 400)])
+    frame = cache.get_display_frame(source, 640, 400)
+    assert frame.shape == (400, 640, 3)
+    assert cache.get_thumbnail(source).shape[1] == 320
+    assert len(cache.entries) == 2
+
+    cache.set_layout([(0, 0, 640, 400)]) # Same layout: nothing dropped
+    assert len(cache.entries) == 2
+    cache.set_layout([(0, 0, 800, 600)])
+    assert list(cache.entries) == [cache._key(source, "thumb")]
+    assert sorted(p.name for p in cache.cache_dir.glob("*.jpg")) == [cache._key(source, "thumb")]
+
+
+def test_changed_source_gets_a_new_rendition(tmp_path):
+    source = tmp_path / "Monitor 1 12-00-00.png"
+    cv2.imwrite(str(source), noise(1, 320, 200))
+    cache = open_cache(tmp_path / ".cache", 10**9)
+    old_key = cache._key(source, "640x400")
+    cache.get_display_frame(source, 640, 400)
+    cv2.imwrite(str(source), np.zeros((200, 320, 3), dtype=np.uint8))
+    os.utime(source, ns=(source.stat().st_atime_ns, source.stat().st_mtime_ns + 10**9))
+    assert cache._key(source, "640x400") != old_key
+    assert cache.get_display_frame(source, 640, 400).max() == 0
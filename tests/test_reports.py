@@ -0,0 +1,45 @@
+import json
+
+import cv2
+import docx
+import numpy as np
+import pytest
+
+from trading_journal import state
+from trading_journal.archive import JournalArchive
+from trading_journal.catalog import JournalCatalog
+from trading_journal.reports import build_period_report, read_event_description
+
+
+@pytest.fixture
+def event_dir(journal, tmp_path):
+    """One cataloged Entry with a screenshot and its capture info."""
+    event_dir = journal / "2025" / "Spring(March)" / "Week_11" / "6E" / "2025-03-10" / "Entry"
+    event_dir.mkdir(parents=True)
+    cv2.imwrite(str(event_dir / "Monitor 1_09-30-15.png"), np.full((90, 160, 3), 40, dtype=np.uint8))
+    (event_dir / "Capture Info_09-30-15.json").write_text(json.dumps({"description": "Breakout long"}), "utf-8")
+    state.journal_archive = JournalArchive(journal)
+    state.journal_catalog = JournalCatalog(tmp_path / "catalog.sqlite3", journal)
+    state.journal_catalog.index_dir(event_dir)
+    return event_dir
+
+
+def report_text(path) -> list:
+    return [p.text for p in docx.Document(str(path)).paragraphs]
+
+
+def test_description_is_read_from_loose_and_archived_capture_info(event_dir):
+    assert read_event_description(event_dir, "09-30-15") == "Breakout long"
+    state.journal_archive.compact_unit(event_dir.parent)
+    assert not event_dir.exists()
+    assert read_event_description(event_dir, "09-30-15") == "Breakout long"
+    assert read_event_description(event_dir, "10-00-00") is None
+
+
+def test_period_report_of_an_archived_day_keeps_descriptions(event_dir, tmp_path):
+    state.journal_archive.compact_unit(event_dir.parent)
+    stats = build_period_report("2025-03-10", "2025-03-10", out_path=tmp_path / "report.docx")
+    assert (stats["events"], stats["images"]) == (1, 1)
+    text = report_text(stats["path"])
+    assert "Breakout long" in text
+    assert "Monitor 1" in text
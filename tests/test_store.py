@@ -0,0 +1,63 @@
+import cv2
+import numpy as np
+
+from trading_journal.store import FrameStore
+
+
+def price_ladder(price: str) -> bytes:
+    """A 1920x1080 RGB frame of a chart with a price label."""
+    frame = np.full((1080, 1920, 3), 24, dtype=np.uint8)
+    cv2.line(frame, (0, 900), (1920, 200), (40, 200, 90), 3)
+    cv2.putText(frame, price, (1700, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (230, 230, 230), 1, cv2.LINE_AA)
+    return frame.tobytes()
+
+
+def store_frame(store: FrameStore, monitor_key, rgb: bytes):
+    kind, object_path, content_key, signature = store.find(monitor_key, rgb, (1920, 1080), ".png")
+    if kind is None:
+        store.put(object_path, b"encoded", 1.0)
+    store.remember(monitor_key, signature, object_path, content_key)
+    return kind, object_path
+
+
+def test_exact_is_the_default_mode(tmp_path):
+    assert FrameStore(tmp_path).mode == "exact"
+    assert FrameStore(tmp_path, "bogus").mode == "exact"
+
+
+def test_identical_frame_is_an_exact_duplicate(tmp_path):
+    store = FrameStore(tmp_path, "exact")
+    first = price_ladder("1.2345")
+    assert store_frame(store, 1, first)[0] is None
+    assert store_frame(store, 1, first)[0] == "exact"
+
+
+def test_small_text_change_is_not_a_near_duplicate(tmp_path):
+    store = FrameStore(tmp_path, "near", tolerance=2)
+    entry, changed = price_ladder("1.2345"), price_ladder("1.2346")
+    # The change is invisible at block level: every block mean moves by at most the tolerance
+    assert int(np.abs(store.block_hash(entry, (1920, 1080)) - store.block_hash(changed, (1920, 1080))).max()) <= 2
+    _, entry_object = store_frame(store, 1, entry)
+    kind, exit_object = store_frame(store, 1, changed)
+    assert kind is None
+    assert exit_object != entry_object
+
+
+def test_pixel_noise_within_tolerance_is_a_near_duplicate(tmp_path):
+    store = FrameStore(tmp_path, "near", tolerance=2)
+    entry = price_ladder("1.2345")
+    noisy = np.frombuffer(entry, dtype=np.uint8).copy()
+    noisy[::7] += 1 # Dithering-level change everywhere
+    _, entry_object = store_frame(store, 1, entry)
+    kind, object_path = store_frame(store, 1, noisy.tobytes())
+    assert kind == "near"
+    assert object_path == entry_object
+
+
+def test_near_match_only_compares_the_same_monitor(tmp_path):
+    store = FrameStore(tmp_path, "near", tolerance=2)
+    frame = price_ladder("1.2345")
+    noisy = np.frombuffer(frame, dtype=np.uint8).copy()
+    noisy[::7] += 1
+    store_frame(store, 1, frame)
+    assert store_frame(store, 2, noisy.tobytes())[0] is None
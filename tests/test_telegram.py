@@ -0,0 +1,63 @@
+import pytest
+
+from trading_journal import telegram
+from trading_journal.telegram import TelegramOutbox, TelegramSender
+
+
+class FakeResponse:
+    def __init__(self, payload: dict, status_code: int = 200):
+        self.payload = payload
+        self.status_code = status_code
+        self.ok = status_code == 200
+        self.text = str(payload)
+
+    def json(self):
+        return self.payload
+
+
+@pytest.fixture
+def outbox(tmp_path):
+    return TelegramOutbox(tmp_path / "outbox.sqlite3")
+
+
+def pending_chats(outbox) -> list:
+    return [item['chat_id'] for _, item, _, _ in outbox.due_heads()]
+
+
+def reply_with(monkeypatch, replies: dict):
+    """Answers every send with replies[chat_id]."""
+    monkeypatch.setattr(telegram, "send_telegram_item",
+                        lambda session, token, chat_id, item, file_ids=None: (replies[chat_id], {}))
+
+
+def attempt_all(sender, outbox):
+    for item_id, item, attempts, _ in outbox.due_heads():
+        sender._attempt(item_id, item, attempts + 1)
+
+
+def test_unreachable_chat_is_disabled_without_stopping_other_chats(outbox, monkeypatch):
+    sender = TelegramSender(outbox)
+    for chat_id in ("-100", "-100", "-200"):
+        outbox.put({'chat_id': chat_id, 'type': 'message', 'message': "Entry"})
+    reply_with(monkeypatch, {"-100": FakeResponse({"ok": False, "description": "Forbidden: bot was blocked by the user"}, 403),
+                             "-200": FakeResponse({"ok": True, "result": {}})})
+    attempt_all(sender, outbox)
+    assert not sender.stopped
+    assert set(sender.disabled_chats) == {"-100"}
+    assert outbox.pending_count() == 0 # Both -100 items failed, the -200 item was sent
+
+
+def test_rejected_token_stops_the_sender(outbox, monkeypatch):
+    sender = TelegramSender(outbox)
+    outbox.put({'chat_id': "-100", 'type': 'message', 'message': "Entry"})
+    reply_with(monkeypatch, {"-100": FakeResponse({"ok": False, "description": "Unauthorized"}, 401)})
+    attempt_all(sender, outbox)
+    assert sender.stopped
+    assert not sender.disabled_chats
+
+
+def test_fail_chat_only_fails_that_chats_pending_items(outbox):
+    outbox.put({'chat_id': "-100", 'type': 'message', 'message': "a"})
+    outbox.put({'chat_id': "-200", 'type': 'message', 'message': "b"})
+    assert outbox.fail_chat("-100", "chat not found") == 1
+    assert pending_chats(outbox) == ["-200"]
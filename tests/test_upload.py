@@ -0,0 +1,58 @@
+from concurrent.futures import Future
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from mss.screenshot import ScreenShot
+from PIL import Image
+
+from trading_journal import state, telegram
+from trading_journal.capture import take_screenshot_task
+from trading_journal.telegram import TelegramOutbox, TelegramSender, has_deliverable_chat, make_upload_derivative
+
+
+class FrameGrabber:
+    """mss stand-in returning a flat grey frame for every region."""
+
+    def grab(self, region: dict):
+        frame = np.full((region["height"], region["width"], 4), 90, dtype=np.uint8)
+        return ScreenShot(bytearray(frame.tobytes()), region)
+
+
+@pytest.fixture
+def sender(journal, tmp_path):
+    state.telegram_outbox = TelegramOutbox(tmp_path / "outbox.sqlite3")
+    state.telegram_sender = TelegramSender(state.telegram_outbox)
+    return state.telegram_sender
+
+
+def test_deliverable_chat_needs_a_chat_that_is_not_disabled(sender):
+    assert not has_deliverable_chat("")
+    assert has_deliverable_chat("-100, -200")
+    sender.disabled_chats["-100"] = "chat not found"
+    assert has_deliverable_chat("-100, -200")
+    assert not has_deliverable_chat("-100")
+    sender.stopped = True
+    assert not has_deliverable_chat("-200")
+
+
+def test_upload_copy_is_downscaled_to_max_side(monkeypatch):
+    monkeypatch.setitem(telegram.upload_settings, "max_side", 1280)
+    data = make_upload_derivative(Image.new("RGB", (2560, 1440), (30, 30, 30)))
+    with Image.open(telegram.io.BytesIO(data)) as img:
+        assert (img.format, img.size) == ("JPEG", (1280, 720))
+
+
+@pytest.mark.parametrize("chat_ids", ["", "-100"])
+def test_no_upload_copies_without_a_deliverable_chat(sender, monkeypatch, chat_ids):
+    sender.disabled_chats["-100"] = "bot was blocked by the user"
+    monkeypatch.setattr(telegram, "upload_derivatives", telegram.OrderedDict())
+    built = []
+    monkeypatch.setattr(telegram, "build_upload_derivative_from_shot", lambda *args: built.append(args) or b"")
+    monitors = [SimpleNamespace(x=0, y=0, width=320, height=200, is_primary=True)]
+    result = Future()
+    take_screenshot_task("Exit", "6E", "Monitor 1", chat_ids, True, "Test", "png", 1,
+                         sct=FrameGrabber(), current_monitors=monitors, result=result)
+    assert result.result(timeout=10)["paths"]
+    assert built == []
+    assert not telegram.upload_derivatives
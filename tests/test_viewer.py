@@ -0,0 +1,221 @@
+import queue
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from trading_journal import viewer
+from trading_journal.viewer import (ViewerEngine, get_capture_name, get_monitor_slot, get_region_label,
+                                    pair_entry_exit_images)
+
+LEFT = SimpleNamespace(x=0, y=0, width=1920, height=1080)
+RIGHT = SimpleNamespace(x=1920, y=0, width=1920, height=1080)
+
+
+def mapped(event: str, ts: str, names: list) -> list:
+    monitors = {"Chart": LEFT, "DOM": RIGHT}
+    return [{'path': Path(f"/journal/{event}/{name}_{ts}.png"), 'monitor_info': monitors[name.split(" [")[0]]}
+            for name in names]
+
+
+def test_capture_name_keeps_the_region_label():
+    path = Path("/journal/Entry/Chart [Order book]_09-30-15.webp")
+    assert get_capture_name(path) == "Chart [Order book]"
+    assert get_region_label(path) == "Order book"
+    assert get_region_label(Path("/journal/Entry/Chart_09-30-15.png")) is None
+
+
+def test_crops_of_one_monitor_are_paired_by_region():
+    entry = mapped("Entry", "09-30-15", ["Chart [Price]", "Chart [Volume]", "DOM"])
+    exit_ = mapped("Exit", "10-15-00", ["DOM", "Chart [Volume]", "Chart [Price]"])
+    pairs = [(a.stem, b.stem) for a, b, _ in pair_entry_exit_images(entry, exit_)]
+    assert pairs == [("Chart [Price]_09-30-15", "Chart [Price]_10-15-00"),
+                     ("Chart [Volume]_09-30-15", "Chart [Volume]_10-15-00"),
+                     ("DOM_09-30-15", "DOM_10-15-00")]
+
+
+def test_capture_only_one_event_has_is_not_paired():
+    entry = mapped("Entry", "09-30-15", ["Chart [Price]", "DOM"])
+    exit_ = mapped("Exit", "10-15-00", ["Chart", "DOM"]) # Exit taken without the region profile
+    assert [a.stem for a, _, _ in pair_entry_exit_images(entry, exit_)] == ["DOM_09-30-15"]
+
+
+def test_monitor_slots_are_stable_per_region():
+    used = []
+    slots = [get_monitor_slot(LEFT, [LEFT, RIGHT], used, "Price"), get_monitor_slot(LEFT, [LEFT, RIGHT], used, "Volume"),
+             get_monitor_slot(RIGHT, [LEFT, RIGHT], used), get_monitor_slot(RIGHT, [LEFT, RIGHT], used)]
+    assert slots == ["1 [Price]", "1 [Volume]", "2", "2.2"]
+
+
+
+class FakeHighGui:
+    """Records the HighGUI calls the viewer engine makes; there is no display in the test run."""
+    WINDOW_NORMAL = 0
+    WND_PROP_VISIBLE = 4
+    error = type("error", (Exception,), {})
+
+    def __init__(self):
+        self.calls = []
+        self.keys = queue.Queue()
+        self.closed_by_user = set()
+        self.pumped = threading.Event()
+
+    def __getattr__(self, name):
+        return lambda *args: self.calls.append((name,) + args)
+
+    def getWindowProperty(self, window_name, prop):
+        return 0.0 if window_name in self.closed_by_user else 1.0
+
+    def waitKeyEx(self, delay):
+        self.pumped.set()
+        try:
+            return self.keys.get(timeout=delay / 1000)
+        except queue.Empty:
+            return -1
+
+    def names(self, kind):
+        return [call[1] for call in self.calls if call[0] == kind]
+
+
+@pytest.fixture
+def highgui(monkeypatch):
+    fake = FakeHighGui()
+    monkeypatch.setattr(viewer, "cv2", fake)
+    return fake
+
+
+def test_engine_replaces_a_window_in_place(highgui):
+    engine = ViewerEngine()
+    engine._execute(("show", "Viewer 1", "frame A", LEFT, "A"))
+    engine._execute(("show", "Viewer 1", "frame B", LEFT, "B"))
+    engine._execute(("update", "Viewer 1", "frame C", None))
+    engine._execute(("update", "Viewer 2", "frame D", None)) # Not open: ignored
+    assert highgui.names("namedWindow") == ["Viewer 1"]
+    assert [call[2] for call in highgui.calls if call[0] == "imshow"] == ["frame A", "frame B", "frame C"]
+    assert engine.windows == {"Viewer 1": "B"}
+
+
+def test_engine_closes_single_windows(highgui):
+    engine = ViewerEngine()
+    for name, monitor in (("Viewer 1", LEFT), ("Viewer 2", RIGHT), ("Viewer 2.2", RIGHT)):
+        engine._execute(("show", name, "frame", monitor, name))
+    engine._execute(("retain", frozenset({"Viewer 1", "Viewer 2"})))
+    assert highgui.names("destroyWindow") == ["Viewer 2.2"]
+    highgui.closed_by_user.add("Viewer 1")
+    engine._drop_closed_windows()
+    assert engine.open_windows() == ["Viewer 2"]
+    assert "destroyAllWindows" not in [call[0] for call in highgui.calls]
+
+
+def test_engine_thread_idles_without_windows_and_dispatches_keys(highgui):
+    engine = ViewerEngine()
+    keys = queue.Queue()
+    engine.add_key_handler(keys.put)
+    engine.start()
+    assert not highgui.pumped.wait(0.2) # Nothing open: blocked on the command queue, no polling
+
+    engine.show("Viewer 1", "frame", LEFT)
+    highgui.keys.put(ord("n"))
+    assert keys.get(timeout=5) == ord("n")
+    highgui.keys.put(27) # Esc closes everything and the engine goes idle again
+    deadline = time.monotonic() + 5
+    while engine.open_windows() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert engine.open_windows() == []
+    assert "destroyAllWindows" in [call[0] for call in highgui.calls]
+
+
+class FakeRenditions:
+    def __init__(self, release=None):
+        self.calls = []
+        self.release = release
+
+    def get_display_frame(self, image_path, width, height):
+        self.calls.append(image_path.name)
+        if self.release is not None:
+            self.release.wait(5)
+        return np.zeros((height, width, 3), dtype=np.uint8)
+
+
+def test_frame_cache_evicts_least_recently_used_by_bytes(journal, monkeypatch):
+    renditions = FakeRenditions()
+    monkeypatch.setattr(viewer.state, "rendition_cache", renditions)
+    cache = viewer.DisplayFrameCache(2 * 40 * 30 * 3) # Two 40x30 frames
+    for name in ("a.png", "b.png"):
+        cache.get(Path(name), 40, 30)
+    cache.get(Path("a.png"), 40, 30) # Hit: a becomes the most recently used
+    cache.get(Path("c.png"), 40, 30)
+    assert [key[0].name for key in cache.frames] == ["a.png", "c.png"]
+    assert cache.total_bytes == 2 * 40 * 30 * 3
+    cache.get(Path("a.png"), 80, 60) # Another monitor size is another frame
+    assert renditions.calls == ["a.png", "b.png", "c.png", "a.png"]
+
+
+def test_concurrent_prefetches_decode_once(journal, monkeypatch):
+    release = threading.Event()
+    renditions = FakeRenditions(release)
+    monkeypatch.setattr(viewer.state, "rendition_cache", renditions)
+    cache = viewer.DisplayFrameCache(10**9)
+    first = cache.prefetch(Path("a.png"), 40, 30)
+    assert cache.prefetch(Path("a.png"), 40, 30) is first
+    release.set()
+    assert cache.get(Path("a.png"), 40, 30) is first.result(timeout=5)
+    assert renditions.calls == ["a.png"] and not cache.loading
+
+
+def navigator_events():
+    day = "2026-03-02"
+    sides = ["Entry", "Exit", "Entry", "Entry", "Exit", "Exit"]
+    return [{"day": day if i < 5 else "2026-03-03", "ts": f"10-0{i}-00", "event": side,
+             "event_dir": Path(f"/journal/{side}")} for i, side in enumerate(sides)]
+
+
+@pytest.fixture
+def navigator(monkeypatch):
+    nav = viewer.EventNavigator()
+    nav.events, nav.index = navigator_events(), 0
+    submitted = []
+    monkeypatch.setattr(nav, "executor", SimpleNamespace(submit=lambda fn, *args: submitted.append((fn.__name__,) + args)))
+    nav.submitted = submitted
+    return nav
+
+
+@pytest.mark.parametrize("key, expected", [
+    (65363, ("step", 1)), (2555904, ("step", 1)), (ord("n"), ("step", 1)),  # Right (GTK, Windows), n
+    (65361, ("step", -1)), (2162688, ("step", -1)), (ord("a"), ("step", -1)),  # Left (GTK), PageUp (Windows), a
+    (9, ("jump_to_pair",)), (ord("p"), ("jump_to_pair",)), (ord("c"), ("cycle_compare_mode",)),
+])
+def test_navigator_keys_are_handed_to_the_navigator_thread(navigator, key, expected):
+    navigator.on_key(key)
+    assert navigator.submitted == [expected]
+
+
+def test_other_keys_are_ignored(navigator):
+    navigator.on_key(ord("x"))
+    assert navigator.submitted == []
+
+
+def test_pair_index_finds_the_matching_trade_side_on_the_same_day(navigator):
+    assert [navigator.pair_index(i) for i in range(6)] == [1, 0, None, 4, 3, None]
+
+
+def test_step_stops_at_the_ends(navigator, monkeypatch):
+    visited = []
+    monkeypatch.setattr(navigator, "go_to", visited.append)
+    navigator.step(-1)
+    navigator.index = 5
+    navigator.step(1)
+    navigator.step(-2)
+    assert visited == [3]
+
+
+def test_prefetch_covers_neighbours_and_the_pair_first(navigator, monkeypatch):
+    prefetched = []
+    monkeypatch.setattr(navigator, "_mapped_images",
+                        lambda i: [{'path': Path(f"/journal/{i}.png"), 'monitor_info': LEFT}])
+    monkeypatch.setattr(viewer.display_frame_cache, "prefetch", lambda path, w, h: prefetched.append(path.stem))
+    navigator._prefetch_around(3)
+    assert prefetched == ["4", "4", "5", "2", "1"]
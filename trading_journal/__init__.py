@@ -0,0 +1,7 @@
+"""Trading Journal Screenshot Tool.
+
+Start it with "New Ver.py" (or trading_journal.gui.main()); "New Ver.py
+--headless" runs the capture daemon without a window (trading_journal.daemon).
+Importing the package is cheap: OpenCV, NumPy, Pillow, python-docx, requests
+and mss are only imported on first use, see trading_journal.lazy.
+"""
@@ -0,0 +1,458 @@
+"""Compaction of old journal days into indexed ZIP archives, and reading screenshots back out of them."""
+import os
+import sys
+import json
+import uuid
+import zlib
+import ctypes
+import shutil
+import hashlib
+import logging
+import datetime
+import threading
+import time
+import traceback
+import zipfile
+from pathlib import Path
+from collections import OrderedDict
+
+from . import state
+from .logs import log_throttled
+
+# ── Journal Archives ──────────────────────────────────────────────────────────
+# Once enabled, days older than archive_after_days are repacked, one ZIP per day
+# (Year/Season(Month)/Week_N/Instrument/Day.zip) or per week
+# (Year/Season(Month)/Week_N.zip), optionally under archive_dir on another
+# drive (the cold tier). Every archive carries ARCHIVE_INDEX_NAME, mapping each
+# original path (relative to the archived folder) to its member, size and
+# mtime; files with the same content, such as the hardlinks of one
+# FrameStore object, share a member. A screenshot keeps its original path as
+# its identity: the catalog, the viewer and the reports go through
+# journal_file_exists(), read_archived_file() and friends, which open the
+# archive (ZIP's central directory gives random access, no unpacking) when the
+# loose file is gone. Only the indexes are cached: every read opens its own
+# ZipFile, so a reader is never closed under another thread. The job runs on a
+# background-priority thread, pauses while captures are running and throttles
+# its I/O; originals are deleted only after the new archive has been verified.
+ARCHIVE_SUFFIX = ".zip"
+ARCHIVE_INDEX_NAME = ".journal-index.json"
+ARCHIVE_GRANULARITIES = ("day", "week")
+ARCHIVE_MIN_AGE_DAYS = 2 # Never touched, whatever the age setting or budget
+ARCHIVE_START_DELAY_SECONDS = 600 # Let startup, backfill and the first captures go first
+ARCHIVE_INTERVAL_SECONDS = 6 * 3600
+ARCHIVE_CAPTURE_QUIET_SECONDS = 10 # Pause while a capture ran this recently
+ARCHIVE_MIN_FREE_BYTES = 1024 ** 3 # Free space to leave on the archive drive
+ARCHIVE_STORED_EXTENSIONS = (".webp", ".jpg", ".jpeg", ".mp4", ".avi", ".docx", ".zip", ".gz")
+ARCHIVE_DEFLATE_MIN_SAVING = 0.1 # Members that shrink less than this are stored
+ARCHIVE_DEDUPE_MAX_BYTES = 64 * 1024 ** 2 # Larger files (clips) are streamed without content dedupe
+ARCHIVE_CACHED_INDEXES = 32
+ARCHIVE_REPLACE_ATTEMPTS = 5 # Windows refuses to replace an archive while a read has it open
+ARCHIVE_YEAR_GLOB = "[0-9][0-9][0-9][0-9]"
+ARCHIVE_WEEK_GLOB = "Week_*"
+THREAD_MODE_BACKGROUND_BEGIN = 0x00010000
+
+
+def lower_thread_priority():
+    """Puts the calling thread in background mode (lower CPU and I/O priority)."""
+    try:
+        if sys.platform == "win32":
+            kernel32 = ctypes.windll.kernel32
+            if not kernel32.SetThreadPriority(kernel32.GetCurrentThread(), THREAD_MODE_BACKGROUND_BEGIN):
+                logging.warning(f"Could not lower the priority of {threading.current_thread().name}.")
+        elif sys.platform.startswith("linux"):
+            # Linux applies PRIO_PROCESS to a single thread id; the I/O scheduler follows the nice value.
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 19)
+    except Exception as e:
+        logging.warning(f"Could not lower the priority of {threading.current_thread().name}: {e}")
+
+
+class JournalArchive:
+    def __init__(self, base_dir: Path, archive_dir: Path = None, granularity: str = "day", after_days: int = 0,
+                 budget_bytes: int = 0, io_bytes_per_second: int = 0):
+        self.base_dir = base_dir
+        self.archive_dir = archive_dir or base_dir
+        self.granularity = granularity if granularity in ARCHIVE_GRANULARITIES else "day"
+        self.after_days = int(after_days)
+        self.budget_bytes = int(budget_bytes)
+        self.io_bytes_per_second = int(io_bytes_per_second)
+        self.lock = threading.Lock()
+        self.indexes = OrderedDict() # archive path -> (mtime_ns, index files), least recently used first
+        self.last_run = None # Statistics of the last compaction run
+        self.io_started = 0.0
+        self.io_bytes = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.after_days > 0 or self.budget_bytes > 0
+
+    # ── Reading ──
+    def _index(self, archive_path: Path):
+        """Index files of an archive, or None if there is none. Indexes are cached until the archive changes."""
+        try:
+            mtime_ns = archive_path.stat().st_mtime_ns
+        except OSError:
+            return None
+        key = str(archive_path)
+        with self.lock:
+            cached = self.indexes.get(key)
+            if cached is not None and cached[0] == mtime_ns:
+                self.indexes.move_to_end(key)
+                return cached[1]
+        try:
+            with zipfile.ZipFile(archive_path) as zf:
+                files = json.loads(zf.read(ARCHIVE_INDEX_NAME))["files"]
+        except (OSError, KeyError, ValueError, zipfile.BadZipFile) as e:
+            log_throttled(f"archive:{key}", 600, logging.WARNING, f"Archive: cannot read {archive_path}: {e}")
+            return None
+        with self.lock:
+            self.indexes[key] = (mtime_ns, files)
+            self.indexes.move_to_end(key)
+            while len(self.indexes) > ARCHIVE_CACHED_INDEXES:
+                self.indexes.popitem(last=False)
+        return files
+
+    def read_member(self, archive_path: Path, member: str):
+        """Content of one member, or None if the archive is gone or was repacked without it."""
+        try:
+            with zipfile.ZipFile(archive_path) as zf:
+                return zf.read(member)
+        except (OSError, KeyError, zipfile.BadZipFile) as e:
+            log_throttled(f"archive:{archive_path}", 600, logging.WARNING, f"Archive: cannot read {member} from {archive_path}: {e}")
+            return None
+
+    def _candidates(self, path: Path):
+        """(archive path, path of `path` inside it) for every archive that could hold `path`."""
+        try:
+            parts = path.relative_to(self.base_dir).parts
+        except ValueError:
+            return
+        # Day archives replace Year/Season/Week/Instrument/Day, week archives Year/Season/Week
+        for depth in (5, 3):
+            if len(parts) >= depth:
+                archive_path = self.archive_dir.joinpath(*parts[:depth - 1], parts[depth - 1] + ARCHIVE_SUFFIX)
+                yield archive_path, "/".join(parts[depth:])
+
+    def locate(self, path: Path):
+        """(archive path, index entry [member, size, mtime_ns]) of an archived file, or None."""
+        for archive_path, rel in self._candidates(path):
+            files = self._index(archive_path)
+            if files is not None and rel in files:
+                return archive_path, files[rel]
+        return None
+
+    def list_dir(self, directory: Path) -> list:
+        """Original paths of the archived files directly inside `directory`."""
+        found = []
+        for archive_path, rel in self._candidates(directory):
+            files = self._index(archive_path)
+            if files is None:
+                continue
+            prefix = f"{rel}/" if rel else ""
+            found += [directory / name[len(prefix):] for name in files
+                      if name.startswith(prefix) and "/" not in name[len(prefix):]]
+        return found
+
+    def logical_root(self, archive_path: Path) -> Path:
+        """The folder an archive replaces."""
+        rel = archive_path.relative_to(self.archive_dir)
+        return self.base_dir / rel.with_name(rel.name[:-len(ARCHIVE_SUFFIX)])
+
+    def archived_files(self, archive_path: Path) -> list:
+        """Original paths of every file in an archive."""
+        try:
+            root = self.logical_root(archive_path)
+        except ValueError: # Not one of this journal's archives
+            return []
+        files = self._index(archive_path)
+        if files is None:
+            return []
+        return [root.joinpath(*name.split("/")) for name in files]
+
+    def iter_archives(self):
+        patterns = (f"{ARCHIVE_YEAR_GLOB}/*/{ARCHIVE_WEEK_GLOB}/*/*{ARCHIVE_SUFFIX}",
+                    f"{ARCHIVE_YEAR_GLOB}/*/{ARCHIVE_WEEK_GLOB}{ARCHIVE_SUFFIX}")
+        for pattern in patterns:
+            yield from self.archive_dir.glob(pattern)
+
+    # ── Compaction ──
+    def _units(self) -> list:
+        """(newest day, folder) of every loose day (or week) folder, oldest first."""
+        units = []
+        for week_dir in self.base_dir.glob(f"{ARCHIVE_YEAR_GLOB}/*/{ARCHIVE_WEEK_GLOB}"):
+            if not week_dir.is_dir():
+                continue
+            days = []
+            for day_dir in week_dir.glob("*/*"):
+                try:
+                    day = datetime.date.fromisoformat(day_dir.name[:10])
+                except ValueError:
+                    continue
+                if day_dir.is_dir():
+                    days.append((day, day_dir))
+            if self.granularity == "week":
+                if days:
+                    units.append((max(day for day, _ in days), week_dir))
+            else:
+                units += days
+        return sorted(units, key=lambda u: (u[0], str(u[1])))
+
+    def _wait_for_idle(self):
+        from .capture import capture_service # capture imports the catalog, which imports this module
+        while not capture_service.is_idle(ARCHIVE_CAPTURE_QUIET_SECONDS):
+            time.sleep(1)
+
+    def _throttle(self, nbytes: int):
+        if self.io_bytes_per_second <= 0:
+            return
+        self.io_bytes += nbytes
+        ahead = self.io_bytes / self.io_bytes_per_second - (time.perf_counter() - self.io_started)
+        if ahead > 0:
+            time.sleep(ahead)
+
+    @staticmethod
+    def _compress_type(path: Path, sample: bytes) -> int:
+        if path.suffix.lower() in ARCHIVE_STORED_EXTENSIONS or not sample:
+            return zipfile.ZIP_STORED
+        saving = 1 - len(zlib.compress(sample, 1)) / len(sample)
+        return zipfile.ZIP_DEFLATED if saving >= ARCHIVE_DEFLATE_MIN_SAVING else zipfile.ZIP_STORED
+
+    @staticmethod
+    def _zip_info(name: str, st: os.stat_result, compress_type: int) -> zipfile.ZipInfo:
+        date_time = max(datetime.datetime.fromtimestamp(st.st_mtime), datetime.datetime(1980, 1, 1))
+        info = zipfile.ZipInfo(name, date_time.timetuple()[:6])
+        info.compress_type = compress_type
+        info.external_attr = 0o644 << 16
+        return info
+
+    def compact_unit(self, unit_dir: Path) -> dict:
+        """Packs one day (or week) folder into its archive, merging with an
+        existing one, and deletes the originals. Returns the unit's statistics."""
+        rel = unit_dir.relative_to(self.base_dir)
+        archive_path = self.archive_dir / rel.with_name(rel.name + ARCHIVE_SUFFIX)
+        files = sorted(p for p in unit_dir.rglob("*") if p.is_file() and not p.name.endswith(".tmp"))
+        if not files:
+            shutil.rmtree(unit_dir, ignore_errors=True)
+            return {"files": 0, "loose_bytes": 0, "archive_bytes": 0}
+        snapshot = {p: p.stat() for p in files}
+        loose_bytes = sum(st.st_size for st in {(st.st_dev, st.st_ino): st for st in snapshot.values()}.values())
+        archive_path.parent.mkdir(parents=True, exist_ok=True)
+        if shutil.disk_usage(archive_path.parent).free < loose_bytes + ARCHIVE_MIN_FREE_BYTES:
+            raise OSError(f"Not enough free space on {archive_path.parent} to archive {unit_dir}")
+        for stale in archive_path.parent.glob(f"{archive_path.name}.*.tmp"): # Left by an interrupted run
+            stale.unlink()
+
+        index = {}
+        members = set()
+        by_inode, by_digest = {}, {}
+        tmp_path = archive_path.with_name(f"{archive_path.name}.{uuid.uuid4().hex}.tmp")
+        previous_files = self._index(archive_path)
+        try:
+            with zipfile.ZipFile(tmp_path, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=6, allowZip64=True) as zf:
+                new_names = {"/".join(p.relative_to(unit_dir).parts) for p in files}
+                if previous_files is not None: # The folder came back after an earlier run: keep what is not replaced
+                    with zipfile.ZipFile(archive_path) as old_zf:
+                        for name, entry in previous_files.items():
+                            if name in new_names:
+                                continue
+                            if entry[0] not in members:
+                                old_info = old_zf.getinfo(entry[0])
+                                info = zipfile.ZipInfo(old_info.filename, old_info.date_time)
+                                info.compress_type, info.external_attr = old_info.compress_type, old_info.external_attr
+                                zf.writestr(info, old_zf.read(old_info))
+                                members.add(entry[0])
+                            index[name] = entry
+
+                for path in files:
+                    self._wait_for_idle()
+                    name = "/".join(path.relative_to(unit_dir).parts)
+                    st = snapshot[path]
+                    entry_tail = [st.st_size, st.st_mtime_ns]
+                    inode = (st.st_dev, st.st_ino)
+                    if inode in by_inode: # Another hardlink of a FrameStore object already in the archive
+                        index[name] = [by_inode[inode]] + entry_tail
+                        continue
+                    member = name
+                    while member in members:
+                        member += "~"
+                    if st.st_size <= ARCHIVE_DEDUPE_MAX_BYTES:
+                        data = path.read_bytes()
+                        digest = hashlib.blake2b(data, digest_size=20).digest()
+                        if digest in by_digest: # Identical copy (frame store without hardlinks)
+                            by_inode[inode] = by_digest[digest]
+                            index[name] = [by_digest[digest]] + entry_tail
+                            continue
+                        zf.writestr(self._zip_info(member, st, self._compress_type(path, data[:1024 * 1024])), data)
+                        by_digest[digest] = member
+                        self._throttle(len(data))
+                    else:
+                        with open(path, "rb") as src:
+                            sample = src.read(1024 * 1024)
+                            with zf.open(self._zip_info(member, st, self._compress_type(path, sample)), "w",
+                                         force_zip64=True) as dst:
+                                while sample:
+                                    dst.write(sample)
+                                    self._throttle(len(sample))
+                                    sample = src.read(1024 * 1024)
+                    members.add(member)
+                    by_inode[inode] = member
+                    index[name] = [member] + entry_tail
+                zf.writestr(ARCHIVE_INDEX_NAME, json.dumps({"version": 1, "files": index}))
+
+            with zipfile.ZipFile(tmp_path) as check: # CRC of every member before any original goes
+                bad = check.testzip()
+                if bad is not None:
+                    raise zipfile.BadZipFile(f"Member {bad} of {tmp_path} failed verification")
+            with open(tmp_path, "rb") as f:
+                os.fsync(f.fileno())
+            for attempt in range(ARCHIVE_REPLACE_ATTEMPTS):
+                try:
+                    os.replace(tmp_path, archive_path)
+                    break
+                except PermissionError:
+                    if attempt == ARCHIVE_REPLACE_ATTEMPTS - 1:
+                        raise
+                    time.sleep(0.2)
+        except BaseException:
+            try:
+                tmp_path.unlink()
+            except OSError:
+                pass
+            raise
+
+        if state.journal_catalog is not None:
+            state.journal_catalog.index_archive(archive_path)
+        kept = 0
+        for path, st in snapshot.items():
+            try:
+                now_st = path.stat()
+                if (now_st.st_size, now_st.st_mtime_ns) != (st.st_size, st.st_mtime_ns):
+                    kept += 1 # Changed while packing: picked up by the next run
+                    continue
+                path.unlink()
+            except OSError:
+                continue
+        for directory in sorted((p for p in unit_dir.rglob("*") if p.is_dir()), key=lambda p: len(p.parts), reverse=True):
+            try:
+                directory.rmdir()
+            except OSError:
+                pass
+        try:
+            unit_dir.rmdir()
+        except OSError:
+            pass
+        return {"files": len(files) - kept, "loose_bytes": loose_bytes, "archive_bytes": archive_path.stat().st_size}
+
+    def journal_bytes(self) -> int:
+        """Disk use of the journal: loose files (hardlinks counted once) and archives.
+        Only the Year folders count; caches, the frame store, reports and the
+        catalog are not something compaction can shrink."""
+        seen, total = set(), 0
+        roots = {year_dir for root in (self.base_dir, self.archive_dir) for year_dir in root.glob(ARCHIVE_YEAR_GLOB)
+                 if year_dir.is_dir()}
+        for root in roots:
+            for directory, _, names in os.walk(root):
+                for name in names:
+                    try:
+                        st = os.stat(os.path.join(directory, name))
+                    except OSError:
+                        continue
+                    if (st.st_dev, st.st_ino) not in seen:
+                        seen.add((st.st_dev, st.st_ino))
+                        total += st.st_size
+        return total
+
+    def compact(self) -> dict:
+        """Archives every unit past the age limit and, while the journal is over
+        its budget, younger ones down to ARCHIVE_MIN_AGE_DAYS, oldest first."""
+        started = time.perf_counter()
+        self.io_started, self.io_bytes = started, 0
+        today = datetime.date.today()
+        usage = self.journal_bytes() if self.budget_bytes > 0 else 0
+        stats = {"units": 0, "files": 0, "loose_bytes": 0, "archive_bytes": 0, "errors": 0}
+        for newest_day, unit_dir in self._units():
+            age = (today - newest_day).days
+            if age < ARCHIVE_MIN_AGE_DAYS:
+                break
+            if not (0 < self.after_days <= age or (self.budget_bytes > 0 and usage > self.budget_bytes)):
+                continue
+            if state.telegram_outbox is not None and state.telegram_outbox.references(unit_dir):
+                logging.info(f"Archive: {unit_dir} still has pending Telegram items, skipped.")
+                continue
+            try:
+                unit_stats = self.compact_unit(unit_dir)
+            except OSError as e:
+                logging.warning(f"Archive: stopped at {unit_dir}: {e}")
+                stats["errors"] += 1
+                break
+            except Exception:
+                logging.error(f"Archive: could not archive {unit_dir}:\n" + traceback.format_exc())
+                stats["errors"] += 1
+                continue
+            stats["units"] += 1
+            for key in ("files", "loose_bytes", "archive_bytes"):
+                stats[key] += unit_stats[key]
+            usage -= unit_stats["loose_bytes"] - unit_stats["archive_bytes"]
+            logging.info(f"Archive: {unit_dir.relative_to(self.base_dir)} -> {unit_stats['files']} files, "
+                         f"{unit_stats['loose_bytes'] / 1e6:.0f} MB -> {unit_stats['archive_bytes'] / 1e6:.0f} MB.")
+        if self.budget_bytes > 0 and usage > self.budget_bytes:
+            logging.warning(f"Archive: the journal uses {usage / 1e9:.1f} GB, over its {self.budget_bytes / 1e9:.1f} GB "
+                            f"budget, and nothing older than {ARCHIVE_MIN_AGE_DAYS} days is left to archive.")
+        stats["seconds"] = round(time.perf_counter() - started, 1)
+        self.last_run = stats
+        return stats
+
+    def summary_text(self) -> str:
+        if not self.enabled:
+            return "Archive: off."
+        if self.last_run is None:
+            return f"Archive: {self.granularity} archives after {self.after_days} days; no run yet this session."
+        run = self.last_run
+        return (f"Archive: last run packed {run['units']} {self.granularity}(s), {run['files']} files, "
+                f"{run['loose_bytes'] / 1e6:.0f} MB -> {run['archive_bytes'] / 1e6:.0f} MB in {run['seconds']} s.")
+
+
+# ── Archive-Aware File Access ─────────────────────────────────────────────────
+def read_archived_file(path: Path):
+    """Content of a screenshot (or any journal file) that now lives in an archive, or None."""
+    if state.journal_archive is None:
+        return None
+    located = state.journal_archive.locate(path)
+    if located is None:
+        return None
+    archive_path, entry = located
+    return state.journal_archive.read_member(archive_path, entry[0])
+
+def journal_file_exists(path: Path) -> bool:
+    return path.exists() or (state.journal_archive is not None and state.journal_archive.locate(path) is not None)
+
+def journal_file_stat(path: Path) -> tuple:
+    """(mtime_ns, size) of a loose or archived file; archives keep the original values."""
+    try:
+        st = path.stat()
+        return st.st_mtime_ns, st.st_size
+    except FileNotFoundError:
+        located = state.journal_archive.locate(path) if state.journal_archive is not None else None
+        if located is None:
+            raise
+        _, (_, size, mtime_ns) = located
+        return mtime_ns, size
+
+def list_journal_dir(directory: Path) -> list:
+    """Files directly inside a journal folder, loose or archived."""
+    files = {p.name: p for p in state.journal_archive.list_dir(directory)} if state.journal_archive is not None else {}
+    if directory.is_dir():
+        files.update((p.name, p) for p in directory.iterdir() if p.is_file())
+    return list(files.values())
+
+def archive_compaction_task():
+    lower_thread_priority()
+    time.sleep(ARCHIVE_START_DELAY_SECONDS)
+    while True:
+        try:
+            stats = state.journal_archive.compact()
+            if stats["units"] or stats["errors"]:
+                logging.info(f"Archive: {stats['units']} folder(s) archived, {stats['errors']} error(s), "
+                             f"{(stats['loose_bytes'] - stats['archive_bytes']) / 1e6:.0f} MB saved in {stats['seconds']} s.")
+        except Exception:
+            logging.error("Error in archive_compaction_task:\n" + traceback.format_exc())
+        time.sleep(ARCHIVE_INTERVAL_SECONDS)
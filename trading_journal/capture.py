@@ -0,0 +1,518 @@
+"""Hotkey captures: grabbing, encoding, saving, export and the capture service."""
+import json
+import queue
+import datetime
+import logging
+import threading
+import time
+import traceback
+from tkinter import messagebox
+from pathlib import Path
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+
+from . import state
+from .clips import clip_recorder
+from .config import get_save_directory
+from .grab import build_capture_plan, get_grab_timing, get_monitor_region, get_plan_coverage, grab_all_monitors
+from .imaging import IMAGE_CODECS, encode_executor, encode_image, resolve_codec
+from .lazy import lazy_import
+from .logs import log_throttled
+from .metrics import metrics
+from .pretrigger import pretrigger_buffer, save_pretrigger_task
+from .renditions import generate_renditions_task, rendition_executor
+from .reports import build_event_report_task, report_executor
+from .telegram import (TELEGRAM_ALBUM_MAX_PHOTOS, add_to_telegram_queue, has_deliverable_chat, parse_chat_ids,
+                       submit_upload_derivative)
+
+mss = lazy_import("mss")
+screeninfo = lazy_import("screeninfo")
+
+# ── Screenshot & Word Export ─────────────────────────────────────────────────
+# Capture is split into two stages. The capture thread only grabs pixels: every
+# monitor is grabbed back-to-back into memory so all screens of one event show
+# the same moment. PNG encoding, disk writes, the Word export and the Telegram
+# enqueue run afterwards on encode_executor and the export executor below, off
+# the capture thread.
+export_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="export")
+
+def encode_screenshot(shot, img_path: Path, codec: str, level: int, event_id: str = None,
+                      monitor_key=None, upload: bool = False) -> dict:
+    """Saves one grabbed frame, reusing a stored identical or near-identical
+    frame when the frame store has one. Returns {'dedupe': 'exact' | 'near' |
+    None, 'content_key': ...} for the event's capture info and Telegram items."""
+    rgb = shot.rgb
+    result = {"dedupe": None, "content_key": None}
+    if state.frame_store is not None and state.frame_store.mode != "off":
+        started = time.perf_counter()
+        kind, object_path, content_key, signature = state.frame_store.find(monitor_key, rgb, shot.size, img_path.suffix)
+        metrics.record(event_id, "frame_hash", (time.perf_counter() - started) * 1000, file=img_path.name, dedupe=kind)
+        result["content_key"] = content_key
+        if kind is not None:
+            placed = state.frame_store.link(object_path, img_path)
+            state.frame_store.record_hit(kind, object_path)
+            state.frame_store.remember(monitor_key, signature, object_path, content_key)
+            result["dedupe"] = kind
+            logging.info(f"Screenshot saved to {img_path} ({kind} duplicate of {object_path.name}, {placed}, no encode)")
+            if upload and not (state.telegram_outbox is not None and state.telegram_outbox.get_file_ids([content_key])):
+                submit_upload_derivative(shot, img_path, event_id)
+            return result
+        state.frame_store.record_miss()
+    if upload:
+        submit_upload_derivative(shot, img_path, event_id)
+
+    started = time.perf_counter()
+    encoded = encode_image(rgb, shot.size, codec, level)
+    encoded_at = time.perf_counter()
+    if result["content_key"] is not None:
+        state.frame_store.put(object_path, encoded, (encoded_at - started) * 1000)
+        state.frame_store.link(object_path, img_path)
+        state.frame_store.remember(monitor_key, signature, object_path, content_key)
+    else:
+        img_path.write_bytes(encoded)
+    written_at = time.perf_counter()
+    metrics.record(event_id, "encode", (encoded_at - started) * 1000, file=img_path.name, codec=codec, level=level,
+                   bytes=len(encoded))
+    metrics.record(event_id, "disk_write", (written_at - encoded_at) * 1000, file=img_path.name, bytes=len(encoded))
+    logging.info(f"Screenshot saved to {img_path} ({codec} level {level}, {len(encoded) / 1e6:.2f} MB, "
+                 f"encode {(encoded_at - started) * 1000:.0f} ms, write {(written_at - encoded_at) * 1000:.0f} ms)")
+    return result
+
+def finalize_event_task(event: str, inst: str, now: datetime.datetime, ts: str, save_dir: Path,
+                        captured_images: list, encode_futures: list, capture_info: dict,
+                        dynamic_description: str, telegram_chat_id: str,
+                        enable_telegram_send: bool, current_monitors: list = (), result: Future = None):
+    """Second stage of an event: waits for the encodes, then writes the capture
+    info, the Word document (Entry only) and queues the Telegram items. `result`
+    receives the saved paths once they are on disk."""
+    event_id = capture_info["event_id"]
+    try:
+        with metrics.span(event_id, "encode_wait"):
+            wait(encode_futures)
+        saved_images = []
+        for img_data, future in zip(captured_images, encode_futures):
+            if future.exception() is not None:
+                logging.error(f"Failed to save screenshot {img_data['path'].name}: {future.exception()}")
+                continue
+            img_data.update(future.result())
+            saved_images.append(img_data)
+
+        capture_info["saved"] = [img_data['path'].name for img_data in saved_images]
+        capture_info["deduplicated"] = {img_data['path'].name: img_data['dedupe'] for img_data in saved_images if img_data['dedupe']}
+        if capture_info["deduplicated"]:
+            logging.info(f"Reused {len(capture_info['deduplicated'])} of {len(saved_images)} frames from the frame store. "
+                         f"{state.frame_store.summary_text()}")
+        if state.journal_catalog is not None:
+            state.journal_catalog.add_files([img_data['path'] for img_data in saved_images])
+        if state.rendition_cache is not None:
+            rendition_executor.submit(generate_renditions_task, saved_images, current_monitors)
+        capture_info_path = save_dir / f"Capture Info_{ts}.json"
+        capture_info_path.write_text(json.dumps(capture_info, ensure_ascii=False, indent=4), "utf-8")
+        logging.debug(f"Capture info saved to {capture_info_path}")
+
+        if enable_telegram_send:
+            logging.info("Adding Telegram tasks to queue...")
+
+            photos = []
+            for img_data in saved_images:
+                mon_name_for_caption = img_data['name_for_caption']
+                caption = f"#{inst} ({mon_name_for_caption}) - {now.strftime('%H:%M:%S')}"
+                photo_data = {'image_path': img_data['path'], 'caption': caption}
+                if img_data.get('content_key'):
+                    photo_data['content_key'] = img_data['content_key']
+                photos.append(photo_data)
+
+            # One album per event (chunked at Telegram's 10-photo limit) with the
+            # description as its caption, instead of one request per photo. The
+            # primary chat uploads the photos; every other chat waits for that
+            # upload and resends the same photos by file_id.
+            chat_ids = parse_chat_ids(telegram_chat_id) or [""]
+            primary_chat_id, other_chat_ids = chat_ids[0], chat_ids[1:]
+            for start in range(0, len(photos), TELEGRAM_ALBUM_MAX_PHOTOS):
+                chunk = photos[start:start + TELEGRAM_ALBUM_MAX_PHOTOS]
+                album = {'photos': chunk, 'caption': dynamic_description if start == 0 else "",
+                         'captured_at': now.timestamp(), 'event_id': event_id}
+                logging.info(f"Adding album of {len(chunk)} photos to Telegram queue for {len(chat_ids)} chat(s): {[p['image_path'].name for p in chunk]}")
+                primary_item_id = add_to_telegram_queue(primary_chat_id, 'album', **album)
+                for chat_id in other_chat_ids:
+                    add_to_telegram_queue(chat_id, 'album', depends_on=primary_item_id, **album)
+
+            if not photos and dynamic_description:
+                for chat_id in chat_ids:
+                    add_to_telegram_queue(chat_id, 'message', message=dynamic_description, event_id=event_id)
+
+        else:
+            logging.info("Telegram send is disabled. Skipping photo upload.")
+
+        report_path = None
+        if event == "Entry":
+            report_path = save_dir / f"Trading Journal_{ts}.docx"
+            report_executor.submit(build_event_report_task, event, dynamic_description, saved_images,
+                                   report_path, event_id)
+
+        # Update last_view_path after successful save operation (for quick access later)
+        if save_dir.exists():
+            state.after(0, lambda: state.app.last_view_path_var.set(str(save_dir)))
+
+        if result is not None:
+            result.set_result({
+                "outcome": "accepted",
+                "event_id": event_id,
+                "save_dir": str(save_dir),
+                "paths": [str(img_data['path']) for img_data in saved_images],
+                "failed": [img_data['path'].name for img_data in captured_images if img_data not in saved_images],
+                "capture_info": str(capture_info_path),
+                "report": str(report_path) if report_path else None, # Built in the background
+                "trigger_to_grab_ms": capture_info.get("hotkey_to_grab_ms"),
+                "grab_skew_ms": capture_info["grab_skew_ms"],
+            })
+
+    except Exception as e:
+        logging.error("Error in finalize_event_task:\n" + traceback.format_exc())
+        state.after(0, lambda: messagebox.showerror("Error", "Failed to save screenshots.\nSee app.log for details."))
+        if result is not None and not result.done():
+            result.set_exception(e)
+
+def take_screenshot_task(event: str, inst: str, mon_names_str: str,
+                         telegram_chat_id: str,
+                         enable_telegram_send: bool,
+                         user_defined_desc: str,
+                         image_codec: str = "png", image_codec_level: int = None,
+                         sct=None, current_monitors=None, regions=None,
+                         requested_at: float = None, capture_plan: list = None, result: Future = None):
+    """Captures one event. When called from the CaptureService, `sct`,
+    `current_monitors` and `capture_plan` are the service's warmed-up grabber,
+    cached layout and region-profile rectangles, and `requested_at` is the
+    hotkey's (or trigger's) time.perf_counter() stamp. `result`, if given, is
+    resolved by finalize_event_task with the saved paths."""
+    logging.info(f"Initiating {event} event screenshot capture in background task.")
+
+    try:
+        if sct is None:
+            sct = mss.mss()
+        if current_monitors is None:
+            with metrics.span(None, "monitor_enumeration"):
+                current_monitors = screeninfo.get_monitors()
+        if capture_plan is None:
+            capture_plan = build_capture_plan(current_monitors) if regions is None else \
+                [{"monitor_idx": idx, "label": None, "region": region} for idx, region in enumerate(regions)]
+        regions = [entry["region"] for entry in capture_plan]
+
+        # ── Capture stage: all monitors back-to-back, nothing else in between ──
+        now = datetime.datetime.now()
+        frames = grab_all_monitors(sct, regions)
+        grab_timing = get_grab_timing(frames)
+        # ────────────────────────────────────────────────────────────────────────
+
+        trigger_time = time.time()
+        pre_frames = pretrigger_buffer.snapshot(until=trigger_time) if pretrigger_buffer.running else []
+
+        event_id = f"{event}|{inst}|{now.isoformat()}"
+        # Upload copies only when some chat can receive them
+        upload = enable_telegram_send and has_deliverable_chat(telegram_chat_id)
+        if requested_at is not None and frames:
+            grab_timing["hotkey_to_grab_ms"] = round((frames[0][1] - requested_at) * 1000, 3)
+            metrics.record(event_id, "hotkey_to_grab", grab_timing["hotkey_to_grab_ms"])
+            capture_service.record_latency(grab_timing["hotkey_to_grab_ms"])
+        for idx, (_, grab_started, grab_finished) in enumerate(frames):
+            metrics.record(event_id, "grab", (grab_finished - grab_started) * 1000, monitor=idx)
+        metrics.record(event_id, "grab_all", grab_timing["grab_span_ms"], monitors=len(frames),
+                       skew_ms=grab_timing["grab_skew_ms"])
+
+        logging.info(f"Grabbed {len(frames)} monitors, skew {grab_timing['grab_skew_ms']:.1f} ms "
+                     f"(span {grab_timing['grab_span_ms']:.1f} ms).")
+        logging.debug("Detected monitors: " + "; ".join(f"{i}: {mon.width}x{mon.height} at ({mon.x}, {mon.y})"
+                                                          f"{' primary' if mon.is_primary else ''}"
+                                                          for i, mon in enumerate(current_monitors)))
+
+        image_codec, image_codec_level = resolve_codec(image_codec, image_codec_level)
+        img_ext = IMAGE_CODECS[image_codec][0]
+        save_dir = get_save_directory(event, inst, now)
+        ts = now.strftime("%H-%M-%S") # This is the unique timestamp for the set of screenshots
+        names = [n.strip() for n in mon_names_str.split(",")]
+
+        event_phrase = "Order Entered" if event == "Entry" else "Order Exited"
+
+        dynamic_description_parts = []
+        if user_defined_desc:
+            dynamic_description_parts.append(user_defined_desc)
+        dynamic_description_parts.append(f"*{event_phrase}* - #{inst} - {now.strftime('%Y-%m-%d %H:%M:%S')}")
+
+        dynamic_description = "\n\n".join(dynamic_description_parts)
+
+        captured_images = []
+        encode_futures = []
+
+        for idx, (shot, _, _) in enumerate(frames):
+            monitor_idx, label = capture_plan[idx]["monitor_idx"], capture_plan[idx]["label"]
+            name = names[monitor_idx] if monitor_idx < len(names) else f"Monitor {monitor_idx+1}"
+            if label:
+                name = f"{name} [{label}]"
+            logging.debug(f"Captured region for {name}: {regions[idx]}")
+
+            # ── IMPORTANT CHANGE: Ensure consistent filename format for timestamp matching ──
+            # Filenames will now be like "Monitor 1_18-49-32.png" (if name is "Monitor 1")
+            # or "Chart_18-49-32.webp" (if name is "Chart"); the extension follows the codec.
+            # Region-profile crops add their label: "Chart [DOM]_18-49-32.png"
+            img_filename = f"{name}_{ts}{img_ext}"
+            img_path = save_dir / img_filename
+            # ────────────────────────────────────────────────────────────────────────────────
+
+            captured_images.append({'path': img_path, 'name_for_caption': name, 'monitor_idx': monitor_idx, # Added monitor_idx
+                                    'shot': shot})
+            # The frame store decides whether the frame needs encoding (and an upload copy) at all
+            monitor_key = (monitor_idx, label, tuple(sorted(regions[idx].items())))
+            encode_futures.append(encode_executor.submit(encode_screenshot, shot, img_path, image_codec, image_codec_level,
+                                                         event_id, monitor_key, upload))
+
+        capture_info = {
+            "event_id": event_id,
+            "event": event,
+            "instrument": inst,
+            "timestamp": now.isoformat(timespec="seconds"),
+            "description": dynamic_description,
+            "monitors": [img_data['name_for_caption'] for img_data in captured_images],
+            "regions": regions,
+            "region_labels": [entry["label"] for entry in capture_plan],
+            "image_codec": image_codec,
+            "image_codec_level": image_codec_level,
+        }
+        capture_info.update(grab_timing)
+        if pre_frames:
+            capture_info["pretrigger_frames"] = len(pre_frames)
+            capture_info["pretrigger_seconds"] = round(pre_frames[-1][0] - pre_frames[0][0], 1)
+            export_executor.submit(save_pretrigger_task, pre_frames, save_dir, ts, names, event_id)
+        if clip_recorder.enabled:
+            capture_info["clip_seconds"] = [clip_recorder.pre_seconds if pre_frames else 0, clip_recorder.post_seconds]
+            clip_recorder.begin(event_id, save_dir, ts, names, pre_frames, trigger_time,
+                                telegram_chat_id if enable_telegram_send else "",
+                                f"#{inst} {event} {now.strftime('%H:%M:%S')}")
+
+        export_executor.submit(finalize_event_task, event, inst, now, ts, save_dir,
+                               captured_images, encode_futures, capture_info,
+                               dynamic_description, telegram_chat_id, enable_telegram_send, current_monitors, result)
+
+    except Exception as e:
+        logging.error("Error in take_screenshot_task:\n" + traceback.format_exc())
+        state.after(0, lambda: messagebox.showerror("Error", "Failed to take screenshot.\nSee app.log for details."))
+        if result is not None and not result.done():
+            result.set_exception(e)
+
+# ── Capture Service ───────────────────────────────────────────────────────────
+class CaptureService:
+    """Long-lived, bounded capture executor that keeps mss grabbers warm and the
+    monitor layout cached, so a hotkey press goes straight to the grab.
+
+    mss handles are bound to the thread that created them, so every worker
+    thread owns its own grabber and hotkeys only post requests to the bounded
+    queue. Identical presses (same event, instrument, description and other
+    capture arguments) within the coalescing window are merged into the
+    capture already accepted, and presses that find the queue full
+    are dropped instead of piling up full captures on every core. While idle
+    the workers poll the display layout and only rebuild the grabbers and the
+    cached regions when the layout actually changes."""
+
+    LAYOUT_POLL_SECONDS = 2.0
+
+    def __init__(self, workers: int = 1, queue_size: int = 4, coalesce_ms: int = 750):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.coalesce_seconds = coalesce_ms / 1000
+        self.requests = None
+        self.lock = threading.Lock()
+        self.monitors = []
+        self.regions = []
+        self.region_profile_name = ""
+        self.region_profile = {}
+        self.capture_plan = []
+        self.layout_signature = None
+        self.last_accepted = {} # task_args -> (perf_counter stamp, result Future) of the last accepted press
+        self.last_accepted_at = None
+        self.accepted_count = 0
+        self.merged_count = 0
+        self.dropped_count = 0
+        self.active_count = 0
+        self.latencies_ms = deque(maxlen=200)
+        self.threads = []
+
+    def configure(self, workers: int, queue_size: int, coalesce_ms: int):
+        """Must be called before start()."""
+        self.workers = max(1, int(workers))
+        self.queue_size = max(1, int(queue_size))
+        self.coalesce_seconds = max(0, int(coalesce_ms)) / 1000
+
+    def start(self):
+        if self.threads:
+            return
+        self.requests = queue.Queue(maxsize=self.queue_size)
+        self.refresh_layout(force=True)
+        for i in range(self.workers):
+            t = threading.Thread(target=self._run, name=f"capture-{i}", daemon=True)
+            self.threads.append(t)
+            t.start()
+        logging.info(f"Capture service started: {self.workers} worker(s), queue size {self.queue_size}, "
+                     f"coalescing window {self.coalesce_seconds * 1000:.0f} ms.")
+
+    def request_capture(self, requested_at: float, *task_args, result: Future = None, coalesce: bool = True):
+        """`requested_at` is a time.perf_counter() stamp taken in the hotkey
+        callback; `task_args` are take_screenshot_task's positional arguments.
+        Returns "accepted", "merged" or "dropped". `result`, if given, receives
+        the saved paths of the capture (for a merged press: of the capture it
+        was merged into) or {"outcome": "dropped"}. With `coalesce` False the
+        press is never merged (it still counts for later identical presses)."""
+        event = task_args[0]
+        with self.lock:
+            # Only presses within the window can still merge; the rest are forgotten
+            self.last_accepted = {args: accepted for args, accepted in self.last_accepted.items()
+                                  if requested_at - accepted[0] < self.coalesce_seconds}
+            last_at, last_result = self.last_accepted.get(task_args, (None, None))
+            if coalesce and last_at is not None and requested_at - last_at < self.coalesce_seconds:
+                self.merged_count += 1
+                outcome = "merged"
+            else:
+                own_result = result if result is not None else Future() # Merged presses may wait on it
+                try:
+                    self.requests.put_nowait((requested_at, task_args, own_result))
+                    self.last_accepted[task_args] = (requested_at, own_result)
+                    self.last_accepted_at = requested_at
+                    self.accepted_count += 1
+                    outcome = "accepted"
+                except queue.Full:
+                    self.dropped_count += 1
+                    outcome = "dropped"
+        if result is not None and outcome == "merged":
+            last_result.add_done_callback(lambda f: result.set_exception(f.exception()) if f.exception() is not None
+                                          else result.set_result(dict(f.result(), outcome="merged")))
+        elif result is not None and outcome == "dropped":
+            result.set_result({"outcome": "dropped"})
+        if outcome == "accepted":
+            logging.info(f"Capture service: {event} capture queued ({self.get_queue_text()}).")
+        else:
+            logging.warning(f"Capture service: {event} press {outcome} ({self.get_queue_text()}).")
+        self._publish_status()
+        return outcome
+
+    def is_idle(self, quiet_seconds: float) -> bool:
+        """True when no capture is queued or running and none was accepted in the last `quiet_seconds`."""
+        with self.lock:
+            if self.active_count or (self.requests is not None and self.requests.qsize()):
+                return False
+            last = self.last_accepted_at
+        return last is None or time.perf_counter() - last > quiet_seconds
+
+    def record_latency(self, latency_ms: float):
+        self.latencies_ms.append(latency_ms)
+        logging.info(f"Hotkey-to-grab latency: {latency_ms:.1f} ms")
+        self._publish_status()
+
+    def get_queue_text(self) -> str:
+        depth = self.requests.qsize() if self.requests is not None else 0
+        return (f"queue {depth}/{self.queue_size}, running {self.active_count}, "
+                f"merged {self.merged_count}, dropped {self.dropped_count}")
+
+    def get_status_text(self) -> str:
+        if not self.latencies_ms:
+            latency_text = "Hotkey → grab: no captures yet"
+        else:
+            ordered = sorted(self.latencies_ms)
+            median = ordered[len(ordered) // 2]
+            latency_text = f"Hotkey → grab: last {self.latencies_ms[-1]:.1f} ms, median {median:.1f} ms ({len(ordered)} captures)"
+        return f"{latency_text}\nCaptures: {self.get_queue_text()}"
+
+    def _publish_status(self):
+        state.after(0, lambda: state.app.capture_status_var.set(self.get_status_text()))
+
+    def refresh_layout(self, force: bool = False) -> bool:
+        started = time.perf_counter()
+        current = screeninfo.get_monitors()
+        if force:
+            metrics.record(None, "monitor_enumeration", (time.perf_counter() - started) * 1000)
+        signature = tuple((m.x, m.y, m.width, m.height) for m in current)
+        with self.lock:
+            if not force and signature == self.layout_signature:
+                return False
+            self.monitors = current
+            self.regions = [get_monitor_region(m) for m in current]
+            self.capture_plan = build_capture_plan(current, self.region_profile)
+            self.layout_signature = signature
+        logging.info(f"Capture service: monitor layout {'loaded' if force else 'changed'}: {self.regions}")
+        if state.rendition_cache is not None:
+            rendition_executor.submit(state.rendition_cache.set_layout, signature) # Waits for the cache's indexing
+        return True
+
+    def set_region_profile(self, name: str, profile: dict):
+        """Switches the rectangles grabbed by hotkey captures ("" / None = full monitors)."""
+        with self.lock:
+            self.region_profile_name = name or ""
+            self.region_profile = profile or {}
+            self.capture_plan = build_capture_plan(self.monitors, self.region_profile)
+            coverage = get_plan_coverage(self.monitors, self.capture_plan)
+        logging.info(f"Capture service: region profile '{name or 'full monitors'}', {len(self.capture_plan)} "
+                     f"rectangle(s), {coverage:.0%} of the full monitor area.")
+        return coverage
+
+    def _warm_up(self, sct, regions: list):
+        # The first grab of every region allocates the grabber's buffers; do it now
+        # instead of on the first hotkey press.
+        started = time.perf_counter()
+        try:
+            grab_all_monitors(sct, regions)
+        except Exception as e:
+            logging.warning(f"Capture service: warm-up grab failed: {e}")
+        logging.info(f"{threading.current_thread().name} warmed up in {(time.perf_counter() - started) * 1000:.1f} ms.")
+
+    def _snapshot_layout(self) -> tuple:
+        """(layout signature, monitors, capture plan) as one consistent set; the
+        layout poll and the region profile switch replace them under the lock."""
+        with self.lock:
+            return self.layout_signature, self.monitors, self.capture_plan
+
+    def _run(self):
+        logging.info(f"Capture worker {threading.current_thread().name} started.")
+        sct = None
+        sct_signature = None
+        while True:
+            try:
+                # mss caches its own monitor list, so a layout change also means a new grabber.
+                signature, _, capture_plan = self._snapshot_layout()
+                if sct is None or sct_signature != signature:
+                    if sct is not None:
+                        sct.close()
+                    sct = mss.mss()
+                    sct_signature = signature
+                    self._warm_up(sct, [entry["region"] for entry in capture_plan])
+            except Exception:
+                logging.error("Capture service: could not create grabber:\n" + traceback.format_exc())
+                sct = None
+                time.sleep(self.LAYOUT_POLL_SECONDS)
+                continue
+
+            try:
+                requested_at, task_args, result = self.requests.get(timeout=self.LAYOUT_POLL_SECONDS)
+            except queue.Empty:
+                try:
+                    self.refresh_layout()
+                except Exception as e:
+                    log_throttled("layout-check", 60, logging.WARNING, f"Capture service: layout check failed: {e}")
+                continue
+
+            with self.lock:
+                self.active_count += 1
+            try:
+                signature, monitors, capture_plan = self._snapshot_layout()
+                if signature != sct_signature: # The layout changed while this worker waited
+                    sct.close()
+                    sct = mss.mss()
+                    sct_signature = signature
+                take_screenshot_task(*task_args, sct=sct, current_monitors=monitors,
+                                     requested_at=requested_at, capture_plan=capture_plan, result=result)
+            except Exception as e:
+                logging.error("Capture service: unhandled error:\n" + traceback.format_exc())
+                if not result.done():
+                    result.set_exception(e)
+            finally:
+                with self.lock:
+                    self.active_count -= 1
+                self._publish_status()
+
+capture_service = CaptureService()
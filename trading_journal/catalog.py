@@ -0,0 +1,222 @@
+"""SQLite index of the journal's screenshots."""
+import os
+import re
+import logging
+import sqlite3
+import threading
+import time
+import traceback
+from pathlib import Path
+
+from . import state
+from .archive import ARCHIVE_SUFFIX, journal_file_exists, list_journal_dir
+from .imaging import SCREENSHOT_EXTENSIONS
+
+# ── Journal Catalog ───────────────────────────────────────────────────────────
+# SQLite index of every saved screenshot, so events can be looked up by date,
+# instrument or type without walking the Year/Season(Month)/Week_N/Instrument/
+# Day/Event tree. take_screenshot_task adds its files at capture time; the
+# backfill scanner indexes existing folders incrementally (a folder is only
+# re-listed when its modification time changed since the last scan), and the
+# contents of journal archives under their original paths.
+SCREENSHOT_NAME_RE = re.compile(r'^(?P<monitor>.+)_(?P<ts>\d{2}-\d{2}-\d{2})(?P<ext>\.[A-Za-z0-9]+)$')
+DAY_DIR_RE = re.compile(r'^(\d{4}-\d{2}-\d{2})')
+
+class JournalCatalog:
+    def __init__(self, path: Path, base_dir: Path):
+        self.path = path
+        self.base_dir = base_dir
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS captures (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                path TEXT NOT NULL UNIQUE,
+                event_dir TEXT NOT NULL,
+                event TEXT NOT NULL,
+                instrument TEXT NOT NULL,
+                day TEXT NOT NULL,
+                ts TEXT NOT NULL,
+                monitor TEXT NOT NULL
+            )""")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS captures_lookup ON captures (day, instrument, event, ts)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS captures_set ON captures (event_dir, ts)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS scanned_dirs (path TEXT PRIMARY KEY, mtime REAL NOT NULL)")
+
+    def parse_path(self, image_path: Path):
+        """Returns the catalog record for a screenshot inside the journal tree, or None."""
+        match = SCREENSHOT_NAME_RE.match(image_path.name)
+        if not match or match.group('ext').lower() not in SCREENSHOT_EXTENSIONS:
+            return None
+        try:
+            parts = image_path.parent.relative_to(self.base_dir).parts
+        except ValueError:
+            return None
+        # Year / Season(Month) / Week_N / Instrument / Day / Event
+        if len(parts) != 6:
+            return None
+        day_match = DAY_DIR_RE.match(parts[4])
+        if not day_match:
+            return None
+        return (str(image_path), str(image_path.parent), parts[5], parts[3], day_match.group(1),
+                match.group('ts'), match.group('monitor'))
+
+    def add_files(self, image_paths: list) -> int:
+        records = [r for r in (self.parse_path(Path(p)) for p in image_paths) if r is not None]
+        if records:
+            with self.lock:
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO captures (path, event_dir, event, instrument, day, ts, monitor) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)", records)
+        return len(records)
+
+    def event_images(self, event_dir: Path, ts: str) -> list:
+        with self.lock:
+            rows = self.conn.execute("SELECT path FROM captures WHERE event_dir = ? AND ts = ? ORDER BY path",
+                                     (str(event_dir), ts)).fetchall()
+        return [Path(row[0]) for row in rows]
+
+    def find_events(self, day_from: str = None, day_to: str = None, instrument: str = None,
+                    event: str = None, limit: int = 1000) -> list:
+        """Returns dicts with day, ts, instrument, event, event_dir and images
+        (count) for every matching event, newest first."""
+        clauses, params = [], []
+        if day_from:
+            clauses.append("day >= ?"); params.append(day_from)
+        if day_to:
+            clauses.append("day <= ?"); params.append(day_to)
+        if instrument:
+            clauses.append("instrument = ?"); params.append(instrument)
+        if event:
+            clauses.append("event = ?"); params.append(event)
+        where = ("WHERE " + " AND ".join(clauses)) if clauses else ""
+        with self.lock:
+            rows = self.conn.execute(
+                f"SELECT day, ts, instrument, event, event_dir, COUNT(*) FROM captures {where} "
+                f"GROUP BY event_dir, ts ORDER BY day DESC, ts DESC LIMIT ?", params + [limit]).fetchall()
+        return [{"day": r[0], "ts": r[1], "instrument": r[2], "event": r[3], "event_dir": Path(r[4]), "images": r[5]}
+                for r in rows]
+
+    def index_dir(self, event_dir: Path, mtime: float = None) -> int:
+        """(Re)indexes one event folder, dropping records of deleted files."""
+        if mtime is None:
+            mtime = event_dir.stat().st_mtime
+        files = [event_dir / name for name in os.listdir(event_dir)]
+        records = [r for r in (self.parse_path(f) for f in files) if r is not None]
+        with self.lock:
+            self.conn.execute("BEGIN")
+            try:
+                self.conn.execute("DELETE FROM captures WHERE event_dir = ?", (str(event_dir),))
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO captures (path, event_dir, event, instrument, day, ts, monitor) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)", records)
+                self.conn.execute("INSERT OR REPLACE INTO scanned_dirs (path, mtime) VALUES (?, ?)", (str(event_dir), mtime))
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        return len(records)
+
+    @staticmethod
+    def _under(root: Path) -> tuple:
+        """Bounds of the paths strictly below `root`, for a range query."""
+        return str(root) + os.sep, str(root) + chr(ord(os.sep) + 1)
+
+    def index_archive(self, archive_path: Path, mtime: float = None) -> int:
+        """(Re)indexes the files of a journal archive under their original
+        paths, replacing the records of the folder the archive took over."""
+        if mtime is None:
+            mtime = archive_path.stat().st_mtime
+        root = state.journal_archive.logical_root(archive_path)
+        records = [r for r in (self.parse_path(f) for f in state.journal_archive.archived_files(archive_path)) if r is not None]
+        with self.lock:
+            self.conn.execute("BEGIN")
+            try:
+                self.conn.execute("DELETE FROM captures WHERE event_dir >= ? AND event_dir < ?", self._under(root))
+                self.conn.execute("DELETE FROM scanned_dirs WHERE path >= ? AND path < ?", self._under(root))
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO captures (path, event_dir, event, instrument, day, ts, monitor) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)", records)
+                self.conn.execute("INSERT OR REPLACE INTO scanned_dirs (path, mtime) VALUES (?, ?)", (str(archive_path), mtime))
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        return len(records)
+
+    def backfill(self) -> dict:
+        """Walks the journal tree and indexes every event folder that is new or
+        changed since the last scan. Returns scan statistics."""
+        started = time.perf_counter()
+        with self.lock:
+            known = dict(self.conn.execute("SELECT path, mtime FROM scanned_dirs").fetchall())
+        stats = {"dirs": 0, "rescanned": 0, "files": 0}
+        seen = set()
+
+        def walk(directory: Path, depth: int):
+            try:
+                entries = [e for e in os.scandir(directory) if e.is_dir(follow_symlinks=False)]
+            except OSError as e:
+                logging.warning(f"Catalog backfill: cannot list {directory}: {e}")
+                return
+            for entry in entries:
+                if depth < 5:
+                    walk(Path(entry.path), depth + 1)
+                    continue
+                # Sixth level below BASE_DIR: the Event folder holding the screenshots.
+                stats["dirs"] += 1
+                seen.add(entry.path)
+                mtime = entry.stat().st_mtime
+                if known.get(entry.path) == mtime:
+                    continue
+                stats["rescanned"] += 1
+                stats["files"] += self.index_dir(Path(entry.path), mtime)
+
+        walk(self.base_dir, 0)
+        archives = list(state.journal_archive.iter_archives()) if state.journal_archive is not None else []
+        archive_names = {str(a) for a in archives}
+        vanished = [p for p in known if p not in seen and p not in archive_names]
+        if vanished:
+            with self.lock:
+                self.conn.executemany("DELETE FROM captures WHERE event_dir = ?", [(p,) for p in vanished])
+                self.conn.executemany("DELETE FROM scanned_dirs WHERE path = ?", [(p,) for p in vanished])
+                if state.journal_archive is not None:
+                    for p in vanished:
+                        if p.endswith(ARCHIVE_SUFFIX):
+                            bounds = self._under(state.journal_archive.logical_root(Path(p)))
+                            self.conn.execute("DELETE FROM captures WHERE event_dir >= ? AND event_dir < ?", bounds)
+        stats["removed_dirs"] = len(vanished)
+        for archive_path in archives:
+            # Also re-read an archive whose folder was just dropped as vanished (packed by an interrupted run)
+            mtime = archive_path.stat().st_mtime
+            low, high = self._under(state.journal_archive.logical_root(archive_path))
+            if known.get(str(archive_path)) == mtime and not any(low <= p < high for p in vanished):
+                continue
+            stats["rescanned"] += 1
+            stats["files"] += self.index_archive(archive_path, mtime)
+        stats["seconds"] = round(time.perf_counter() - started, 2)
+        return stats
+
+def catalog_backfill_task():
+    try:
+        stats = state.journal_catalog.backfill()
+        logging.info(f"Journal catalog backfill: {stats['dirs']} event folders, {stats['rescanned']} (re)indexed, "
+                     f"{stats['files']} files, {stats['removed_dirs']} removed, {stats['seconds']} s.")
+    except Exception:
+        logging.error("Error in catalog_backfill_task:\n" + traceback.format_exc())
+
+def find_event_images(view_dir: Path, target_timestamp: str) -> list:
+    """One event's screenshots: from the catalog, or by listing the folder (and
+    indexing it) when the catalog does not know it yet. Archived screenshots
+    keep their original paths."""
+    if state.journal_catalog is not None:
+        image_files = [f for f in state.journal_catalog.event_images(view_dir, target_timestamp) if journal_file_exists(f)]
+        if image_files:
+            return image_files
+    image_files = sorted(f for f in list_journal_dir(view_dir)
+                         if f.suffix.lower() in SCREENSHOT_EXTENSIONS and target_timestamp in f.name)
+    if image_files and state.journal_catalog is not None and view_dir.is_dir():
+        state.journal_catalog.index_dir(view_dir)
+    return image_files
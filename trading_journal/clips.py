@@ -0,0 +1,194 @@
+"""Short per-monitor video clips around events."""
+import os
+import logging
+import threading
+import time
+import traceback
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+from .grab import grab_all_monitors
+from .lazy import lazy_import
+from .logs import log_throttled
+from .metrics import metrics
+from .pretrigger import compress_frame
+from .telegram import add_to_telegram_queue, parse_chat_ids
+
+cv2 = lazy_import("cv2")
+np = lazy_import("numpy")
+mss = lazy_import("mss")
+
+# ── Event Clips ───────────────────────────────────────────────────────────────
+# With clips enabled, every event also gets one short video per monitor: the
+# frames from the pre-trigger buffer (when it runs) plus frames recorded after
+# the trigger by a recorder thread with its own grabber. Overlapping events
+# share the recorder's grabs. Finished recordings are encoded with
+# cv2.VideoWriter in a separate process, so neither the GIL nor the encoder
+# can delay the next hotkey capture, and are optionally queued to Telegram.
+CLIP_OUTPUT_FPS = 10  # playback rate; frames are repeated to keep real-time pacing
+CLIP_FOURCC = "mp4v"
+CLIP_EXTENSION = ".mp4"
+CLIP_ENCODE_PROCESSES = 1
+
+clip_process_executor = None # Started on the first clip
+
+
+def encode_clip_process(frames: list, out_path: str, fps: int, fourcc: str) -> dict:
+    """Runs in a worker process: writes [(wall time, jpeg bytes)] as a video
+    played back in real time at `fps`. Returns the clip's statistics."""
+    started = time.perf_counter()
+    writer = None
+    size = None
+    written = 0
+    current = None
+    index = 0
+    step = 1.0 / fps
+    t = frames[0][0]
+    try:
+        while t <= frames[-1][0] + 1e-6:
+            # Advance to the newest frame captured at or before t, decoding only the one shown
+            newest = None
+            while index < len(frames) and frames[index][0] <= t:
+                newest = frames[index][1]
+                index += 1
+            if newest is not None:
+                current = cv2.imdecode(np.frombuffer(newest, dtype=np.uint8), cv2.IMREAD_COLOR)
+                if size is None:
+                    size = (current.shape[1] // 2 * 2, current.shape[0] // 2 * 2)
+                    writer = cv2.VideoWriter(out_path, cv2.VideoWriter_fourcc(*fourcc), fps, size)
+                if (current.shape[1], current.shape[0]) != size:
+                    current = cv2.resize(current, size, interpolation=cv2.INTER_AREA)
+            writer.write(current)
+            written += 1
+            t += step
+    finally:
+        if writer is not None:
+            writer.release()
+    return {"path": out_path, "frames": written, "seconds": round(frames[-1][0] - frames[0][0], 1),
+            "bytes": os.path.getsize(out_path), "encode_ms": round((time.perf_counter() - started) * 1000, 1)}
+
+
+class ClipRecorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.enabled = False
+        self.pre_seconds = 10
+        self.post_seconds = 20
+        self.fps = 2.0
+        self.max_side = 1920
+        self.quality = 70
+        self.send_telegram = False
+        self.recordings = []  # events still recording their post-trigger frames
+        self.encoding = 0
+        self.wake = threading.Event()
+        self.thread = None
+
+    def configure(self, enabled: bool, pre_seconds: int, post_seconds: int, fps: float, max_side: int, quality: int,
+                  send_telegram: bool):
+        self.enabled = bool(enabled)
+        self.pre_seconds = max(0, int(pre_seconds))
+        self.post_seconds = max(1, int(post_seconds))
+        self.fps = min(max(0.5, float(fps)), 10.0)
+        self.max_side = int(max_side)
+        self.quality = int(quality)
+        self.send_telegram = bool(send_telegram)
+
+    def begin(self, event_id: str, save_dir: Path, ts: str, names: list, pre_frames: list, trigger_time: float,
+              telegram_chat_id: str = "", caption: str = ""):
+        """Starts the clip of one event; `pre_frames` are pre-trigger buffer frames."""
+        recording = {
+            "event_id": event_id, "save_dir": save_dir, "ts": ts, "names": names,
+            "frames": [f for f in pre_frames if f[0] >= trigger_time - self.pre_seconds],
+            "until": trigger_time + self.post_seconds,
+            "telegram_chat_id": telegram_chat_id, "caption": caption, "captured_at": trigger_time,
+        }
+        with self.lock:
+            self.recordings.append(recording)
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, name="clip-recorder", daemon=True)
+                self.thread.start()
+        self.wake.set()
+        logging.info(f"Clip recording started for {event_id}: {len(recording['frames'])} pre-trigger frame(s), "
+                     f"{self.post_seconds} s to go.")
+
+    def get_status_text(self) -> str:
+        if not self.enabled:
+            return "Clips: off"
+        with self.lock:
+            return f"Clips: {len(self.recordings)} recording, {self.encoding} encoding"
+
+    def _run(self):
+        from .capture import capture_service # capture imports this module
+        sct = None
+        sct_signature = None
+        while True:
+            with self.lock:
+                idle = not self.recordings
+            if idle:
+                self.wake.wait()
+                self.wake.clear()
+                continue
+            tick = time.perf_counter()
+            try:
+                if sct is None or sct_signature != capture_service.layout_signature:
+                    if sct is not None:
+                        sct.close()
+                    sct = mss.mss()
+                    sct_signature = capture_service.layout_signature
+                wall_time = time.time()
+                monitor_frames = [(idx, compress_frame(shot, self.max_side, self.quality)) for idx, (shot, _, _) in
+                                  enumerate(grab_all_monitors(sct, capture_service.regions))]
+            except Exception:
+                log_throttled("clip-grab", 60, logging.ERROR, "Clip recorder: grab failed:\n" + traceback.format_exc())
+                sct, monitor_frames, wall_time = None, None, time.time()
+            with self.lock:
+                finished = []
+                for recording in self.recordings:
+                    if monitor_frames is not None:
+                        recording["frames"].append((wall_time, monitor_frames))
+                    if wall_time >= recording["until"]:
+                        finished.append(recording)
+                self.recordings = [r for r in self.recordings if r not in finished]
+            for recording in finished:
+                self._encode(recording)
+            time.sleep(max(0.0, 1.0 / self.fps - (time.perf_counter() - tick)))
+
+    def _encode(self, recording: dict):
+        global clip_process_executor
+        if not recording["frames"]:
+            return
+        if clip_process_executor is None:
+            clip_process_executor = ProcessPoolExecutor(max_workers=CLIP_ENCODE_PROCESSES)
+        monitor_count = max(len(monitor_frames) for _, monitor_frames in recording["frames"])
+        for idx in range(monitor_count):
+            frames = [(wall_time, data) for wall_time, monitor_frames in recording["frames"]
+                      for frame_idx, data in monitor_frames if frame_idx == idx]
+            if not frames:
+                continue
+            name = recording["names"][idx] if idx < len(recording["names"]) else f"Monitor {idx+1}"
+            out_path = recording["save_dir"] / f"Clip {name}_{recording['ts']}{CLIP_EXTENSION}"
+            with self.lock:
+                self.encoding += 1
+            future = clip_process_executor.submit(encode_clip_process, frames, str(out_path), CLIP_OUTPUT_FPS, CLIP_FOURCC)
+            future.add_done_callback(lambda f, recording=recording, name=name: self._on_encoded(f, recording, name))
+
+    def _on_encoded(self, future, recording: dict, name: str):
+        with self.lock:
+            self.encoding -= 1
+        try:
+            result = future.result()
+        except Exception:
+            logging.error(f"Clip encoding failed for {recording['event_id']} ({name}):\n" + traceback.format_exc())
+            return
+        metrics.record(recording["event_id"], "clip_encode", result["encode_ms"], monitor=name, frames=result["frames"],
+                       bytes=result["bytes"])
+        logging.info(f"Clip saved to {result['path']} ({result['seconds']} s, {result['frames']} frames, "
+                     f"{result['bytes'] / 1e6:.1f} MB, encoded in {result['encode_ms']:.0f} ms)")
+        if self.send_telegram and recording["telegram_chat_id"]:
+            for chat_id in parse_chat_ids(recording["telegram_chat_id"]):
+                add_to_telegram_queue(chat_id, 'video', video_path=result["path"],
+                                      caption=f"{recording['caption']} ({name})".strip(),
+                                      captured_at=recording["captured_at"], event_id=recording["event_id"])
+
+
+clip_recorder = ClipRecorder()
@@ -0,0 +1,131 @@
+"""Paths, config.json and the journal's directory layout."""
+import sys
+import json
+import datetime
+import logging
+from tkinter import messagebox
+from pathlib import Path
+
+from .imaging import IMAGE_CODECS
+from .lazy import lazy_import
+
+screeninfo = lazy_import("screeninfo")
+
+# ── Paths & Config ────────────────────────────────────────────────────────────
+BASE_DIR = Path.home() / "Documents" / "Trading Journal"
+CONFIG_FILE = "config.json"
+OUTBOX_FILE = "telegram_outbox.sqlite3"
+CATALOG_FILE = "journal_catalog.sqlite3" # Lives in BASE_DIR, next to the journal it indexes
+
+SCRIPT_DIR = Path(sys.argv[0]).resolve().parent
+# ── MODIFIED: Centralized Icon Path and Window Title ──────────────────────────
+ICON_PATH = SCRIPT_DIR / "app_icon.ico" # Make sure you place your .ico file here and name it app_icon.ico
+MAIN_WINDOW_TITLE = "Trading Journal Screenshot Tool" # Your desired title for the main GUI window
+# ──────────────────────────────────────────────────────────────────────────────
+
+def get_base_path() -> Path:
+    BASE_DIR.mkdir(parents=True, exist_ok=True)
+    return BASE_DIR
+
+def get_cfg_path() -> Path:
+    return SCRIPT_DIR / CONFIG_FILE
+
+def get_outbox_path() -> Path:
+    return SCRIPT_DIR / OUTBOX_FILE
+
+def get_catalog_path() -> Path:
+    return get_base_path() / CATALOG_FILE
+
+def load_cfg(interactive: bool = True) -> dict:
+    """`interactive=False` (the headless daemon) only logs problems instead of showing dialogs."""
+    p = get_cfg_path()
+    cfg = {}
+    if p.exists():
+        try:
+            cfg = json.loads(p.read_text("utf-8"))
+        except json.JSONDecodeError:
+            logging.error(f"Error decoding config.json, creating a new one. Original content: {p.read_text('utf-8')}")
+            if interactive:
+                messagebox.showwarning("Config Error", "Configuration file is corrupted. A new one will be created.")
+    
+    cfg.setdefault("telegram_chat_id", "")
+    cfg.setdefault("instrument", "6B")
+    cfg.setdefault("enable_telegram_send", True)
+    cfg.setdefault("monitor_names", ",".join(f"Monitor {i+1}" for i in range(len(screeninfo.get_monitors()))))
+    cfg.setdefault("default_description", "Reviewing trade setup.")
+    cfg.setdefault("last_view_path", str(BASE_DIR)) # New config for last viewed path (created with the first capture)
+    cfg.setdefault("capture_workers", 1) # Concurrent captures; each worker owns its own grabber
+    cfg.setdefault("capture_queue_size", 4) # Presses beyond this many waiting captures are dropped
+    cfg.setdefault("capture_coalesce_ms", 750) # Repeated presses of the same hotkey within this window are merged
+    cfg.setdefault("telegram_send_workers", 3) # Concurrent uploads; items of one event stay in order
+    cfg.setdefault("telegram_upload_format", "jpeg") # Upload copies: jpeg or webp; originals stay lossless on disk
+    cfg.setdefault("telegram_upload_max_side", 2560) # Longest side of upload copies in pixels (0 = full size)
+    cfg.setdefault("telegram_upload_quality", 85)
+    cfg.setdefault("rendition_cache_max_mb", 2048) # Display renditions + thumbnails under BASE_DIR/.cache
+    cfg.setdefault("viewer_cache_max_mb", 768) # Decoded display frames kept in memory for the event navigator
+    cfg.setdefault("frame_dedupe", "exact") # off, exact (identical pixels) or near (opt-in: also nearly identical frames)
+    cfg.setdefault("frame_dedupe_tolerance", 2) # Max change of any pixel (per channel) for a "near" duplicate
+    cfg.setdefault("pretrigger_enabled", False) # Keep the last seconds of all monitors in memory and save them with each event
+    cfg.setdefault("pretrigger_fps", 1.0)
+    cfg.setdefault("pretrigger_seconds", 30)
+    cfg.setdefault("pretrigger_max_mb", 256) # Hard cap of the compressed ring buffer
+    cfg.setdefault("pretrigger_max_side", 1920) # Frames are downscaled to this longest side before compression
+    cfg.setdefault("pretrigger_jpeg_quality", 70)
+    cfg.setdefault("clip_enabled", False) # Record a short video of every monitor around each event
+    cfg.setdefault("clip_pre_seconds", 10) # Taken from the pre-trigger buffer when it is running
+    cfg.setdefault("clip_post_seconds", 20)
+    cfg.setdefault("clip_fps", 2.0) # Recording rate after the trigger
+    cfg.setdefault("clip_send_telegram", False) # Upload the clips through the Telegram outbox
+    cfg.setdefault("region_profiles", {}) # name -> {"<monitor number>": [{"label", "left", "top", "width", "height"}]}
+    cfg.setdefault("active_region_profile", "") # "" grabs every monitor in full
+    cfg.setdefault("log_file_level", "DEBUG") # DEBUG, INFO or WARNING for logs/app.log
+    cfg.setdefault("verbose_payload_logging", False) # Log (trimmed) Telegram API responses; off under load
+    cfg.setdefault("archive_after_days", 0) # Opt-in: pack days older than this into one ZIP each (0 = off, unless over the budget)
+    cfg.setdefault("archive_granularity", "day") # day or week: one archive per day or per week
+    cfg.setdefault("archive_dir", "") # Where archives go, e.g. a larger, slower drive ("" = inside the journal)
+    cfg.setdefault("journal_budget_gb", 0) # Over this, younger days are packed too (0 = no budget; nothing is deleted)
+    cfg.setdefault("archive_io_mb_per_s", 20) # Read/write rate cap of the compaction job (0 = unthrottled)
+    cfg.setdefault("daemon_host", "127.0.0.1") # Headless trigger API (--headless); keep it on loopback
+    cfg.setdefault("daemon_port", 8765)
+    cfg.setdefault("daemon_token", "") # If set, triggers must send it in the X-Trigger-Token header
+    cfg.setdefault("image_codec", "png") # png, webp (lossless) or qoi
+    cfg.setdefault("image_codec_level", IMAGE_CODECS.get(cfg["image_codec"], IMAGE_CODECS["png"])[1])
+    return cfg
+
+def save_cfg(cfg: dict):
+    p = get_cfg_path()
+    p.write_text(json.dumps(cfg, ensure_ascii=False, indent=4), "utf-8")
+    logging.info(f"Configuration saved to {p}")
+
+# ── Globals & Constants ───────────────────────────────────────────────────────
+
+INSTRUMENTS = [
+    "6E","6B","6A","6N","6S","6J","6C",
+    "ES","NQ","YM","CL","GC","SI","ZB","ZN","ZF"
+]
+
+# ── Date Helpers ──────────────────────────────────────────────────────────────
+def get_season(m: int) -> str:
+    if m in (12,1,2): return "Winter"
+    if m in (3,4,5):  return "Spring"
+    if m in (6,7,8):  return "Summer"
+    return "Autumn"
+
+def get_week_of_month(d: datetime.date) -> int:
+    first = d.replace(day=1)
+    return d.isocalendar()[1] 
+
+def get_save_directory(event: str, inst: str, now: datetime.datetime) -> Path:
+    base = get_base_path()
+    y = str(now.year)
+    mname = now.strftime("%B")
+    season = get_season(now.month)
+    week = f"Week_{now.isocalendar()[1]}" 
+    day = now.strftime("%Y-%m-%d")
+    path = base / y / f"{season}({mname})" / week / inst / day / event
+    path.mkdir(parents=True, exist_ok=True)
+    logging.info(f"Save directory: {path}")
+    return path
+
+def get_view_directory_from_path(selected_file_path: Path) -> Path:
+    return selected_file_path.parent
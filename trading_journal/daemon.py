@@ -0,0 +1,180 @@
+"""Headless capture daemon: the capture and Telegram pipeline without Tk, triggered over localhost HTTP.
+
+    python "New Ver.py" --headless [--host 127.0.0.1] [--port 8765]
+
+POST /capture with a JSON body
+    {"event": "Entry" | "Exit", "instrument": "6E", "description": "...",
+     "telegram": true, "wait": true, "timeout": 30, "coalesce": true}
+(everything but "event" is optional and defaults to config.json) answers with
+the saved paths once the frames are on disk, or 202 right after queueing when
+"wait" is false. The trigger is stamped as soon as the request line and headers
+are parsed, and the capture service's warmed-up grabber takes it from there,
+so trigger_to_grab_ms in the answer is comparable to the hotkey latency.
+Only a request identical to one accepted within capture_coalesce_ms (same
+event, instrument, description, ...) is merged into it; "coalesce": false
+always queues a capture of its own.
+GET /status returns the capture queue, Telegram backlog and pipeline metrics.
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import re
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from . import state
+from .capture import capture_service
+from .config import load_cfg
+from .lazy import warm_up
+from .logs import configure_logging
+from .metrics import metrics
+from .pretrigger import pretrigger_buffer
+from .startup import open_pipeline, start_background_tasks, start_capture
+
+EVENTS = ("Entry", "Exit")
+INSTRUMENT_RE = re.compile(r"^[A-Za-z0-9_.-]{1,20}$") # Becomes a directory name
+MAX_BODY_BYTES = 64 * 1024
+DEFAULT_WAIT_TIMEOUT_SECONDS = 30
+
+
+class TriggerHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1" # Keep-alive: a trigger script reuses its connection
+    disable_nagle_algorithm = True # Small responses go out immediately
+    server_version = "TradingJournalDaemon"
+
+    def do_POST(self):
+        requested_at = time.perf_counter() # Same stamp as the hotkey callback's
+        self.body_pending = True # Until read, the body is still on the connection
+        if self.path != "/capture":
+            self._reply(404, {"error": f"Unknown path {self.path}"})
+            return
+        if not self._authorized():
+            return
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            if length < 0:
+                raise ValueError("Invalid Content-Length")
+            if length > MAX_BODY_BYTES:
+                raise ValueError("Request body too large")
+            data = self.rfile.read(length)
+            self.body_pending = False
+            body = json.loads(data or b"{}")
+            if not isinstance(body, dict):
+                raise ValueError("Request body must be a JSON object")
+            task_args = self._task_args(body)
+            wait = bool(body.get("wait", True))
+            timeout = float(body.get("timeout", DEFAULT_WAIT_TIMEOUT_SECONDS))
+            coalesce = bool(body.get("coalesce", True))
+        except (ValueError, TypeError) as e: # json.JSONDecodeError is a ValueError
+            self._reply(400, {"error": str(e)})
+            return
+
+        result = Future()
+        outcome = capture_service.request_capture(requested_at, *task_args, result=result, coalesce=coalesce)
+        if outcome == "dropped":
+            self._reply(503, {"outcome": outcome, "error": "Capture queue is full"})
+            return
+        if not wait:
+            self._reply(202, {"outcome": outcome})
+            return
+        try:
+            self._reply(200, result.result(timeout=timeout))
+        except FutureTimeoutError:
+            self._reply(504, {"outcome": outcome, "error": f"Capture not saved within {timeout:g} s"})
+        except Exception as e:
+            self._reply(500, {"outcome": outcome, "error": f"Capture failed: {e}. See app.log for details."})
+
+    def do_GET(self):
+        self.body_pending = False
+        if self.path != "/status":
+            self._reply(404, {"error": f"Unknown path {self.path}"})
+            return
+        if not self._authorized():
+            return
+        self._reply(200, {
+            "capture": capture_service.get_status_text(),
+            "telegram_pending": state.telegram_outbox.pending_count(),
+            "pretrigger": pretrigger_buffer.get_status_text(),
+            "archive": state.journal_archive.summary_text(),
+            "metrics": metrics.summary(),
+        })
+
+    def _task_args(self, body: dict) -> tuple:
+        """take_screenshot_task's positional arguments, with config.json for whatever the body leaves out."""
+        cfg = self.server.cfg
+        def get(key, cfg_key): # A JSON null means "not given"
+            return cfg.get(cfg_key) if body.get(key) is None else body[key]
+        event = body.get("event")
+        if event not in EVENTS:
+            raise ValueError(f"event must be one of {', '.join(EVENTS)}")
+        inst = str(get("instrument", "instrument"))
+        if not INSTRUMENT_RE.match(inst):
+            raise ValueError(f"Invalid instrument: {inst!r}")
+        return (event, inst, cfg.get("monitor_names"), cfg.get("telegram_chat_id"),
+                bool(get("telegram", "enable_telegram_send")), str(get("description", "default_description")),
+                cfg.get("image_codec"), cfg.get("image_codec_level"))
+
+    def _authorized(self) -> bool:
+        token = self.server.cfg.get("daemon_token")
+        if token and self.headers.get("X-Trigger-Token") != token:
+            self._reply(401, {"error": "Missing or wrong X-Trigger-Token"})
+            return False
+        return True
+
+    def _reply(self, status: int, payload: dict):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        if self.body_pending: # An unread body would be parsed as the next request
+            self.close_connection = True
+            self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        logging.debug(f"Trigger API {self.address_string()}: {format % args}")
+
+
+def start_daemon(cfg: dict, host: str = None, port: int = None) -> ThreadingHTTPServer:
+    """Starts the pipeline and serves the trigger API on a background thread; returns the server."""
+    open_pipeline(cfg)
+    start_capture(cfg, cfg.get("pretrigger_enabled"))
+    profile = cfg.get("active_region_profile")
+    capture_service.set_region_profile(profile, cfg.get("region_profiles").get(profile))
+    start_background_tasks()
+    warm_up()
+
+    server = ThreadingHTTPServer((host or cfg.get("daemon_host"), port or cfg.get("daemon_port")), TriggerHandler)
+    server.daemon_threads = True
+    server.cfg = cfg
+    threading.Thread(target=server.serve_forever, name="trigger-api", daemon=True).start()
+    logging.info(f"Headless daemon listening on http://{server.server_address[0]}:{server.server_address[1]} "
+                 f"(POST /capture, GET /status).")
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description="Trading Journal headless capture daemon")
+    parser.add_argument("--headless", action="store_true", help="accepted for the launcher; always headless")
+    parser.add_argument("--host", help="listen address (default: daemon_host in config.json)")
+    parser.add_argument("--port", type=int, help="listen port (default: daemon_port in config.json)")
+    args = parser.parse_args()
+
+    multiprocessing.freeze_support() # Clip encoding runs in worker processes (also from a frozen build)
+    logging.info("===== Headless daemon start =====")
+    cfg = load_cfg(interactive=False)
+    configure_logging(cfg)
+    server = start_daemon(cfg, args.host, args.port)
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        logging.info("Headless daemon stopping.")
+    finally:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
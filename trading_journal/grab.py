@@ -0,0 +1,88 @@
+"""Monitor regions, region profiles and back-to-back grabbing."""
+import re
+import logging
+import time
+
+def get_monitor_region(m) -> dict:
+    return {
+        "top": m.y,
+        "left": m.x,
+        "width": m.width,
+        "height": m.height
+    }
+
+# Region profiles crop the capture to the panes that matter (e.g. the chart and
+# the DOM ladder). Rectangles are in pixels relative to their monitor, keyed by
+# monitor number ("1", "2", ...). Monitors a profile does not mention are
+# grabbed in full; a monitor with an empty list is not grabbed at all. Each
+# rectangle becomes its own screenshot named "<monitor name> [<label>]_<ts>".
+REGION_LABEL_INVALID_CHARS_RE = re.compile(r'[\\/:*?"<>|\[\]_]+')
+
+def validate_region_profiles(profiles) -> dict:
+    """Raises ValueError with a readable message if `profiles` is not a valid region_profiles value."""
+    if not isinstance(profiles, dict):
+        raise ValueError("Region profiles must be a JSON object of profile name -> monitors.")
+    for name, monitors in profiles.items():
+        if not isinstance(monitors, dict):
+            raise ValueError(f"Profile '{name}' must map monitor numbers to lists of rectangles.")
+        for monitor, rects in monitors.items():
+            if not str(monitor).isdigit() or int(monitor) < 1:
+                raise ValueError(f"Profile '{name}': '{monitor}' is not a monitor number (1, 2, ...).")
+            if not isinstance(rects, list):
+                raise ValueError(f"Profile '{name}', monitor {monitor}: expected a list of rectangles.")
+            for rect in rects:
+                if not isinstance(rect, dict):
+                    raise ValueError(f"Profile '{name}', monitor {monitor}: every rectangle must be an object.")
+                for key in ("left", "top", "width", "height"):
+                    if not isinstance(rect.get(key), int) or rect[key] < 0:
+                        raise ValueError(f"Profile '{name}', monitor {monitor}: '{key}' must be a non-negative integer.")
+    return profiles
+
+def build_capture_plan(monitors: list, profile: dict = None) -> list:
+    """The rectangles to grab: [{'monitor_idx', 'label', 'region'}], with
+    `label` None for a full monitor and regions clipped to their monitor."""
+    plan = []
+    for idx, m in enumerate(monitors):
+        rects = (profile or {}).get(str(idx + 1))
+        if rects is None:
+            plan.append({"monitor_idx": idx, "label": None, "region": get_monitor_region(m)})
+            continue
+        for rect in rects:
+            left, top = min(rect["left"], m.width), min(rect["top"], m.height)
+            width, height = min(rect["width"], m.width - left), min(rect["height"], m.height - top)
+            if width <= 0 or height <= 0:
+                logging.warning(f"Region {rect} lies outside monitor {idx + 1} ({m.width}x{m.height}); skipped.")
+                continue
+            label = REGION_LABEL_INVALID_CHARS_RE.sub("-", str(rect.get("label") or f"{left},{top}")).strip()
+            plan.append({"monitor_idx": idx, "label": label,
+                         "region": {"top": m.y + top, "left": m.x + left, "width": width, "height": height}})
+    return plan
+
+def get_plan_coverage(monitors: list, plan: list) -> float:
+    """Grabbed pixels as a fraction of all monitors' pixels."""
+    total = sum(m.width * m.height for m in monitors)
+    return sum(e["region"]["width"] * e["region"]["height"] for e in plan) / total if total else 1.0
+
+def grab_all_monitors(sct, regions: list) -> list:
+    """Grabs every region back-to-back into memory and returns
+    (shot, grab_started, grab_finished) tuples using time.perf_counter() stamps.
+    Nothing else happens between two grabs."""
+    frames = []
+    for region in regions:
+        grab_started = time.perf_counter()
+        shot = sct.grab(region)
+        frames.append((shot, grab_started, time.perf_counter()))
+    return frames
+
+def get_grab_timing(frames: list) -> dict:
+    """Per-event grab timing: offset of each monitor's grab from the first one
+    and the skew (first grab start to last grab start) across all monitors."""
+    if not frames:
+        return {"grab_skew_ms": 0.0, "grab_span_ms": 0.0, "grab_offsets_ms": [], "grab_durations_ms": []}
+    first_start = frames[0][1]
+    return {
+        "grab_skew_ms": round((frames[-1][1] - first_start) * 1000, 3),
+        "grab_span_ms": round((frames[-1][2] - first_start) * 1000, 3),
+        "grab_offsets_ms": [round((started - first_start) * 1000, 3) for _, started, _ in frames],
+        "grab_durations_ms": [round((finished - started) * 1000, 3) for _, started, finished in frames],
+    }
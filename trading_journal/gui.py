@@ -0,0 +1,511 @@
+"""Main window, Event Finder, region profile editor and hotkeys."""
+import json
+import datetime
+import logging
+import multiprocessing
+import threading
+import time
+import traceback
+import tkinter as tk
+from tkinter import ttk, simpledialog, messagebox
+
+import keyboard
+
+from . import state
+from .capture import capture_service
+from .catalog import DAY_DIR_RE, catalog_backfill_task, find_event_images
+from .clips import clip_recorder
+from .config import ICON_PATH, INSTRUMENTS, MAIN_WINDOW_TITLE, load_cfg, save_cfg
+from .grab import get_monitor_region, validate_region_profiles
+from .imaging import IMAGE_CODECS, benchmark_codecs
+from .lazy import lazy_import, warm_up
+from .logs import configure_logging, log_dir
+from .metrics import METRICS_FILE, metrics
+from .pretrigger import pretrigger_buffer
+from .reports import build_period_report_task, report_executor
+from .startup import open_pipeline, start_background_tasks, start_capture
+from .viewer import close_all_image_windows, event_navigator, view_screenshots_gui_task
+
+cv2 = lazy_import("cv2")
+mss = lazy_import("mss")
+screeninfo = lazy_import("screeninfo")
+Image = lazy_import("PIL.Image")
+ImageTk = lazy_import("PIL.ImageTk")
+
+# ── Hotkey Setup ──────────────────────────────────────────────────────────────
+def setup_hotkeys(inst_var: tk.StringVar, mon_names_var: tk.StringVar,
+                  telegram_chat_id_var: tk.StringVar,
+                  enable_telegram_send_var: tk.BooleanVar,
+                  default_description_text_widget: tk.Text,
+                  last_view_path_var: tk.StringVar,
+                  image_codec_var: tk.StringVar,
+                  image_codec_level_var: tk.IntVar):
+    def on_hotkey(event: str):
+        # Stamp first so the reported latency covers reading the GUI fields too.
+        requested_at = time.perf_counter()
+        capture_service.request_capture(requested_at, event, inst_var.get(), mon_names_var.get(),
+                                        telegram_chat_id_var.get(), enable_telegram_send_var.get(),
+                                        default_description_text_widget.get("1.0", tk.END).strip(),
+                                        image_codec_var.get(), image_codec_level_var.get())
+
+    keyboard.add_hotkey('ctrl+shift+e', lambda: on_hotkey("Entry"))
+    keyboard.add_hotkey('ctrl+shift+x', lambda: on_hotkey("Exit"))
+    logging.info("Hotkeys bound: Ctrl+Shift+E (Entry), Ctrl+Shift+X (Exit).")
+
+# ── Event Finder ──────────────────────────────────────────────────────────────
+def open_event_finder(monitor_names_var: tk.StringVar, last_view_path_var: tk.StringVar):
+    """Catalog search by date range, instrument and event type."""
+    win = tk.Toplevel(state.root)
+    win.title(f"{MAIN_WINDOW_TITLE} - Find Events")
+    win.geometry("660x520")
+
+    today = datetime.date.today().isoformat()
+    day_from_var = tk.StringVar(value=(datetime.date.today() - datetime.timedelta(days=7)).isoformat())
+    day_to_var = tk.StringVar(value=today)
+    instrument_var = tk.StringVar(value="")
+    event_var = tk.StringVar(value="")
+    status_var = tk.StringVar(value="")
+    results = []
+
+    f_filters = ttk.Frame(win); f_filters.pack(fill="x", padx=10, pady=5)
+    ttk.Label(f_filters, text="From:").grid(row=0, column=0, sticky="w")
+    ttk.Entry(f_filters, textvariable=day_from_var, width=11).grid(row=0, column=1, padx=5)
+    ttk.Label(f_filters, text="To:").grid(row=0, column=2, sticky="w")
+    ttk.Entry(f_filters, textvariable=day_to_var, width=11).grid(row=0, column=3, padx=5)
+    ttk.Label(f_filters, text="Instrument:").grid(row=1, column=0, sticky="w")
+    ttk.Combobox(f_filters, values=[""] + INSTRUMENTS, textvariable=instrument_var, state="readonly", width=8).grid(row=1, column=1, padx=5)
+    ttk.Label(f_filters, text="Event:").grid(row=1, column=2, sticky="w")
+    ttk.Combobox(f_filters, values=["", "Entry", "Exit"], textvariable=event_var, state="readonly", width=8).grid(row=1, column=3, padx=5)
+
+    listbox = tk.Listbox(win, font=("TkFixedFont", 10))
+    listbox.pack(fill="both", expand=True, padx=10, pady=5)
+    ttk.Label(win, textvariable=status_var).pack(anchor="w", padx=10)
+    f_preview = ttk.Frame(win); f_preview.pack(fill="x", padx=10, pady=5)
+    preview_images = [] # Keeps the PhotoImages alive while shown
+
+    def show_preview(thumbnails: list):
+        for child in f_preview.winfo_children():
+            child.destroy()
+        preview_images.clear()
+        for thumb in thumbnails:
+            photo = ImageTk.PhotoImage(Image.fromarray(cv2.cvtColor(thumb, cv2.COLOR_BGR2RGB)).reduce(3))
+            preview_images.append(photo)
+            ttk.Label(f_preview, image=photo).pack(side="left", padx=2)
+
+    def preview_selected(event=None):
+        selection = listbox.curselection()
+        if not selection:
+            return
+        r = results[selection[0]]
+
+        def task():
+            image_files = find_event_images(r['event_dir'], r['ts'])
+            thumbnails = [t for t in (state.rendition_cache.get_thumbnail(f) for f in image_files) if t is not None]
+            state.root.after(0, lambda: show_preview(thumbnails) if win.winfo_exists() else None)
+
+        threading.Thread(target=task, daemon=True).start()
+
+    def search(event=None):
+        started = time.perf_counter()
+        results[:] = state.journal_catalog.find_events(day_from_var.get().strip() or None, day_to_var.get().strip() or None,
+                                                 instrument_var.get() or None, event_var.get() or None)
+        listbox.delete(0, tk.END)
+        for r in results:
+            listbox.insert(tk.END, f"{r['day']}  {r['ts'].replace('-', ':')}  {r['instrument']:4}  {r['event']:5}  ({r['images']} images)")
+        status_var.set(f"{len(results)} event(s) in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    def view_selected(event=None, compare_mode="off"):
+        selection = listbox.curselection()
+        if not selection:
+            return
+        r = results[selection[0]]
+
+        def task():
+            image_files = find_event_images(r['event_dir'], r['ts'])
+            if not image_files:
+                state.root.after(0, lambda: messagebox.showinfo("No Images Found", f"The screenshots of this event are gone:\n{r['event_dir']}", parent=win))
+                return
+            state.root.after(0, lambda: last_view_path_var.set(str(r['event_dir'])))
+            event_navigator.open(r['event_dir'], r['ts'], image_files, monitor_names_var.get(), compare_mode=compare_mode)
+
+        threading.Thread(target=task, daemon=True).start()
+
+    def compare_selected():
+        view_selected(compare_mode="side_by_side")
+
+    f_buttons = ttk.Frame(win); f_buttons.pack(fill="x", padx=10, pady=5)
+    ttk.Button(f_buttons, text="Search", command=search).pack(side="left")
+    ttk.Button(f_buttons, text="View", command=view_selected).pack(side="left", padx=5)
+    ttk.Button(f_buttons, text="Compare Entry/Exit", command=compare_selected).pack(side="left")
+
+    def build_report():
+        day_from, day_to = day_from_var.get().strip(), day_to_var.get().strip()
+        if not (DAY_DIR_RE.match(day_from) and DAY_DIR_RE.match(day_to)):
+            messagebox.showerror("Report", "Enter From and To dates as YYYY-MM-DD.", parent=win)
+            return
+        status_var.set(f"Building report {day_from} to {day_to}...")
+        report_executor.submit(build_period_report_task, day_from, day_to, instrument_var.get() or None,
+                               event_var.get() or None)
+
+    ttk.Button(f_buttons, text="Build Report", command=build_report).pack(side="left", padx=5)
+    def rescan():
+        def task():
+            catalog_backfill_task()
+            state.root.after(0, search)
+        status_var.set("Rescanning journal folders...")
+        threading.Thread(target=task, daemon=True).start()
+
+    ttk.Button(f_buttons, text="Rescan Journal", command=rescan).pack(side="right")
+    listbox.bind("<Double-Button-1>", view_selected)
+    listbox.bind("<<ListboxSelect>>", preview_selected)
+    win.bind("<Return>", search)
+    search()
+
+
+# ── Codec Benchmark ───────────────────────────────────────────────────────────
+def run_codec_benchmark_task(button_ref):
+    state.after(0, lambda: button_ref.config(state=tk.DISABLED))
+    try:
+        current_monitors = screeninfo.get_monitors()
+        primary = next((m for m in current_monitors if m.is_primary), current_monitors[0])
+        with mss.mss() as sct:
+            shot = sct.grab(get_monitor_region(primary))
+        logging.info(f"Benchmarking image codecs on a {shot.size[0]}x{shot.size[1]} frame...")
+        results = benchmark_codecs(shot)
+        log_dir.mkdir(parents=True, exist_ok=True)
+        (log_dir / "codec_benchmark.json").write_text(json.dumps(
+            {"frame_size": list(shot.size), "results": results}, indent=4), "utf-8")
+        lines = []
+        for r in results:
+            line = (f"{r['codec'].upper():4} level {r['level']}: {r['encode_ms']:7.1f} ms, "
+                    f"{r['mb_per_s']:6.1f} MB/s, {r['bytes'] / 1e6:6.2f} MB (x{r['ratio']})")
+            logging.info(f"Codec benchmark: {line}")
+            lines.append(line)
+        state.after(0, lambda: messagebox.showinfo(
+            "Codec Benchmark", f"Primary monitor {shot.size[0]}x{shot.size[1]}, best of 3:\n\n" + "\n".join(lines)))
+    except Exception:
+        logging.error("Error in run_codec_benchmark_task:\n" + traceback.format_exc())
+        state.after(0, lambda: messagebox.showerror("Error", "Codec benchmark failed.\nSee app.log for details."))
+    finally:
+        state.after(0, lambda: button_ref.config(state=tk.NORMAL))
+
+
+# ── Region Profile Editor ─────────────────────────────────────────────────────
+FULL_MONITORS_PROFILE = "(full monitors)"
+
+def open_region_profile_editor(profiles: dict, on_save):
+    """JSON editor for the region_profiles config entry; `on_save(profiles)` gets the validated result."""
+    win = tk.Toplevel(state.root)
+    win.title(f"{MAIN_WINDOW_TITLE} - Region Profiles")
+    win.geometry("620x520")
+
+    monitors_text = "\n".join(f"Monitor {i + 1}: {m.width}x{m.height} at ({m.x}, {m.y})"
+                               for i, m in enumerate(capture_service.monitors or screeninfo.get_monitors()))
+    ttk.Label(win, justify="left", text=(
+        "Profile name -> monitor number -> rectangles in pixels relative to that monitor.\n"
+        "Monitors not listed are captured in full; an empty list skips the monitor.\n"
+        'Example: {"Chart + DOM": {"1": [{"label": "Chart", "left": 0, "top": 60, "width": 2200, "height": 1380}],\n'
+        '                          "2": [{"label": "DOM", "left": 0, "top": 0, "width": 480, "height": 1440}]}}\n\n'
+        + monitors_text)).pack(anchor="w", padx=10, pady=5)
+
+    editor = tk.Text(win, wrap="none", font=("Courier New", 10))
+    editor.pack(fill="both", expand=True, padx=10, pady=5)
+    editor.insert("1.0", json.dumps(profiles, ensure_ascii=False, indent=4))
+
+    def save():
+        try:
+            new_profiles = validate_region_profiles(json.loads(editor.get("1.0", tk.END)))
+        except ValueError as e: # json.JSONDecodeError is a ValueError too
+            messagebox.showerror("Invalid Region Profiles", str(e), parent=win)
+            return
+        on_save(new_profiles)
+        win.destroy()
+
+    f_buttons = ttk.Frame(win); f_buttons.pack(fill="x", padx=10, pady=5)
+    ttk.Button(f_buttons, text="Save", command=save).pack(side="right")
+    ttk.Button(f_buttons, text="Cancel", command=win.destroy).pack(side="right", padx=5)
+
+# ── Main GUI ─────────────────────────────────────────────────────────────────
+STARTUP_WARM_UP_DELAY_MS = 200
+
+def start_gui():
+    cfg = load_cfg()
+    configure_logging(cfg)
+    inst0 = cfg.get("instrument")
+    names0 = cfg.get("monitor_names")
+    telegram_chat_id0 = cfg.get("telegram_chat_id")
+    enable_telegram_send0 = cfg.get("enable_telegram_send")
+    default_description0 = cfg.get("default_description")
+    last_view_path0 = cfg.get("last_view_path")
+
+    root = state.root = tk.Tk()
+    # ── MODIFIED: Set Main Window Title ──────────────────────────────────────
+    root.title(MAIN_WINDOW_TITLE) 
+    # ─────────────────────────────────────────────────────────────────────────
+    root.geometry("580x760") 
+    root.resizable(False, True) 
+
+    # ── MODIFIED: Set Main Window Icon ───────────────────────────────────────
+    if ICON_PATH.exists():
+        try:
+            root.iconbitmap(str(ICON_PATH))
+            # Optional: Attempt to set icon for OpenCV windows (may not work on all systems)
+            # This is a bit of a hack, as OpenCV windows are not Tkinter windows.
+            # You might need a more complex solution involving PyWin32 for Windows
+            # or platform-specific methods for other OS.
+            # cv2.setWindowProperty(window_name, cv2.WND_PROP_ASPECT_RATIO, cv2.WINDOW_FREERATIO) 
+            # The above line is just an example of a window property, not an icon.
+            # There is no direct cv2 function to set window icon globally or by path easily.
+            # We're relying on the system default or a hack.
+        except tk.TclError as e:
+            logging.error(f"Error setting icon: {e}. Make sure '{ICON_PATH.name}' is a valid .ico file.")
+            messagebox.showwarning("Icon Error", f"Could not load icon file: {ICON_PATH.name}\nMake sure it's a valid .ico file.")
+    else:
+        logging.warning(f"Icon file not found at: {ICON_PATH}")
+    # ─────────────────────────────────────────────────────────────────────────
+
+    app = state.app = type('AppHolder', (object,), {
+        'inst_var': tk.StringVar(value=inst0),
+        'mon_names_var': tk.StringVar(value=names0),
+        'telegram_chat_id_var': tk.StringVar(value=telegram_chat_id0),
+        'enable_telegram_send_var': tk.BooleanVar(value=enable_telegram_send0),
+        'verbose_payload_logging_var': tk.BooleanVar(value=cfg.get("verbose_payload_logging")),
+        'default_description_text_widget': None,
+        'last_view_path_var': tk.StringVar(value=last_view_path0), # New variable for last viewed path
+        'capture_status_var': tk.StringVar(value=capture_service.get_status_text()),
+        'image_codec_var': tk.StringVar(value=cfg.get("image_codec")),
+        'image_codec_level_var': tk.IntVar(value=cfg.get("image_codec_level")),
+        'region_profile_var': tk.StringVar(value=cfg.get("active_region_profile") or FULL_MONITORS_PROFILE),
+        'region_coverage_var': tk.StringVar(value=""),
+        'pretrigger_enabled_var': tk.BooleanVar(value=cfg.get("pretrigger_enabled")),
+        'clip_enabled_var': tk.BooleanVar(value=cfg.get("clip_enabled")),
+        'pretrigger_status_var': tk.StringVar(value=pretrigger_buffer.get_status_text())
+    })()
+
+    f1 = ttk.Frame(root); f1.pack(fill="x", padx=10, pady=5)
+    ttk.Label(f1, text="Instrument:").pack(side="left")
+    ttk.Combobox(
+        f1, values=INSTRUMENTS, textvariable=app.inst_var,
+        state="readonly", width=8
+    ).pack(side="left", padx=5)
+    
+    def edit_monitor_names():
+        ans = simpledialog.askstring(
+            "Monitor Names",
+            "Enter names separated by commas (e.g., Chart, Order Book, Time & Sales, News):\nThese names will be used for filenames and Telegram captions.",
+            initialvalue=app.mon_names_var.get(),
+            parent=root
+        )
+        if ans:
+            app.mon_names_var.set(ans)
+    ttk.Button(f1, text="Monitor Names", command=edit_monitor_names) \
+        .pack(side="left", padx=5)
+
+    ## NEW FEATURE: View Screenshots - Button for viewing
+    # Pass the button itself to the task so it can disable/enable it
+    view_screenshots_button = ttk.Button(f1, text="View Screenshots", 
+                                         command=lambda: threading.Thread(target=view_screenshots_gui_task, 
+                                                                          args=(app.mon_names_var, view_screenshots_button, app.last_view_path_var), 
+                                                                          daemon=True).start())
+    view_screenshots_button.pack(side="left", padx=5)
+    ttk.Button(f1, text="Find Events", command=lambda: open_event_finder(app.mon_names_var, app.last_view_path_var)) \
+        .pack(side="left", padx=5)
+
+
+    f_desc = ttk.LabelFrame(root, text="Default Event Description"); f_desc.pack(fill="both", expand=True, padx=10, pady=5)
+    ttk.Label(f_desc, text="This text will be added to Telegram/Word. '*Order Entered/Exited*' and Instrument/Timestamp will be added automatically.").pack(padx=5, pady=2, anchor="w")
+    
+    default_description_text_widget = tk.Text(f_desc, wrap="word", height=1, font=("TkDefaultFont", 10), relief="flat", highlightthickness=0)
+    default_description_text_widget.pack(fill="both", expand=True, padx=5, pady=2)
+    app.default_description_text_widget = default_description_text_widget
+    
+    default_description_text_widget.insert("1.0", default_description0)
+
+    def adjust_text_height(event=None):
+        content_lines = int(default_description_text_widget.index('end-1c').split('.')[0])
+        min_height = 1
+        max_height = 10 
+        calculated_height = max(min_height, min(max_height, content_lines))
+        
+        if default_description_text_widget.cget("height") != calculated_height:
+            default_description_text_widget.config(height=calculated_height)
+        
+    default_description_text_widget.bind("<KeyRelease>", adjust_text_height)
+    default_description_text_widget.bind("<FocusOut>", adjust_text_height) 
+    default_description_text_widget.bind("<Configure>", adjust_text_height) 
+    
+    root.update_idletasks() 
+    adjust_text_height()
+
+    f_telegram = ttk.LabelFrame(root, text="Telegram Settings (Bot Token is hardcoded)"); f_telegram.pack(fill="x", padx=10, pady=5)
+    
+    ttk.Label(f_telegram, text="Chat ID(s), comma-separated:").grid(row=0, column=0, padx=5, pady=2, sticky="w")
+    ttk.Entry(f_telegram, textvariable=app.telegram_chat_id_var, width=40).grid(row=0, column=1, padx=5, pady=2, sticky="ew")
+    ttk.Label(f_telegram, text="To get Chat ID:\n1. Add bot to private channel as admin.\n2. Send a message in channel.\n3. Go to https://api.telegram.org/botYOUR_BOT_TOKEN/getUpdates in browser.\nThe first chat uploads the photos; the others reuse them without re-uploading.").grid(row=1, column=0, columnspan=2, padx=5, pady=2, sticky="w")
+    
+    ttk.Checkbutton(f_telegram, text="Enable Telegram Photo Send",
+                    variable=app.enable_telegram_send_var).grid(row=2, column=0, padx=5, pady=5, sticky="w")
+
+    def on_verbose_logging_toggled():
+        cfg["verbose_payload_logging"] = app.verbose_payload_logging_var.get()
+        configure_logging(cfg)
+
+    ttk.Checkbutton(f_telegram, text="Verbose API logging", variable=app.verbose_payload_logging_var,
+                    command=on_verbose_logging_toggled).grid(row=2, column=1, padx=5, pady=5, sticky="w")
+    
+    f_telegram.grid_columnconfigure(1, weight=1)
+
+    f_codec = ttk.LabelFrame(root, text="Screenshot Format"); f_codec.pack(fill="x", padx=10, pady=5)
+    ttk.Label(f_codec, text="Codec:").pack(side="left", padx=5)
+    codec_level_spinbox = ttk.Spinbox(f_codec, textvariable=app.image_codec_level_var, width=4)
+
+    def on_codec_selected(event=None):
+        _, default_level, (min_level, max_level), _ = IMAGE_CODECS[app.image_codec_var.get()]
+        codec_level_spinbox.config(from_=min_level, to=max_level)
+        app.image_codec_level_var.set(default_level)
+
+    codec_combobox = ttk.Combobox(f_codec, values=list(IMAGE_CODECS), textvariable=app.image_codec_var,
+                                  state="readonly", width=6)
+    codec_combobox.pack(side="left", padx=5)
+    codec_combobox.bind("<<ComboboxSelected>>", on_codec_selected)
+    ttk.Label(f_codec, text="Level:").pack(side="left", padx=5)
+    _, _, (min_level0, max_level0), _ = IMAGE_CODECS.get(app.image_codec_var.get(), IMAGE_CODECS["png"])
+    codec_level_spinbox.config(from_=min_level0, to=max_level0)
+    codec_level_spinbox.pack(side="left", padx=5)
+    codec_benchmark_button = ttk.Button(f_codec, text="Benchmark",
+                                        command=lambda: threading.Thread(target=run_codec_benchmark_task,
+                                                                         args=(codec_benchmark_button,),
+                                                                         daemon=True).start())
+    codec_benchmark_button.pack(side="left", padx=5)
+
+    f_regions = ttk.LabelFrame(root, text="Capture Regions"); f_regions.pack(fill="x", padx=10, pady=5)
+    ttk.Label(f_regions, text="Profile:").pack(side="left", padx=5)
+    region_profile_combobox = ttk.Combobox(f_regions, textvariable=app.region_profile_var, state="readonly", width=20,
+                                           values=[FULL_MONITORS_PROFILE] + list(cfg.get("region_profiles")))
+    region_profile_combobox.pack(side="left", padx=5)
+
+    def on_region_profile_selected(event=None):
+        name = app.region_profile_var.get()
+        name = "" if name == FULL_MONITORS_PROFILE else name
+        coverage = capture_service.set_region_profile(name, cfg.get("region_profiles").get(name))
+        app.region_coverage_var.set(f"{coverage:.0%} of the screen area")
+
+    def on_region_profiles_saved(profiles: dict):
+        cfg["region_profiles"] = profiles
+        save_cfg(cfg)
+        region_profile_combobox.config(values=[FULL_MONITORS_PROFILE] + list(profiles))
+        if app.region_profile_var.get() not in profiles:
+            app.region_profile_var.set(FULL_MONITORS_PROFILE)
+        on_region_profile_selected()
+
+    region_profile_combobox.bind("<<ComboboxSelected>>", on_region_profile_selected)
+    ttk.Button(f_regions, text="Edit Profiles",
+               command=lambda: open_region_profile_editor(cfg.get("region_profiles"), on_region_profiles_saved)) \
+        .pack(side="left", padx=5)
+    ttk.Label(f_regions, textvariable=app.region_coverage_var).pack(side="left", padx=5)
+
+    f_pretrigger = ttk.LabelFrame(root, text="Pre-Trigger Buffer & Clips"); f_pretrigger.pack(fill="x", padx=10, pady=5)
+
+    def on_pretrigger_toggled():
+        if app.pretrigger_enabled_var.get():
+            pretrigger_buffer.start()
+        else:
+            pretrigger_buffer.stop()
+        app.pretrigger_status_var.set(pretrigger_buffer.get_status_text())
+
+    ttk.Checkbutton(f_pretrigger, text=f"Save the last {cfg.get('pretrigger_seconds')} s "
+                                       f"({cfg.get('pretrigger_fps')} fps) with every event",
+                    variable=app.pretrigger_enabled_var, command=on_pretrigger_toggled).pack(anchor="w", padx=5)
+    ttk.Checkbutton(f_pretrigger, text=f"Record a clip per monitor ({cfg.get('clip_pre_seconds')} s before, "
+                                       f"{cfg.get('clip_post_seconds')} s after each event)",
+                    variable=app.clip_enabled_var,
+                    command=lambda: setattr(clip_recorder, "enabled", app.clip_enabled_var.get())).pack(anchor="w", padx=5)
+    ttk.Label(f_pretrigger, textvariable=app.pretrigger_status_var).pack(anchor="w", padx=5)
+
+    def refresh_pretrigger_status():
+        app.pretrigger_status_var.set(f"{pretrigger_buffer.get_status_text()}\n{clip_recorder.get_status_text()}")
+        root.after(2000, refresh_pretrigger_status)
+
+    f4 = ttk.Frame(root); f4.pack(fill="x", padx=10, pady=5)
+    ttk.Button(f4, text="Pipeline Stats",
+               command=lambda: messagebox.showinfo("Pipeline Stats",
+                                                   f"Recent spans (details in {METRICS_FILE.name}):\n\n{metrics.summary_text()}\n\n"
+                                                   f"{state.frame_store.summary_text()}\n{state.journal_archive.summary_text()}",
+                                                   parent=root)).pack(side="right", anchor="n", padx=5)
+    ttk.Label(f4, text="Ctrl+Shift+E → Entry (PNGs + Word Doc + Telegram)").pack(anchor="w", padx=5)
+    ttk.Label(f4, text="Ctrl+Shift+X → Exit (PNGs + Telegram)").pack(anchor="w", padx=5)
+    ttk.Label(f4, textvariable=app.capture_status_var).pack(anchor="w", padx=5)
+
+    def on_close():
+        cfg["instrument"] = app.inst_var.get()
+        cfg["monitor_names"] = app.mon_names_var.get()
+        cfg["telegram_chat_id"] = app.telegram_chat_id_var.get()
+        cfg["enable_telegram_send"] = app.enable_telegram_send_var.get()
+        cfg["default_description"] = app.default_description_text_widget.get("1.0", tk.END).strip()
+        cfg["last_view_path"] = app.last_view_path_var.get() # Save last viewed path
+        cfg["image_codec"] = app.image_codec_var.get()
+        cfg["image_codec_level"] = app.image_codec_level_var.get()
+        cfg["pretrigger_enabled"] = app.pretrigger_enabled_var.get()
+        cfg["verbose_payload_logging"] = app.verbose_payload_logging_var.get()
+        cfg["active_region_profile"] = "" if app.region_profile_var.get() == FULL_MONITORS_PROFILE else app.region_profile_var.get()
+        cfg["clip_enabled"] = app.clip_enabled_var.get()
+        save_cfg(cfg)
+        close_all_image_windows(wait=True) # IMPORTANT: Close any open OpenCV windows before exiting
+        root.destroy()
+
+    root.protocol("WM_DELETE_WINDOW", on_close)
+
+    def start_pipeline(pretrigger_enabled: bool):
+        # Worker thread: the databases, caches, grabbers and workers come up while the window stays responsive.
+        try:
+            open_pipeline(cfg)
+            start_capture(cfg, pretrigger_enabled)
+            start_background_tasks()
+        except Exception:
+            details = traceback.format_exc()
+            state.after(0, lambda: report_fatal_error(details, root))
+            return
+        state.after(0, on_pipeline_started)
+
+    def on_pipeline_started():
+        try:
+            if app.region_profile_var.get() not in cfg.get("region_profiles"):
+                app.region_profile_var.set(FULL_MONITORS_PROFILE)
+            on_region_profile_selected()
+            refresh_pretrigger_status()
+            threading.Thread(target=setup_hotkeys, args=(app.inst_var, app.mon_names_var, app.telegram_chat_id_var, app.enable_telegram_send_var, app.default_description_text_widget, app.last_view_path_var, app.image_codec_var, app.image_codec_level_var), daemon=True).start()
+            root.after(STARTUP_WARM_UP_DELAY_MS, warm_up) # Once the window has been drawn
+        except Exception:
+            report_fatal_error(traceback.format_exc(), root)
+
+    app.capture_status_var.set("Starting the capture pipeline...")
+    threading.Thread(target=start_pipeline, args=(app.pretrigger_enabled_var.get(),), name="pipeline-startup",
+                     daemon=True).start()
+    root.mainloop()
+
+# ── Safe Start & Main Guard ───────────────────────────────────────────────────
+def report_fatal_error(details: str, root: tk.Tk = None):
+    """Logs a fatal traceback, tells the user and closes `root` (or a temporary window)."""
+    logging.error("Unhandled exception:\n" + details)
+    try:
+        if root is None:
+            root = tk.Tk()
+            root.withdraw()
+        messagebox.showerror("Fatal Error", "An unexpected critical error occurred.\nSee app.log for details.", parent=root)
+        root.destroy()
+    except Exception:
+        pass
+
+def safe_start():
+    try:
+        start_gui()
+    except Exception:
+        report_fatal_error(traceback.format_exc())
+
+def main():
+    multiprocessing.freeze_support() # Clip encoding runs in worker processes (also from a frozen build)
+    logging.info("===== Script start =====")
+    safe_start()
+
+if __name__ == "__main__":
+    main()
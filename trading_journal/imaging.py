@@ -0,0 +1,115 @@
+"""Lossless screenshot codecs and image loading."""
+import io
+import os
+import re
+import logging
+import time
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+from .archive import read_archived_file
+from .lazy import lazy_import
+
+cv2 = lazy_import("cv2")
+np = lazy_import("numpy")
+mss_tools = lazy_import("mss.tools")
+Image = lazy_import("PIL.Image")
+
+# ── Image Codecs ──────────────────────────────────────────────────────────────
+# Encoders take mss' packed RGB bytes and return the encoded file content; the
+# capture pipeline writes the bytes to disk in a separate step. "level" is the
+# codec's speed/size knob: zlib level for PNG (0 = store, 1 = fastest ... 9 =
+# smallest), WebP lossless effort (0 = fastest ... 6 = smallest). QOI has none.
+def encode_png(rgb: bytes, size, level: int) -> bytes:
+    return mss_tools.to_png(rgb, size, level=level)
+
+def encode_webp(rgb: bytes, size, level: int) -> bytes:
+    buf = io.BytesIO()
+    Image.frombytes("RGB", size, rgb).save(buf, "WEBP", lossless=True, method=level, quality=round(level * 100 / 6))
+    return buf.getvalue()
+
+def encode_qoi(rgb: bytes, size, level: int) -> bytes:
+    buf = io.BytesIO()
+    Image.frombytes("RGB", size, rgb).save(buf, "QOI")
+    return buf.getvalue()
+
+IMAGE_CODECS = {
+    # name: (file extension, default level, (min level, max level), encoder)
+    "png": (".png", 6, (0, 9), encode_png),
+    "webp": (".webp", 0, (0, 6), encode_webp),
+    "qoi": (".qoi", 0, (0, 0), encode_qoi),
+}
+SCREENSHOT_EXTENSIONS = tuple(ext for ext, _, _, _ in IMAGE_CODECS.values())
+SCREENSHOT_TIMESTAMP_RE = re.compile(r'(\d{2}-\d{2}-\d{2})(' + "|".join(re.escape(ext) for ext in SCREENSHOT_EXTENSIONS) + r')$', re.IGNORECASE)
+# cv2.imread reads these directly; anything else is decoded through Pillow.
+CV2_READABLE_EXTENSIONS = (".png", ".webp", ".jpg", ".jpeg")
+
+def resolve_codec(codec: str, level) -> tuple:
+    """Returns (codec, level) with unknown codecs falling back to PNG and the
+    level clamped to the codec's range."""
+    if codec not in IMAGE_CODECS:
+        logging.warning(f"Unknown image codec '{codec}', using PNG.")
+        codec = "png"
+    if codec == "qoi" and "QOI" not in Image.SAVE:
+        logging.warning("This Pillow build cannot write QOI, using fast PNG (level 1) instead.")
+        return "png", 1
+    _, default_level, (min_level, max_level), _ = IMAGE_CODECS[codec]
+    try:
+        level = int(level)
+    except (TypeError, ValueError):
+        level = default_level
+    return codec, max(min_level, min(max_level, level))
+
+def encode_image(rgb: bytes, size, codec: str, level: int) -> bytes:
+    return IMAGE_CODECS[codec][3](rgb, size, level)
+
+ENCODE_WORKERS = max(2, min(4, (os.cpu_count() or 2) - 1))
+encode_executor = ThreadPoolExecutor(max_workers=ENCODE_WORKERS, thread_name_prefix="encode")
+
+def load_image_bgr(image_path: Path):
+    """Decodes any saved screenshot format, loose or archived, into an OpenCV BGR array, or None."""
+    img = None
+    data = None if image_path.exists() else read_archived_file(image_path) # Decoded in memory, nothing unpacked
+    if image_path.suffix.lower() in CV2_READABLE_EXTENSIONS:
+        if data is not None:
+            img = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+        else:
+            img = cv2.imread(str(image_path))
+        if img is None:
+            logging.error(f"Could not load image at {image_path}. Check path and file integrity.")
+    if img is None:
+        try:
+            with Image.open(io.BytesIO(data) if data is not None else image_path) as pil_img:
+                img = cv2.cvtColor(np.array(pil_img.convert("RGB")), cv2.COLOR_RGB2BGR)
+            logging.info(f"Image {image_path.name} loaded successfully using PIL.")
+        except Exception as e:
+            logging.error(f"PIL also failed for {image_path.name}: {e}")
+            return None
+    return img
+
+def benchmark_codecs(shot, repeats: int = 3) -> list:
+    """Encodes one grabbed frame with every codec/level option and returns
+    throughput (MB/s of raw RGB input) and output size for each."""
+    rgb, size = shot.rgb, shot.size
+    raw_bytes = len(rgb)
+    options = [("png", 0), ("png", 1), ("png", 3), ("png", 6), ("png", 9),
+               ("webp", 0), ("webp", 3), ("webp", 6), ("qoi", 0)]
+    results = []
+    for codec, level in options:
+        if (codec, level) != resolve_codec(codec, level):
+            continue # Not available in this build
+        best = None
+        for _ in range(repeats):
+            started = time.perf_counter()
+            encoded = encode_image(rgb, size, codec, level)
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        results.append({
+            "codec": codec,
+            "level": level,
+            "encode_ms": round(best * 1000, 1),
+            "mb_per_s": round(raw_bytes / best / 1e6, 1),
+            "bytes": len(encoded),
+            "ratio": round(raw_bytes / len(encoded), 2),
+        })
+    return results
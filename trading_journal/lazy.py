@@ -0,0 +1,65 @@
+"""Deferred imports of the heavy libraries.
+
+OpenCV, NumPy, Pillow, python-docx, requests and mss together take a large
+part of startup, yet the window and the hotkeys need none of them. Modules bind
+them with lazy_import(); the real import runs on first attribute access, from
+whichever thread gets there first, or earlier through warm_up(), which the GUI
+starts in the background once the window is up.
+"""
+import importlib
+import logging
+import threading
+import time
+
+# What a hotkey capture touches first, then the viewer, Word and Telegram stacks
+WARM_UP_MODULES = ("mss", "mss.tools", "numpy", "PIL.Image", "cv2", "requests", "docx")
+
+
+class LazyModule:
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            started = time.perf_counter()
+            module = importlib.import_module(self._name) # Concurrent first uses wait on the import lock
+            if self._module is None:
+                self._module = module
+                logging.debug(f"Imported {self._name} in {(time.perf_counter() - started) * 1000:.0f} ms "
+                              f"(thread {threading.current_thread().name})")
+        return self._module
+
+    def __getattr__(self, attr: str):
+        value = getattr(self._load(), attr)
+        self.__dict__[attr] = value # Later lookups skip __getattr__
+        return value
+
+    def __repr__(self):
+        return f"<lazy module '{self._name}' ({'loaded' if self._module is not None else 'not loaded'})>"
+
+
+_lazy_modules = {} # module name -> LazyModule, shared by all importers
+_lazy_modules_lock = threading.Lock()
+
+def lazy_import(name: str) -> LazyModule:
+    with _lazy_modules_lock:
+        module = _lazy_modules.get(name)
+        if module is None:
+            module = _lazy_modules[name] = LazyModule(name)
+        return module
+
+def warm_up(names=WARM_UP_MODULES) -> threading.Thread:
+    """Imports `names` one after another on a background thread."""
+    def run():
+        started = time.perf_counter()
+        for name in names:
+            try:
+                lazy_import(name)._load()
+            except Exception as e: # The feature that needs it reports the error on first use
+                logging.warning(f"Warm-up import of {name} failed: {e}")
+        logging.info(f"Background imports done in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    thread = threading.Thread(target=run, name="import-warm-up", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,115 @@
+"""Logging setup: a queue in front of the console and the rotating, gzip-compressed app.log."""
+import os
+import gzip
+import shutil
+import atexit
+import datetime
+import logging
+import logging.handlers
+import multiprocessing
+import queue
+import threading
+import time
+from pathlib import Path
+
+# ── Logging Setup ─────────────────────────────────────────────────────────────
+log_dir = Path.cwd() / "logs" # Created by the first write, not on import
+log_file_path = log_dir / "app.log"
+
+# Records go through a queue to one background writer thread, so capture,
+# viewer and Telegram threads never wait on file I/O or a shared handler lock.
+# app.log rotates at LOG_MAX_BYTES and at midnight; rotated files are gzipped.
+# When the queue backs up, records below WARNING are shed instead of queued.
+LOG_MAX_BYTES = 10 * 1024 * 1024
+LOG_BACKUP_COUNT = 20
+LOG_QUEUE_SHED_THRESHOLD = 5000
+LOG_PAYLOAD_MAX_CHARS = 300
+verbose_payload_logging = False # Full API payloads at DEBUG; set from config by configure_logging()
+
+class CompressingRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """Size- and day-based rotation with gzip-compressed backups (app.log.1.gz, ...)."""
+
+    def __init__(self, filename, max_bytes: int, backup_count: int):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8", delay=True)
+        self.namer = lambda name: name + ".gz"
+        self.rotator = self._compress
+        self.current_day = datetime.date.today()
+
+    @staticmethod
+    def _compress(source, dest):
+        with open(source, "rb") as f_in, gzip.open(dest, "wb") as f_out:
+            shutil.copyfileobj(f_in, f_out)
+        os.remove(source)
+
+    def _open(self):
+        Path(self.baseFilename).parent.mkdir(parents=True, exist_ok=True)
+        return super()._open()
+
+    def shouldRollover(self, record):
+        if datetime.date.today() != self.current_day:
+            return 1
+        return super().shouldRollover(record)
+
+    def doRollover(self):
+        self.current_day = datetime.date.today()
+        super().doRollover()
+
+class SheddingQueueHandler(logging.handlers.QueueHandler):
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.shed_count = 0
+
+    def enqueue(self, record):
+        if record.levelno < logging.WARNING and self.queue.qsize() > LOG_QUEUE_SHED_THRESHOLD:
+            self.shed_count += 1
+            return
+        self.queue.put_nowait(record)
+
+log_formatter = logging.Formatter("%(asctime)s [%(levelname)s] %(message)s")
+console_handler = logging.StreamHandler()
+console_handler.setLevel(logging.INFO) 
+console_handler.setFormatter(log_formatter)
+log_handlers = [console_handler]
+if multiprocessing.parent_process() is None: # Worker processes (clip encoding) leave app.log to the main process
+    file_handler = CompressingRotatingFileHandler(log_file_path, LOG_MAX_BYTES, LOG_BACKUP_COUNT)
+    file_handler.setLevel(logging.DEBUG)
+    file_handler.setFormatter(log_formatter)
+    log_handlers.append(file_handler)
+else:
+    file_handler = None
+log_queue = queue.Queue(-1)
+log_queue_handler = SheddingQueueHandler(log_queue)
+log_listener = logging.handlers.QueueListener(log_queue, *log_handlers, respect_handler_level=True)
+log_listener.start()
+atexit.register(log_listener.stop) # Flushes the queue on exit
+logging.getLogger().setLevel(logging.DEBUG)
+logging.getLogger().addHandler(log_queue_handler)
+
+_throttled_logs = {} # key -> (last emitted, suppressed count)
+_throttled_logs_lock = threading.Lock()
+
+def log_throttled(key: str, interval: float, level: int, message: str):
+    """Logs `message` at most once per `interval` seconds per key, counting the suppressed repeats."""
+    now = time.monotonic()
+    with _throttled_logs_lock:
+        last, suppressed = _throttled_logs.get(key, (None, 0))
+        if last is not None and now - last < interval:
+            _throttled_logs[key] = (last, suppressed + 1)
+            return
+        _throttled_logs[key] = (now, 0)
+    logging.log(level, message + (f" ({suppressed} similar message(s) suppressed)" if suppressed else ""))
+
+def trim_payload(text: str) -> str:
+    if len(text) <= LOG_PAYLOAD_MAX_CHARS:
+        return text
+    return f"{text[:LOG_PAYLOAD_MAX_CHARS]}... ({len(text)} chars)"
+
+def configure_logging(cfg: dict):
+    """Applies the logging switches from config.json."""
+    global verbose_payload_logging
+    verbose_payload_logging = bool(cfg.get("verbose_payload_logging"))
+    if file_handler is not None:
+        file_handler.setLevel(getattr(logging, str(cfg.get("log_file_level")).upper(), logging.DEBUG))
+    # Library chatter (urllib3 logs every request URL, including the bot token) only in verbose mode
+    for name in ("urllib3", "PIL"):
+        logging.getLogger(name).setLevel(logging.DEBUG if verbose_payload_logging else logging.WARNING)
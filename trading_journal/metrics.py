@@ -0,0 +1,84 @@
+"""Per-stage pipeline timings."""
+import json
+import logging
+import queue
+import threading
+import time
+from pathlib import Path
+from contextlib import contextmanager
+from collections import deque
+
+from .logs import CompressingRotatingFileHandler, log_dir
+
+# ── Pipeline Metrics ──────────────────────────────────────────────────────────
+# Structured timing spans for every stage between a hotkey press and the photo
+# arriving in Telegram. Every span is appended as one JSON line to
+# logs/metrics.jsonl by a background writer, and the most recent spans of each
+# stage are kept in memory for the p50/p95 summary in the GUI. The file rotates
+# like app.log (size and midnight, gzipped backups), so it stays bounded.
+METRICS_FILE = log_dir / "metrics.jsonl"
+METRICS_MAX_BYTES = 10 * 1024 * 1024
+METRICS_BACKUP_COUNT = 10
+
+class PipelineMetrics:
+    def __init__(self, path: Path, window: int = 500):
+        self.path = path
+        self.window = window
+        self.lock = threading.Lock()
+        self.samples = {} # stage -> deque of recent durations in ms
+        self.pending = queue.SimpleQueue()
+        self.writer = None
+        self.handler = CompressingRotatingFileHandler(path, METRICS_MAX_BYTES, METRICS_BACKUP_COUNT) # Opened on first write
+        self.handler.setFormatter(logging.Formatter("%(message)s"))
+
+    def record(self, event_id, stage: str, duration_ms: float, **fields):
+        record = {"ts": round(time.time(), 3), "event_id": event_id, "stage": stage,
+                  "duration_ms": round(duration_ms, 3)}
+        record.update(fields)
+        with self.lock:
+            self.samples.setdefault(stage, deque(maxlen=self.window)).append(duration_ms)
+            if self.writer is None:
+                self.writer = threading.Thread(target=self._write_loop, name="metrics-writer", daemon=True)
+                self.writer.start()
+        self.pending.put(record)
+
+    @contextmanager
+    def span(self, event_id, stage: str, **fields):
+        """Times the enclosed block; the span is recorded even if it raises."""
+        started = time.perf_counter()
+        try:
+            yield fields
+        except BaseException:
+            fields.setdefault("status", "error")
+            raise
+        finally:
+            self.record(event_id, stage, (time.perf_counter() - started) * 1000, **fields)
+
+    def _write_loop(self):
+        while True:
+            record = self.pending.get()
+            # The handler rotates by size and at midnight; a write error is reported by logging's handleError
+            self.handler.handle(logging.makeLogRecord({"msg": json.dumps(record, ensure_ascii=False, default=str)}))
+
+    def summary(self) -> dict:
+        """{stage: {"count", "p50_ms", "p95_ms", "max_ms"}} over the recent window."""
+        with self.lock:
+            snapshot = {stage: sorted(values) for stage, values in self.samples.items() if values}
+        result = {}
+        for stage, ordered in snapshot.items():
+            result[stage] = {
+                "count": len(ordered),
+                "p50_ms": ordered[min(len(ordered) - 1, int(0.50 * len(ordered)))],
+                "p95_ms": ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))],
+                "max_ms": ordered[-1],
+            }
+        return result
+
+    def summary_text(self) -> str:
+        lines = []
+        for stage, stats in self.summary().items():
+            lines.append(f"{stage:22} n={stats['count']:<4} p50 {stats['p50_ms']:8.1f} ms   "
+                         f"p95 {stats['p95_ms']:8.1f} ms   max {stats['max_ms']:8.1f} ms")
+        return "\n".join(lines) if lines else "No pipeline spans recorded yet."
+
+metrics = PipelineMetrics(METRICS_FILE)
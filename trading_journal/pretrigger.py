@@ -0,0 +1,169 @@
+"""Optional ring buffer of low-rate frames saved with every event."""
+import datetime
+import logging
+import threading
+import time
+import traceback
+from pathlib import Path
+from collections import deque
+
+from .grab import grab_all_monitors
+from .lazy import lazy_import
+from .logs import log_throttled
+from .metrics import metrics
+
+cv2 = lazy_import("cv2")
+np = lazy_import("numpy")
+mss = lazy_import("mss")
+
+# ── Pre-Trigger Ring Buffer ───────────────────────────────────────────────────
+# Optional background mode: one thread with its own mss grabber captures all
+# monitors at a low frame rate, downscales and JPEG-compresses the frames and
+# keeps them in a ring buffer bounded both by age and by total bytes. When an
+# event is captured, the buffered frames are written next to the screenshots
+# in a "Pre-Trigger_<ts>" subfolder (outside the catalog's Event folder
+# level). The thread's own CPU time is measured so its cost stays visible.
+PRETRIGGER_DIR_PREFIX = "Pre-Trigger"
+
+
+def compress_frame(shot, max_side: int, quality: int) -> bytes:
+    """Downscales a grab to `max_side` (0 = full size) and JPEG-encodes it."""
+    frame = np.asarray(shot)  # BGRA view of the grab
+    height, width = frame.shape[:2]
+    scale = max_side / max(width, height) if max_side else 1.0
+    if scale < 1.0:
+        frame = cv2.resize(frame, (int(width * scale), int(height * scale)), interpolation=cv2.INTER_AREA)
+    ok, encoded = cv2.imencode(".jpg", cv2.cvtColor(frame, cv2.COLOR_BGRA2BGR), [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if not ok:
+        raise RuntimeError("JPEG encoding failed")
+    return encoded.tobytes()
+
+
+class PreTriggerBuffer:
+    STATS_WINDOW_SECONDS = 10.0
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.frames = deque()  # (wall time, [(monitor idx, jpeg bytes)])
+        self.total_bytes = 0
+        self.fps = 1.0
+        self.seconds = 30
+        self.max_bytes = 256 * 1024 * 1024
+        self.max_side = 1920
+        self.quality = 70
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.cpu_percent = 0.0
+        self.frame_ms = 0.0
+        self.late_ticks = 0
+
+    def configure(self, fps: float, seconds: int, max_mb: int, max_side: int, quality: int):
+        self.fps = min(max(0.1, float(fps)), 10.0)
+        self.seconds = max(1, int(seconds))
+        self.max_bytes = max(1, int(max_mb)) * 1024 * 1024
+        self.max_side = int(max_side)
+        self.quality = int(quality)
+
+    @property
+    def running(self) -> bool:
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self):
+        if self.running:
+            if not self.stop_event.is_set():
+                return
+            self.thread.join(timeout=5) # A stop is still finishing its last grab
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._run, name="pretrigger-buffer", daemon=True)
+        self.thread.start()
+        logging.info(f"Pre-trigger buffer started: {self.fps} fps, {self.seconds} s, max {self.max_bytes / 1e6:.0f} MB.")
+
+    def stop(self):
+        self.stop_event.set()
+        with self.lock:
+            self.frames.clear()
+            self.total_bytes = 0
+        logging.info("Pre-trigger buffer stopped.")
+
+    def compress(self, shot) -> bytes:
+        return compress_frame(shot, self.max_side, self.quality)
+
+    def _append(self, wall_time: float, monitor_frames: list):
+        size = sum(len(data) for _, data in monitor_frames)
+        with self.lock:
+            self.frames.append((wall_time, monitor_frames))
+            self.total_bytes += size
+            cutoff = wall_time - self.seconds
+            while self.frames and (self.frames[0][0] < cutoff or self.total_bytes > self.max_bytes):
+                _, evicted = self.frames.popleft()
+                self.total_bytes -= sum(len(data) for _, data in evicted)
+
+    def snapshot(self, until: float = None) -> list:
+        """The buffered (wall time, [(monitor idx, jpeg bytes)]) frames up to `until` (a time.time() stamp)."""
+        with self.lock:
+            return [frame for frame in self.frames if until is None or frame[0] <= until]
+
+    def get_status_text(self) -> str:
+        if not self.running:
+            return "Pre-trigger buffer: off"
+        with self.lock:
+            count, total_bytes = len(self.frames), self.total_bytes
+            span = self.frames[-1][0] - self.frames[0][0] if len(self.frames) > 1 else 0.0
+        return (f"Pre-trigger buffer: {count} frames / {span:.0f} s, {total_bytes / 1e6:.1f} of "
+                f"{self.max_bytes / 1e6:.0f} MB, CPU {self.cpu_percent:.1f}%, {self.frame_ms:.0f} ms per frame"
+                + (f", {self.late_ticks} late" if self.late_ticks else ""))
+
+    def _run(self):
+        from .capture import capture_service # capture imports this module
+        sct = None
+        sct_signature = None
+        window_started, window_cpu = time.perf_counter(), time.thread_time()
+        while not self.stop_event.is_set():
+            tick = time.perf_counter()
+            try:
+                # Own grabber (mss handles are thread-bound), rebuilt when the capture service sees a new layout
+                if sct is None or sct_signature != capture_service.layout_signature:
+                    if sct is not None:
+                        sct.close()
+                    sct = mss.mss()
+                    sct_signature = capture_service.layout_signature
+                wall_time = time.time()
+                monitor_frames = [(idx, self.compress(shot)) for idx, (shot, _, _) in
+                                  enumerate(grab_all_monitors(sct, capture_service.regions))]
+                self._append(wall_time, monitor_frames)
+            except Exception:
+                log_throttled("pretrigger-grab", 60, logging.ERROR, "Pre-trigger buffer: grab failed:\n" + traceback.format_exc())
+                sct = None
+            elapsed = time.perf_counter() - tick
+            self.frame_ms = elapsed * 1000
+            now = time.perf_counter()
+            if now - window_started >= self.STATS_WINDOW_SECONDS:
+                cpu = time.thread_time()
+                self.cpu_percent = (cpu - window_cpu) / (now - window_started) * 100
+                window_started, window_cpu = now, cpu
+            interval = 1.0 / self.fps
+            if elapsed > interval:
+                self.late_ticks += 1
+            self.stop_event.wait(max(0.0, interval - elapsed))
+        if sct is not None:
+            sct.close()
+
+
+pretrigger_buffer = PreTriggerBuffer()
+
+def save_pretrigger_task(frames: list, save_dir: Path, ts: str, names: list, event_id: str = None):
+    """Writes the buffered frames of one event as '<monitor name>_<HH-MM-SS.mmm>.jpg'."""
+    if not frames:
+        return
+    try:
+        with metrics.span(event_id, "pretrigger_save", frames=len(frames)):
+            out_dir = save_dir / f"{PRETRIGGER_DIR_PREFIX}_{ts}"
+            out_dir.mkdir(parents=True, exist_ok=True)
+            for wall_time, monitor_frames in frames:
+                stamp = datetime.datetime.fromtimestamp(wall_time).strftime("%H-%M-%S.%f")[:-3]
+                for idx, data in monitor_frames:
+                    name = names[idx] if idx < len(names) else f"Monitor {idx+1}"
+                    (out_dir / f"{name}_{stamp}.jpg").write_bytes(data)
+        logging.info(f"Saved {len(frames)} pre-trigger frame(s) to {out_dir}")
+    except Exception:
+        logging.error("Error in save_pretrigger_task:\n" + traceback.format_exc())
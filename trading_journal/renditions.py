@@ -0,0 +1,206 @@
+"""Display-sized renditions and thumbnails of saved screenshots."""
+import os
+import json
+import hashlib
+import logging
+import threading
+import time
+from pathlib import Path
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from . import state
+from .archive import journal_file_stat
+from .imaging import load_image_bgr
+from .lazy import lazy_import
+from .metrics import metrics
+
+cv2 = lazy_import("cv2")
+np = lazy_import("numpy")
+
+# ── Display Renditions & Thumbnails ───────────────────────────────────────────
+# Display-ready frames (already scaled and letterboxed to a monitor's size) and
+# small thumbnails are generated in the background right after capture and
+# kept as JPEGs under BASE_DIR/.cache, so opening a set only has to decode a
+# monitor-sized JPEG. The cache is bounded in bytes with LRU eviction (file
+# mtimes record recency across restarts) and the renditions are dropped when
+# the monitor layout changes.
+RENDITION_CACHE_DIR_NAME = ".cache"
+RENDITION_JPEG_QUALITY = 95
+THUMBNAIL_WIDTH = 320
+
+def make_display_frame(img, mon_width: int, mon_height: int):
+    """Scales `img` to fit the monitor while preserving aspect ratio and
+    centres it on a black monitor-sized background."""
+    img_height, img_width = img.shape[:2]
+    if (img_width, img_height) == (mon_width, mon_height):
+        return img # Already exactly the monitor's size
+
+    # Calculate scaling factors
+    scale_w = mon_width / img_width
+    scale_h = mon_height / img_height
+    
+    # Use the smaller scaling factor to fit the image entirely within the monitor
+    scale = min(scale_w, scale_h)
+
+    # Calculate new dimensions for the image
+    new_width = int(img_width * scale)
+    new_height = int(img_height * scale)
+
+    resized_img = cv2.resize(img, (new_width, new_height), interpolation=cv2.INTER_AREA)
+
+    # Create a black background image of the monitor's dimensions
+    background = np.zeros((mon_height, mon_width, 3), dtype=np.uint8)
+
+    # Calculate position to center the resized image on the background
+    x_offset = (mon_width - new_width) // 2
+    y_offset = (mon_height - new_height) // 2
+
+    # Place the resized image onto the black background
+    # Ensure slice indices are non-negative and within bounds
+    background[max(0, y_offset):min(mon_height, y_offset+new_height), 
+               max(0, x_offset):min(mon_width, x_offset+new_width)] = resized_img
+    return background
+
+def shot_to_bgr(shot):
+    """mss BGRA buffer -> OpenCV BGR array without going through a file."""
+    bgra = np.frombuffer(shot.bgra, dtype=np.uint8).reshape(shot.size[1], shot.size[0], 4)
+    return cv2.cvtColor(bgra, cv2.COLOR_BGRA2BGR)
+
+class RenditionCache:
+    def __init__(self, cache_dir: Path, max_bytes: int):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.entries = OrderedDict() # file name -> size, least recently used first
+        self.total_bytes = 0
+        self.layout_file = cache_dir / "layout.json"
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        # Indexing a full cache stats thousands of files, so it runs off the startup
+        # path; lookups and stores wait for it.
+        self.indexed = threading.Event()
+        threading.Thread(target=self._index, name="rendition-index", daemon=True).start()
+
+    def _index(self):
+        started = time.perf_counter()
+        try:
+            files = sorted(((f, f.stat()) for f in self.cache_dir.glob("*.jpg")), key=lambda e: e[1].st_mtime)
+            with self.lock:
+                for f, st in files:
+                    self.entries[f.name] = st.st_size
+                    self.total_bytes += st.st_size
+        except OSError as e:
+            logging.warning(f"Rendition cache: indexing {self.cache_dir} failed: {e}")
+        finally:
+            self.indexed.set()
+        logging.info(f"Rendition cache: {len(self.entries)} files, {self.total_bytes / 1e6:.0f} MB, "
+                     f"indexed in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    @staticmethod
+    def _key(image_path: Path, variant: str) -> str:
+        mtime_ns, size = journal_file_stat(image_path) # Archives keep both, so renditions survive compaction
+        raw = f"{image_path.resolve()}|{mtime_ns}|{size}|{variant}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest() + ("_thumb" if variant == "thumb" else "") + ".jpg"
+
+    def set_layout(self, signature):
+        """Drops all display renditions if the monitor layout differs from the
+        one they were made for. Thumbnails do not depend on the layout."""
+        signature = [list(m) for m in signature]
+        self.indexed.wait()
+        try:
+            previous = json.loads(self.layout_file.read_text("utf-8"))
+        except (OSError, ValueError):
+            previous = None
+        if previous == signature:
+            return
+        with self.lock:
+            for name in [n for n in self.entries if not n.endswith("_thumb.jpg")]:
+                self._remove(name)
+        self.layout_file.write_text(json.dumps(signature), "utf-8")
+        if previous is not None:
+            logging.info("Monitor layout changed, display rendition cache cleared.")
+
+    def _remove(self, name: str):
+        self.total_bytes -= self.entries.pop(name, 0)
+        try:
+            (self.cache_dir / name).unlink()
+        except OSError:
+            pass
+
+    def _store(self, name: str, img, quality: int):
+        ok, encoded = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, quality])
+        if not ok:
+            return
+        tmp_path = self.cache_dir / (name + ".tmp")
+        tmp_path.write_bytes(encoded.tobytes())
+        os.replace(tmp_path, self.cache_dir / name)
+        self.indexed.wait()
+        with self.lock:
+            self.total_bytes += len(encoded) - self.entries.pop(name, 0)
+            self.entries[name] = len(encoded)
+            while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+                self._remove(next(iter(self.entries)))
+
+    def _load(self, name: str):
+        self.indexed.wait()
+        with self.lock:
+            if name not in self.entries:
+                return None
+            self.entries.move_to_end(name)
+        path = self.cache_dir / name
+        img = cv2.imread(str(path))
+        if img is None:
+            with self.lock:
+                self._remove(name)
+            return None
+        try:
+            os.utime(path) # Persist recency for the next session's LRU order
+        except OSError:
+            pass
+        return img
+
+    def generate(self, image_path: Path, mon_width: int, mon_height: int, img=None):
+        """Builds and stores the display rendition and the thumbnail. `img` is
+        the already-decoded BGR frame if the caller has it."""
+        started = time.perf_counter()
+        if img is None:
+            img = load_image_bgr(image_path)
+            if img is None:
+                return None
+        frame = make_display_frame(img, mon_width, mon_height)
+        self._store(self._key(image_path, f"{mon_width}x{mon_height}"), frame, RENDITION_JPEG_QUALITY)
+        thumb_height = max(1, round(img.shape[0] * THUMBNAIL_WIDTH / img.shape[1]))
+        self._store(self._key(image_path, "thumb"),
+                    cv2.resize(img, (THUMBNAIL_WIDTH, thumb_height), interpolation=cv2.INTER_AREA), 85)
+        metrics.record(None, "rendition_build", (time.perf_counter() - started) * 1000, file=image_path.name)
+        return frame
+
+    def get_display_frame(self, image_path: Path, mon_width: int, mon_height: int):
+        frame = self._load(self._key(image_path, f"{mon_width}x{mon_height}"))
+        if frame is not None and frame.shape[:2] == (mon_height, mon_width):
+            return frame
+        return self.generate(image_path, mon_width, mon_height)
+
+    def get_thumbnail(self, image_path: Path):
+        thumb = self._load(self._key(image_path, "thumb"))
+        if thumb is None:
+            img = load_image_bgr(image_path)
+            if img is None:
+                return None
+            thumb_height = max(1, round(img.shape[0] * THUMBNAIL_WIDTH / img.shape[1]))
+            thumb = cv2.resize(img, (THUMBNAIL_WIDTH, thumb_height), interpolation=cv2.INTER_AREA)
+            self._store(self._key(image_path, "thumb"), thumb, 85)
+        return thumb
+
+rendition_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="renditions")
+
+def generate_renditions_task(saved_images: list, current_monitors: list):
+    for img_data in saved_images:
+        idx = img_data['monitor_idx']
+        if idx >= len(current_monitors):
+            continue
+        try:
+            img = shot_to_bgr(img_data['shot']) if img_data.get('shot') is not None else None
+            state.rendition_cache.generate(img_data['path'], current_monitors[idx].width, current_monitors[idx].height, img)
+        except Exception as e:
+            logging.warning(f"Could not build display rendition for {img_data['path'].name}: {e}")
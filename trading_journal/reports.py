@@ -0,0 +1,162 @@
+"""Word reports for single events and for periods of the journal."""
+import io
+import json
+import logging
+import time
+import traceback
+from tkinter import messagebox
+from pathlib import Path
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from . import state
+from .archive import read_archived_file
+from .catalog import SCREENSHOT_NAME_RE, find_event_images
+from .config import get_base_path
+from .imaging import ENCODE_WORKERS, load_image_bgr
+from .lazy import lazy_import
+from .metrics import metrics
+from .renditions import shot_to_bgr
+
+cv2 = lazy_import("cv2")
+docx = lazy_import("docx")
+
+# ── Reports ───────────────────────────────────────────────────────────────────
+# Word reports are built on their own single-thread stage, after the event's
+# Telegram items are queued, and embed JPEG copies scaled to the size they are
+# printed at instead of the full-resolution screenshots. Consolidated reports
+# cover a date range (a day, a week) in one pass over the catalog, preparing
+# the next pictures in parallel while the document is written.
+REPORT_IMAGE_WIDTH_INCHES = 6
+REPORT_IMAGE_DPI = 200 # 1200 px wide pictures
+REPORT_JPEG_QUALITY = 80
+REPORT_PREFETCH_PICTURES = 8
+REPORTS_DIR_NAME = "Reports"
+report_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="report")
+
+def make_report_picture(image_path: Path, img=None) -> io.BytesIO:
+    """JPEG copy of a screenshot (or of `img`, its BGR pixels) scaled to the report's print width."""
+    if img is None:
+        img = load_image_bgr(image_path)
+        if img is None:
+            raise ValueError(f"Cannot decode {image_path}")
+    max_width = REPORT_IMAGE_WIDTH_INCHES * REPORT_IMAGE_DPI
+    height, width = img.shape[:2]
+    if width > max_width:
+        img = cv2.resize(img, (max_width, max(1, round(height * max_width / width))), interpolation=cv2.INTER_AREA)
+    ok, encoded = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, REPORT_JPEG_QUALITY])
+    if not ok:
+        raise ValueError(f"JPEG encoding failed for {image_path}")
+    buf = io.BytesIO(encoded.tobytes())
+    buf.name = image_path.with_suffix(".jpg").name
+    return buf
+
+def build_event_document(event: str, dynamic_description: str, saved_images: list, doc_path: Path):
+    doc = docx.Document()
+    doc.add_heading(f"{event} Event Report", level=1)
+    doc.add_paragraph(dynamic_description)
+    doc.add_paragraph("")
+    doc.add_paragraph("--- Start of Event Screenshots ---")
+    doc.add_page_break()
+    for img_data in saved_images:
+        doc.add_paragraph(f"--- {img_data['name_for_caption']} ---")
+        img = shot_to_bgr(img_data['shot']) if img_data.get('shot') is not None else None
+        doc.add_picture(make_report_picture(img_data['path'], img), width=docx.shared.Inches(REPORT_IMAGE_WIDTH_INCHES))
+        doc.add_page_break()
+    doc.add_paragraph("--- End of Event Screenshots ---")
+    doc.save(str(doc_path))
+    logging.info(f"Word document saved to {doc_path} ({doc_path.stat().st_size / 1e6:.1f} MB)")
+
+def build_event_report_task(event: str, dynamic_description: str, saved_images: list, doc_path: Path,
+                            event_id: str = None):
+    try:
+        with metrics.span(event_id, "docx_build", images=len(saved_images)):
+            build_event_document(event, dynamic_description, saved_images, doc_path)
+    except Exception:
+        logging.error("Error in build_event_report_task:\n" + traceback.format_exc())
+        state.after(0, lambda: messagebox.showerror("Error", "Failed to build the Word report.\nSee app.log for details."))
+
+def read_event_description(event_dir: Path, ts: str):
+    """The description saved in an event's capture info (loose or archived), or None."""
+    info_path = event_dir / f"Capture Info_{ts}.json"
+    try:
+        data = info_path.read_bytes()
+    except FileNotFoundError:
+        data = read_archived_file(info_path)
+    except OSError as e:
+        logging.warning(f"Report: cannot read {info_path}: {e}")
+        return None
+    if data is None:
+        logging.debug(f"Report: no capture info at {info_path}")
+        return None
+    try:
+        return json.loads(data).get("description")
+    except (ValueError, AttributeError) as e:
+        logging.warning(f"Report: invalid capture info {info_path}: {e}")
+        return None
+
+def build_period_report(day_from: str, day_to: str, instrument: str = None, event: str = None,
+                        out_path: Path = None) -> dict:
+    """One Word document with every cataloged event from day_from to day_to
+    (inclusive, YYYY-MM-DD), grouped by day. Returns report statistics."""
+    started = time.perf_counter()
+    events = state.journal_catalog.find_events(day_from, day_to, instrument, event, limit=1000000)
+    events.sort(key=lambda e: (e['day'], e['ts'], e['event']))
+    if out_path is None:
+        suffix = f" {instrument}" if instrument else ""
+        out_path = get_base_path() / REPORTS_DIR_NAME / f"Trading Journal {day_from} to {day_to}{suffix}.docx"
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+
+    doc = docx.Document()
+    doc.add_heading(f"Trading Journal {day_from} to {day_to}" + (f" - {instrument}" if instrument else ""), level=0)
+    entries = sum(1 for e in events if e['event'] == "Entry")
+    doc.add_paragraph(f"{len(events)} events: {entries} entries, {len(events) - entries} exits, "
+                      f"{len({e['day'] for e in events})} trading days.")
+
+    # (event, image path) in document order; pictures are prepared a few ahead on a small pool
+    jobs = [(e, path) for e in events for path in find_event_images(e['event_dir'], e['ts'])]
+    pending = deque()
+    next_job = 0
+    current_day = current_event = None
+    with ThreadPoolExecutor(max_workers=ENCODE_WORKERS, thread_name_prefix="report-picture") as pool:
+        while pending or next_job < len(jobs):
+            while next_job < len(jobs) and len(pending) < REPORT_PREFETCH_PICTURES:
+                pending.append((jobs[next_job], pool.submit(make_report_picture, jobs[next_job][1])))
+                next_job += 1
+            (e, path), future = pending.popleft()
+            if e['day'] != current_day:
+                if current_day is not None:
+                    doc.add_page_break()
+                doc.add_heading(e['day'], level=1)
+                current_day = e['day']
+            if e is not current_event:
+                doc.add_heading(f"{e['ts'].replace('-', ':')}  {e['instrument']}  {e['event']}", level=2)
+                description = read_event_description(e['event_dir'], e['ts'])
+                if description:
+                    doc.add_paragraph(description)
+                current_event = e
+            try:
+                picture = future.result()
+            except Exception as ex:
+                logging.warning(f"Report: skipping {path.name}: {ex}")
+                continue
+            name_match = SCREENSHOT_NAME_RE.match(path.name)
+            doc.add_paragraph(name_match.group('monitor') if name_match else path.stem)
+            doc.add_picture(picture, width=docx.shared.Inches(REPORT_IMAGE_WIDTH_INCHES))
+    doc.save(str(out_path))
+    stats = {"path": out_path, "events": len(events), "images": len(jobs),
+             "seconds": round(time.perf_counter() - started, 1), "bytes": out_path.stat().st_size}
+    logging.info(f"Period report saved to {out_path}: {stats['events']} events, {stats['images']} images, "
+                 f"{stats['bytes'] / 1e6:.1f} MB in {stats['seconds']} s.")
+    return stats
+
+def build_period_report_task(day_from: str, day_to: str, instrument: str = None, event: str = None):
+    try:
+        with metrics.span(None, "period_report", day_from=day_from, day_to=day_to):
+            stats = build_period_report(day_from, day_to, instrument, event)
+        state.after(0, lambda: messagebox.showinfo(
+            "Report Built", f"{stats['events']} events, {stats['images']} screenshots "
+                            f"({stats['bytes'] / 1e6:.1f} MB) in {stats['seconds']} s:\n{stats['path']}"))
+    except Exception:
+        logging.error("Error in build_period_report_task:\n" + traceback.format_exc())
+        state.after(0, lambda: messagebox.showerror("Error", "Failed to build the report.\nSee app.log for details."))
@@ -0,0 +1,58 @@
+"""Start-up of the capture, storage and Telegram pipeline, shared by the window and the headless daemon."""
+import threading
+from pathlib import Path
+
+from . import state
+from .archive import JournalArchive, archive_compaction_task
+from .capture import capture_service
+from .catalog import JournalCatalog, catalog_backfill_task
+from .clips import clip_recorder
+from .config import get_base_path, get_catalog_path, get_outbox_path
+from .lazy import lazy_import
+from .pretrigger import pretrigger_buffer
+from .renditions import RENDITION_CACHE_DIR_NAME, RenditionCache, rendition_executor
+from .store import FRAME_STORE_DIR_NAME, FrameStore, frame_store_gc_task
+from .telegram import TelegramOutbox, TelegramSender, upload_settings
+from .viewer import display_frame_cache
+
+screeninfo = lazy_import("screeninfo")
+
+
+def open_pipeline(cfg: dict):
+    """Opens the outbox, the catalog and the caches and creates the Telegram sender (not started yet)."""
+    state.telegram_outbox = TelegramOutbox(get_outbox_path())
+    state.journal_catalog = JournalCatalog(get_catalog_path(), get_base_path())
+    state.rendition_cache = RenditionCache(get_base_path() / RENDITION_CACHE_DIR_NAME / "renditions",
+                                           int(cfg.get("rendition_cache_max_mb")) * 1024 * 1024)
+    rendition_executor.submit(state.rendition_cache.set_layout, # After the cache's background indexing
+                              [(m.x, m.y, m.width, m.height) for m in screeninfo.get_monitors()])
+    display_frame_cache.max_bytes = int(cfg.get("viewer_cache_max_mb")) * 1024 * 1024
+    state.journal_archive = JournalArchive(get_base_path(), Path(cfg.get("archive_dir")) if cfg.get("archive_dir") else None,
+                                           cfg.get("archive_granularity"), cfg.get("archive_after_days"),
+                                           int(float(cfg.get("journal_budget_gb")) * 1024 ** 3),
+                                           int(float(cfg.get("archive_io_mb_per_s")) * 1024 ** 2))
+    state.frame_store = FrameStore(get_base_path() / FRAME_STORE_DIR_NAME, cfg.get("frame_dedupe"), cfg.get("frame_dedupe_tolerance"))
+    upload_settings.update(format=cfg.get("telegram_upload_format"), max_side=cfg.get("telegram_upload_max_side"),
+                           quality=cfg.get("telegram_upload_quality"))
+    state.telegram_sender = TelegramSender(state.telegram_outbox, cfg.get("telegram_send_workers"))
+
+def start_capture(cfg: dict, pretrigger_enabled: bool):
+    """Starts the capture workers and configures the pre-trigger buffer and clip recorder.
+    The caller selects the region profile (capture_service.set_region_profile)."""
+    capture_service.configure(cfg.get("capture_workers"), cfg.get("capture_queue_size"), cfg.get("capture_coalesce_ms"))
+    capture_service.start()
+    pretrigger_buffer.configure(cfg.get("pretrigger_fps"), cfg.get("pretrigger_seconds"), cfg.get("pretrigger_max_mb"),
+                                cfg.get("pretrigger_max_side"), cfg.get("pretrigger_jpeg_quality"))
+    if pretrigger_enabled:
+        pretrigger_buffer.start()
+    clip_recorder.configure(cfg.get("clip_enabled"), cfg.get("clip_pre_seconds"), cfg.get("clip_post_seconds"),
+                            cfg.get("clip_fps"), cfg.get("pretrigger_max_side"), cfg.get("pretrigger_jpeg_quality"),
+                            cfg.get("clip_send_telegram"))
+
+def start_background_tasks():
+    """Starts the Telegram sender, the catalog backfill, the frame store GC and the archive compaction."""
+    state.telegram_sender.start()
+    threading.Thread(target=catalog_backfill_task, name="catalog-backfill", daemon=True).start()
+    threading.Thread(target=frame_store_gc_task, name="frame-store-gc", daemon=True).start()
+    if state.journal_archive.enabled:
+        threading.Thread(target=archive_compaction_task, name="archive-compaction", daemon=True).start()
@@ -0,0 +1,21 @@
+"""Objects created at startup and shared by the pipeline modules.
+
+They are read through this module (state.root, state.frame_store, ...) so a
+module always sees the current object, also when a headless runner sets them.
+"""
+
+telegram_outbox = None # TelegramOutbox, opened by open_pipeline()
+telegram_sender = None # TelegramSender, created by open_pipeline()
+journal_catalog = None # JournalCatalog, opened by open_pipeline()
+rendition_cache = None # RenditionCache, opened by open_pipeline()
+frame_store = None # FrameStore, created by open_pipeline()
+journal_archive = None # JournalArchive, created by open_pipeline(); None reads loose files only
+root = None # Set by start_gui(); stays None in the headless daemon
+app = None
+
+def after(ms: int, func, *args):
+    """root.after() for pipeline threads. Without a GUI (headless daemon) the
+    callback is dropped: it only updates a widget or shows a dialog about
+    something the caller has already logged."""
+    if root is not None:
+        root.after(ms, func, *args)
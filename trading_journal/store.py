@@ -0,0 +1,150 @@
+"""Content-addressed store that deduplicates identical and near-identical frames."""
+import os
+import uuid
+import hashlib
+import logging
+import threading
+import time
+import traceback
+from pathlib import Path
+
+from . import state
+from .lazy import lazy_import
+
+cv2 = lazy_import("cv2")
+np = lazy_import("numpy")
+
+# ── Content-Addressed Frame Store ─────────────────────────────────────────────
+# Monitors that barely change between captures (news, DOM, reference charts)
+# are encoded and stored once. Every grabbed frame gets an exact content hash
+# (blake2b of its pixels). A frame identical to a stored one is not encoded
+# again: the event's file is hardlinked to the object under BASE_DIR/.store
+# (or copied where hardlinks are unsupported), and Telegram resends the
+# object's cached file_id instead of uploading it. The opt-in "near" mode also
+# reuses the previous frame of the same monitor when no pixel differs from it
+# by more than frame_dedupe_tolerance in any channel. A coarse block hash (mean
+# grey level of a FRAME_BLOCK_GRID grid) rejects clearly different frames
+# cheaply, but never decides a match on its own: a changed price or P&L digit
+# barely moves a block's mean.
+FRAME_STORE_DIR_NAME = ".store"
+FRAME_BLOCK_GRID = (64, 36)  # (columns, rows); ~60 px blocks on a 4K monitor
+FRAME_DEDUPE_MODES = ("off", "exact", "near")
+FRAME_STORE_ORPHAN_AGE_SECONDS = 86400
+
+
+class FrameStore:
+    def __init__(self, store_dir: Path, mode: str = "exact", tolerance: int = 2):
+        self.store_dir = store_dir
+        self.mode = mode if mode in FRAME_DEDUPE_MODES else "exact"
+        self.tolerance = int(tolerance)
+        self.lock = threading.Lock()
+        self.last_frames = {}  # monitor key -> ((block hash, pixels), object path, content key)
+        self.stats = {"frames": 0, "exact": 0, "near": 0, "bytes_saved": 0, "encode_ms_saved": 0.0}
+        self.encode_ms = {}  # object path -> encode time, to estimate the time saved by a hit
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def content_hash(rgb: bytes) -> str:
+        return hashlib.blake2b(rgb, digest_size=20).hexdigest()
+
+    @staticmethod
+    def block_hash(rgb: bytes, size: tuple):
+        pixels = np.frombuffer(rgb, dtype=np.uint8).reshape(size[1], size[0], 3)
+        blocks = cv2.resize(pixels, FRAME_BLOCK_GRID, interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(blocks, cv2.COLOR_RGB2GRAY).astype(np.int16)
+
+    def object_path(self, digest: str, ext: str) -> Path:
+        return self.store_dir / digest[:2] / f"{digest}{ext}"
+
+    def is_near(self, signature, previous_signature) -> bool:
+        """True if no pixel of the two frames differs by more than the tolerance."""
+        (blocks, rgb), (previous_blocks, previous_rgb) = signature, previous_signature
+        if previous_blocks.shape != blocks.shape or len(previous_rgb) != len(rgb):
+            return False
+        if int(np.abs(previous_blocks - blocks).max()) > self.tolerance: # A pixel moved further than any block mean
+            return False
+        return int(cv2.absdiff(np.frombuffer(previous_rgb, dtype=np.uint8), np.frombuffer(rgb, dtype=np.uint8)).max()) \
+            <= self.tolerance
+
+    def find(self, monitor_key, rgb: bytes, size: tuple, ext: str):
+        """Returns (kind, object path, content key, signature) where kind is
+        'exact', 'near' or None (no stored frame to reuse). The signature
+        (near mode only) goes back to remember()."""
+        digest = self.content_hash(rgb)
+        signature = (self.block_hash(rgb, size), rgb) if self.mode == "near" else None
+        object_path = self.object_path(digest, ext)
+        if object_path.exists():
+            return "exact", object_path, f"frame:{digest}", signature
+        if signature is not None:
+            with self.lock:
+                previous = self.last_frames.get(monitor_key)
+            if previous is not None and previous[1].exists() and previous[1].suffix == ext \
+                    and self.is_near(signature, previous[0]):
+                return "near", previous[1], previous[2], previous[0] # Compare later frames with the stored one
+        return None, object_path, f"frame:{digest}", signature
+
+    def put(self, object_path: Path, encoded: bytes, encode_ms: float):
+        object_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = object_path.with_name(f"{object_path.name}.{uuid.uuid4().hex}.tmp")
+        tmp_path.write_bytes(encoded)
+        os.replace(tmp_path, object_path)
+        with self.lock:
+            self.encode_ms[str(object_path)] = encode_ms
+
+    def remember(self, monitor_key, signature, object_path: Path, content_key: str):
+        if signature is not None:
+            with self.lock:
+                self.last_frames[monitor_key] = (signature, object_path, content_key)
+
+    def record_hit(self, kind: str, object_path: Path):
+        with self.lock:
+            self.stats["frames"] += 1
+            self.stats[kind] += 1
+            self.stats["bytes_saved"] += object_path.stat().st_size
+            self.stats["encode_ms_saved"] += self.encode_ms.get(str(object_path), 0.0)
+
+    def record_miss(self):
+        with self.lock:
+            self.stats["frames"] += 1
+
+    @staticmethod
+    def link(object_path: Path, img_path: Path):
+        """Places a stored object at img_path: a hardlink where the filesystem
+        supports it, a plain copy otherwise."""
+        try:
+            os.link(object_path, img_path)
+            return "hardlink"
+        except OSError:
+            img_path.write_bytes(object_path.read_bytes())
+            return "copy"
+
+    def collect_garbage(self) -> int:
+        """Deletes objects no event file links to any more (link count 1) that are older than a day."""
+        removed = 0
+        cutoff = time.time() - FRAME_STORE_ORPHAN_AGE_SECONDS
+        for object_path in self.store_dir.glob("*/*"):
+            try:
+                st = object_path.stat()
+                if st.st_nlink <= 1 and st.st_mtime < cutoff:
+                    object_path.unlink()
+                    removed += 1
+            except OSError:
+                continue
+        return removed
+
+    def summary_text(self) -> str:
+        with self.lock:
+            stats = dict(self.stats)
+        if not stats["frames"]:
+            return "Frame store: no frames captured yet."
+        return (f"Frame store ({self.mode}): {stats['exact'] + stats['near']}/{stats['frames']} frames reused "
+                f"({stats['exact']} exact, {stats['near']} near), {stats['bytes_saved'] / 1e6:.1f} MB and "
+                f"{stats['encode_ms_saved'] / 1000:.1f} s of encoding saved this session.")
+
+def frame_store_gc_task():
+    try:
+        removed = state.frame_store.collect_garbage()
+        if removed:
+            logging.info(f"Frame store: removed {removed} unreferenced object(s).")
+    except Exception:
+        logging.error("Error in frame_store_gc_task:\n" + traceback.format_exc())
@@ -0,0 +1,711 @@
+"""Telegram delivery: upload copies, the persistent outbox, rate limiting and the sender."""
+from __future__ import annotations
+
+import io
+import json
+import os
+import logging
+import random
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+from tkinter import messagebox
+from pathlib import Path
+from contextlib import ExitStack
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+from . import logs, state
+from .lazy import lazy_import
+from .logs import trim_payload
+from .metrics import metrics
+
+requests = lazy_import("requests")
+Image = lazy_import("PIL.Image")
+
+# ── IMPORTANT: CENTRALIZED BOT TOKEN ──────────────────────────────────────────
+# REPLACE THIS WITH YOUR ACTUAL TELEGRAM BOT TOKEN.
+# THIS TOKEN IS HARDCODED AND NOT SAVED IN config.json FOR SECURITY REASONS.
+TELEGRAM_BOT_TOKEN = "8070792966:AAEyKF3g2SUNntmDJIctc8InyprORYOj4xg" 
+# ──────────────────────────────────────────────────────────────────────────────
+
+# ── Telegram Queue Worker ─────────────────────────────────────────────────────
+TELEGRAM_API_BASE = "https://api.telegram.org"
+TELEGRAM_ALBUM_MAX_PHOTOS = 10 # sendMediaGroup accepts 2-10 items
+TELEGRAM_CAPTION_MAX_CHARS = 1024
+
+telegram_delivery_times = deque(maxlen=200) # Seconds from capture to delivered, per event
+
+def create_telegram_session() -> requests.Session:
+    """One keep-alive session for the worker so every request after the first
+    reuses the pooled TLS connection to the Bot API."""
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=4, max_retries=0)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+def parse_chat_ids(chat_ids: str) -> list:
+    """'-100123, -100456' -> ['-100123', '-100456']; the first chat is the primary one."""
+    return [c.strip() for c in str(chat_ids or "").split(",") if c.strip()]
+
+def has_deliverable_chat(chat_ids: str) -> bool:
+    """True if at least one of the chats can still be sent to (set, not disabled, sender running)."""
+    sender = state.telegram_sender
+    if sender is not None and sender.stopped:
+        return False
+    return any(sender is None or chat_id not in sender.disabled_chats for chat_id in parse_chat_ids(chat_ids))
+
+def get_photo_key(photo_data: dict) -> str:
+    """Key under which a photo's Telegram file_id is cached: the content hash of
+    deduplicated frames (so identical frames of different events share one
+    upload), otherwise the image path."""
+    return photo_data.get('content_key') or str(photo_data['image_path'])
+
+def post_telegram_album(session: requests.Session, token: str, chat_id: str, photos: list, caption: str,
+                        file_ids: dict = None, timeout: int = 60) -> tuple:
+    """Sends up to TELEGRAM_ALBUM_MAX_PHOTOS photos as one album. `caption` (the
+    event description) goes on the first photo, each photo's own caption on the
+    others. A single photo is sent with sendPhoto since albums need two.
+
+    Photos whose key (get_photo_key) is in `file_ids` are sent by Telegram
+    file_id instead of being uploaded again. Returns (response, {photo key: uploaded bytes})."""
+    file_ids = file_ids or {}
+    uploaded_sizes = {}
+    with ExitStack() as stack:
+        files = {}
+        media = []
+        for i, photo_data in enumerate(photos):
+            file_id = file_ids.get(get_photo_key(photo_data))
+            if file_id:
+                entry = {'type': 'photo', 'media': file_id}
+            else:
+                photo_file = stack.enter_context(get_upload_picture(photo_data['image_path']))
+                uploaded_sizes[get_photo_key(photo_data)] = len(photo_file.getbuffer())
+                attach_name = f"photo{i}"
+                files[attach_name] = (photo_file.name, photo_file)
+                entry = {'type': 'photo', 'media': f"attach://{attach_name}"}
+            if i == 0 and caption:
+                entry['caption'] = caption[:TELEGRAM_CAPTION_MAX_CHARS]
+                entry['parse_mode'] = 'Markdown'
+            elif photo_data.get('caption'):
+                entry['caption'] = photo_data['caption'][:TELEGRAM_CAPTION_MAX_CHARS]
+            media.append(entry)
+
+        if len(photos) == 1:
+            data = {'chat_id': chat_id, 'caption': media[0].get('caption', "")}
+            if 'parse_mode' in media[0]:
+                data['parse_mode'] = media[0]['parse_mode']
+            if 'photo0' in files:
+                response = session.post(f"{TELEGRAM_API_BASE}/bot{token}/sendPhoto",
+                                        files={'photo': files['photo0']}, data=data, timeout=timeout)
+            else:
+                data['photo'] = media[0]['media']
+                response = session.post(f"{TELEGRAM_API_BASE}/bot{token}/sendPhoto", data=data, timeout=timeout)
+        else:
+            response = session.post(f"{TELEGRAM_API_BASE}/bot{token}/sendMediaGroup",
+                                    files=files or None, data={'chat_id': chat_id, 'media': json.dumps(media)}, timeout=timeout)
+    return response, uploaded_sizes
+
+def extract_file_ids(photos: list, result) -> dict:
+    """Maps each sent photo's key to the file_id of its largest size from a
+    sendPhoto (one message) or sendMediaGroup (list of messages) result."""
+    messages = result if isinstance(result, list) else [result]
+    file_ids = {}
+    for photo_data, message in zip(photos, messages):
+        sizes = message.get('photo') if isinstance(message, dict) else None
+        if sizes:
+            file_ids[get_photo_key(photo_data)] = sizes[-1]['file_id']
+    return file_ids
+
+# ── Telegram Outbox ───────────────────────────────────────────────────────────
+class TelegramOutbox:
+    """Durable queue of pending Telegram items in a SQLite file next to
+    config.json. Items survive crashes and restarts and are only removed once
+    Telegram confirmed them (or they failed permanently), so the worker simply
+    resumes where it stopped. Photo items reference the screenshots on disk."""
+
+    SENT_RETENTION_DAYS = 7
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.conn = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                chat_id TEXT NOT NULL,
+                item_type TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at REAL NOT NULL DEFAULT 0,
+                created_at REAL NOT NULL,
+                finished_at REAL,
+                last_error TEXT,
+                group_key TEXT,
+                depends_on INTEGER
+            )""")
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(outbox)")]
+        for column, decl in (("group_key", "TEXT"), ("depends_on", "INTEGER")):
+            if column not in columns: # Outbox written by an older version
+                self.conn.execute(f"ALTER TABLE outbox ADD COLUMN {column} {decl}")
+        self.conn.execute("UPDATE outbox SET group_key = 'item:' || id WHERE group_key IS NULL")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS outbox_due ON outbox (status, next_attempt_at)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS outbox_group ON outbox (group_key, status, id)")
+        # Telegram file_id of every uploaded screenshot, so other chats can get
+        # the same photo without uploading it again.
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS file_ids (
+                image_path TEXT PRIMARY KEY,
+                file_id TEXT NOT NULL,
+                upload_bytes INTEGER NOT NULL DEFAULT 0,
+                created_at REAL NOT NULL
+            )""")
+        self.conn.execute("DELETE FROM outbox WHERE status != 'pending' AND finished_at < ?",
+                          (time.time() - self.SENT_RETENTION_DAYS * 86400,))
+        self.conn.execute("DELETE FROM file_ids WHERE created_at < ?", (time.time() - self.SENT_RETENTION_DAYS * 86400,))
+        pending = self.pending_count()
+        if pending:
+            logging.info(f"Telegram outbox: resuming {pending} pending item(s) from {path}")
+
+    @staticmethod
+    def _encode_payload(item: dict) -> str:
+        return json.dumps(item, ensure_ascii=False, default=str)
+
+    @staticmethod
+    def _decode_payload(payload: str) -> dict:
+        item = json.loads(payload)
+        if 'image_path' in item:
+            item['image_path'] = Path(item['image_path'])
+        if 'video_path' in item:
+            item['video_path'] = Path(item['video_path'])
+        for photo_data in item.get('photos', []):
+            photo_data['image_path'] = Path(photo_data['image_path'])
+        return item
+
+    def put(self, item: dict) -> int:
+        """Items with the same 'event_id' and chat are delivered strictly in the
+        order they were put; items without one are independent. An item with
+        'depends_on' (an outbox id) waits until that item is sent or failed."""
+        if item.get('event_id'):
+            group_key = f"{item['event_id']}|{item['chat_id']}"
+        else:
+            group_key = f"item:{uuid.uuid4().hex}"
+        with self.lock:
+            cur = self.conn.execute(
+                "INSERT INTO outbox (chat_id, item_type, payload, created_at, group_key, depends_on) VALUES (?, ?, ?, ?, ?, ?)",
+                (item['chat_id'], item['type'], self._encode_payload(item), item.get('enqueued_at', time.time()), group_key,
+                 item.get('depends_on')))
+        self.wakeup.set()
+        return cur.lastrowid
+
+    def due_heads(self, exclude_groups=(), limit: int = 50) -> list:
+        """Returns (id, item, attempts, group_key) for due items that are the
+        oldest pending item of their group, oldest first. Groups in
+        `exclude_groups` (already being sent) are skipped."""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT o.id, o.payload, o.attempts, o.group_key FROM outbox o "
+                "WHERE o.status = 'pending' AND o.next_attempt_at <= ? AND o.id = "
+                "(SELECT MIN(h.id) FROM outbox h WHERE h.group_key = o.group_key AND h.status = 'pending') "
+                "AND (o.depends_on IS NULL OR NOT EXISTS "
+                "(SELECT 1 FROM outbox d WHERE d.id = o.depends_on AND d.status = 'pending')) "
+                "ORDER BY o.id LIMIT ?", (time.time(), limit + len(exclude_groups))).fetchall()
+        return [(row[0], self._decode_payload(row[1]), row[2], row[3]) for row in rows
+                if row[3] not in exclude_groups][:limit]
+
+    def seconds_until_next_due(self):
+        """Seconds until the next item in backoff becomes due, or None."""
+        with self.lock:
+            row = self.conn.execute("SELECT MIN(next_attempt_at) FROM outbox WHERE status = 'pending' AND next_attempt_at > ?",
+                                    (time.time(),)).fetchone()
+        if row[0] is None:
+            return None
+        return max(0.0, row[0] - time.time())
+
+    def mark_sent(self, item_id: int):
+        with self.lock:
+            self.conn.execute("UPDATE outbox SET status = 'sent', attempts = attempts + 1, finished_at = ?, "
+                              "last_error = NULL WHERE id = ?", (time.time(), item_id))
+
+    def mark_retry(self, item_id: int, error: str, delay_seconds: float):
+        with self.lock:
+            self.conn.execute("UPDATE outbox SET attempts = attempts + 1, next_attempt_at = ?, last_error = ? "
+                              "WHERE id = ?", (time.time() + delay_seconds, error, item_id))
+
+    def mark_failed(self, item_id: int, error: str):
+        with self.lock:
+            self.conn.execute("UPDATE outbox SET status = 'failed', attempts = attempts + 1, finished_at = ?, "
+                              "last_error = ? WHERE id = ?", (time.time(), error, item_id))
+
+    def fail_chat(self, chat_id: str, error: str) -> int:
+        """Marks every pending item for `chat_id` as failed. Returns how many."""
+        with self.lock:
+            cur = self.conn.execute("UPDATE outbox SET status = 'failed', finished_at = ?, last_error = ? "
+                                    "WHERE status = 'pending' AND chat_id = ?", (time.time(), error, chat_id))
+        return cur.rowcount
+
+    def release_backoff(self) -> int:
+        """Makes every pending item due now. Used once the connection is back so
+        the backlog built up while offline is flushed in one go."""
+        with self.lock:
+            cur = self.conn.execute("UPDATE outbox SET next_attempt_at = 0 WHERE status = 'pending' AND next_attempt_at > ?",
+                                    (time.time(),))
+        return cur.rowcount
+
+    def get_file_ids(self, image_paths: list) -> dict:
+        """Returns {photo key: (file_id, upload_bytes)} for the known photo keys
+        (image paths, or content keys of deduplicated frames)."""
+        keys = [str(p) for p in image_paths]
+        if not keys:
+            return {}
+        with self.lock:
+            rows = self.conn.execute(
+                f"SELECT image_path, file_id, upload_bytes FROM file_ids WHERE image_path IN ({','.join('?' * len(keys))})",
+                keys).fetchall()
+        return {row[0]: (row[1], row[2]) for row in rows}
+
+    def store_file_ids(self, file_ids: dict, uploaded_sizes: dict):
+        now = time.time()
+        with self.lock:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO file_ids (image_path, file_id, upload_bytes, created_at) VALUES (?, ?, ?, ?)",
+                [(path, file_id, uploaded_sizes.get(path, 0), now) for path, file_id in file_ids.items()])
+
+    def references(self, directory: Path) -> bool:
+        """True if a pending item still points at a file below `directory`."""
+        needle = json.dumps(str(directory) + os.sep, ensure_ascii=False)[1:-1] # As it appears inside the JSON payload
+        with self.lock:
+            return self.conn.execute("SELECT 1 FROM outbox WHERE status = 'pending' AND instr(payload, ?) > 0 LIMIT 1",
+                                     (needle,)).fetchone() is not None
+
+    def pending_count(self) -> int:
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM outbox WHERE status = 'pending'").fetchone()[0]
+
+    def wait(self, timeout):
+        self.wakeup.wait(timeout)
+        self.wakeup.clear()
+
+    def notify(self):
+        self.wakeup.set()
+
+# ── Telegram Rate Limiting ────────────────────────────────────────────────────
+# Telegram allows roughly 1 message/s in a private chat, 20 messages/minute in
+# a group or channel and about 30 messages/s per bot overall. An album counts
+# as one message per photo.
+TELEGRAM_GLOBAL_RATE = (30, 1.0) # (messages, per seconds)
+TELEGRAM_PRIVATE_CHAT_RATE = (1, 1.0)
+TELEGRAM_GROUP_CHAT_RATE = (20, 60.0)
+
+class TokenBucket:
+    def __init__(self, capacity: float, per_seconds: float):
+        self.capacity = capacity
+        self.refill_per_second = capacity / per_seconds
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self.blocked_until = 0.0 # Set from a 429's retry_after
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.refill_per_second)
+        self.updated_at = now
+
+    def wait_time(self, cost: float) -> float:
+        """Seconds until `cost` tokens are available (0 if they are now)."""
+        now = time.monotonic()
+        self._refill(now)
+        cost = min(cost, self.capacity) # Larger requests only have to wait for a full bucket
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        if self.tokens >= cost:
+            return 0.0
+        return (cost - self.tokens) / self.refill_per_second
+
+    def consume(self, cost: float):
+        self.tokens -= min(cost, self.capacity)
+
+    def block_for(self, seconds: float):
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+class TelegramRateLimiter:
+    """One token bucket per chat plus one for the whole bot."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.global_bucket = TokenBucket(*TELEGRAM_GLOBAL_RATE)
+        self.chat_buckets = {}
+
+    def _chat_bucket(self, chat_id: str) -> TokenBucket:
+        if chat_id not in self.chat_buckets:
+            # Group, supergroup and channel IDs are negative; private chats are positive.
+            rate = TELEGRAM_GROUP_CHAT_RATE if str(chat_id).startswith("-") else TELEGRAM_PRIVATE_CHAT_RATE
+            self.chat_buckets[chat_id] = TokenBucket(*rate)
+        return self.chat_buckets[chat_id]
+
+    def try_acquire(self, chat_id: str, cost: float) -> float:
+        """Takes the tokens and returns 0, or returns the seconds to wait."""
+        with self.lock:
+            chat_bucket = self._chat_bucket(chat_id)
+            wait_seconds = max(chat_bucket.wait_time(cost), self.global_bucket.wait_time(cost))
+            if wait_seconds == 0:
+                chat_bucket.consume(cost)
+                self.global_bucket.consume(cost)
+            return wait_seconds
+
+    def block_chat(self, chat_id: str, seconds: float):
+        with self.lock:
+            self._chat_bucket(chat_id).block_for(seconds)
+
+def get_telegram_item_cost(item: dict) -> int:
+    return len(item['photos']) if item.get('type') == 'album' else 1
+
+# ── Telegram Sender ───────────────────────────────────────────────────────────
+TELEGRAM_MAX_API_ERROR_ATTEMPTS = 3 # Rejected by the API (not network errors): give up after this many
+TELEGRAM_BACKOFF_BASE_SECONDS = 2
+TELEGRAM_BACKOFF_MAX_SECONDS = 300
+TELEGRAM_IDLE_POLL_SECONDS = 30
+TELEGRAM_TOKEN_ERRORS = ("Unauthorized",) # The bot token itself is rejected: nothing can be sent
+TELEGRAM_CHAT_ERRORS = ("Bad Request: chat not found", "bot was blocked by the user", "bot was kicked",
+                        "user is deactivated") # Only this chat is unreachable
+
+class TelegramApiError(Exception):
+    def __init__(self, description: str, retry_after: float = None):
+        super().__init__(description)
+        self.retry_after = retry_after
+
+def get_backoff_seconds(attempt: int) -> float:
+    """Exponential backoff with jitter: somewhere in the upper half of
+    base * 2^(attempt - 1), capped, so retries of many items spread out."""
+    delay = min(TELEGRAM_BACKOFF_MAX_SECONDS, TELEGRAM_BACKOFF_BASE_SECONDS * 2 ** (attempt - 1))
+    return random.uniform(delay / 2, delay)
+
+def send_telegram_item(session: requests.Session, token: str, chat_id: str, item: dict,
+                       file_ids: dict = None) -> tuple:
+    """Returns (response, {image path: uploaded bytes})."""
+    item_type = item.get('type')
+    if item_type == 'message':
+        message = item['message']
+        url = f"{TELEGRAM_API_BASE}/bot{token}/sendMessage"
+        data = {'chat_id': chat_id, 'text': message, 'parse_mode': 'Markdown'}
+        logging.debug(f"Worker: Sending text message: '{message[:50]}...'")
+        return session.post(url, data=data, timeout=10), {}
+    if item_type == 'photo':
+        logging.debug(f"Worker: Sending photo {item['image_path'].name} with caption '{item['caption']}'")
+        return post_telegram_album(session, token, chat_id, [item], "", file_ids, timeout=30)
+    if item_type == 'album':
+        photos = item['photos']
+        logging.debug(f"Worker: Sending album of {len(photos)} photos ({len(file_ids or {})} by file_id)")
+        return post_telegram_album(session, token, chat_id, photos, item.get('caption', ""), file_ids)
+    if item_type == 'video':
+        video_path = item['video_path']
+        logging.debug(f"Worker: Sending video {video_path.name} ({video_path.stat().st_size / 1e6:.1f} MB)")
+        data = {'chat_id': chat_id, 'caption': item.get('caption', "")[:TELEGRAM_CAPTION_MAX_CHARS], 'supports_streaming': True}
+        with open(video_path, "rb") as video_file:
+            return session.post(f"{TELEGRAM_API_BASE}/bot{token}/sendVideo",
+                                files={'video': (video_path.name, video_file)}, data=data, timeout=120), \
+                   {str(video_path): video_path.stat().st_size}
+    raise ValueError(f"Unknown item type in outbox: {item_type}")
+
+def get_item_photos(item: dict) -> list:
+    if item.get('type') == 'album':
+        return item['photos']
+    if item.get('type') == 'photo':
+        return [item]
+    return []
+
+class TelegramSender:
+    """Sends outbox items on a small thread pool.
+
+    A dispatcher thread hands out the oldest due item of each event group, so
+    different events upload concurrently while the items of one event keep
+    their order. Every send first takes tokens from the per-chat and global
+    buckets. A 429 blocks that chat for its retry_after, and other failures are
+    rescheduled in the outbox with exponential backoff and jitter, so a slow
+    upload or a backoff never holds up unrelated events. A chat that cannot be
+    reached (not found, bot blocked) is skipped for the rest of the session;
+    only a rejected bot token stops the sender."""
+
+    def __init__(self, outbox: TelegramOutbox, workers: int = 3):
+        self.outbox = outbox
+        self.workers = max(1, int(workers))
+        self.limiter = TelegramRateLimiter()
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="telegram")
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.in_flight_groups = set()
+        self.failing = False # True while the last attempt failed for network reasons
+        self.stopped = False
+        self.disabled_chats = {} # chat_id -> Telegram error that made the chat unreachable
+        self.reused_photo_count = 0
+        self.reused_bytes = 0
+        self.thread = None
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._dispatch_loop, name="telegram-dispatcher", daemon=True)
+            self.thread.start()
+
+    def _session(self) -> requests.Session:
+        # requests.Session is not thread-safe; every sender thread keeps its own pooled session.
+        if not hasattr(self.local, 'session'):
+            self.local.session = create_telegram_session()
+        return self.local.session
+
+    def _dispatch_loop(self):
+        logging.info(f"Telegram sender started with {self.workers} concurrent upload(s).")
+        while not self.stopped:
+            try:
+                wait_seconds = TELEGRAM_IDLE_POLL_SECONDS
+                with self.lock:
+                    free_slots = self.workers - len(self.in_flight_groups)
+                    busy_groups = set(self.in_flight_groups)
+                if free_slots > 0:
+                    for item_id, item, attempts, group_key in self.outbox.due_heads(busy_groups):
+                        if free_slots == 0:
+                            break
+                        if item['chat_id'] in self.disabled_chats:
+                            self.outbox.mark_failed(item_id, f"Chat disabled: {self.disabled_chats[item['chat_id']]}")
+                            continue
+                        rate_wait = self.limiter.try_acquire(item['chat_id'], get_telegram_item_cost(item))
+                        if rate_wait > 0:
+                            wait_seconds = min(wait_seconds, rate_wait)
+                            continue
+                        with self.lock:
+                            self.in_flight_groups.add(group_key)
+                        free_slots -= 1
+                        if attempts == 0 and item.get('enqueued_at'):
+                            metrics.record(item.get('event_id'), "queue_wait", (time.time() - item['enqueued_at']) * 1000,
+                                           chat_id=item['chat_id'], item_type=item.get('type'))
+                        self.executor.submit(self._send_one, item_id, item, attempts, group_key)
+                next_due = self.outbox.seconds_until_next_due()
+                if next_due is not None:
+                    wait_seconds = min(wait_seconds, next_due)
+                self.outbox.wait(max(wait_seconds, 0.05))
+            except Exception:
+                logging.error("Telegram dispatcher: unhandled error:\n" + traceback.format_exc())
+                time.sleep(1)
+        logging.critical("Telegram sender stopped.")
+
+    def _send_one(self, item_id: int, item: dict, attempts: int, group_key: str):
+        try:
+            self._attempt(item_id, item, attempts + 1)
+        except Exception:
+            logging.error(f"Worker: Unhandled exception sending outbox item {item_id}:\n" + traceback.format_exc())
+            self.outbox.mark_retry(item_id, "unhandled exception", get_backoff_seconds(attempts + 1))
+        finally:
+            with self.lock:
+                self.in_flight_groups.discard(group_key)
+            self.outbox.notify()
+
+    def _attempt(self, item_id: int, item: dict, attempt: int):
+        item_type = item.get('type')
+        current_token = TELEGRAM_BOT_TOKEN
+        current_chat_id = item.get('chat_id')
+
+        if not current_token or current_token == "YOUR_TELEGRAM_BOT_TOKEN_HERE":
+            logging.error("Telegram Worker: Bot Token is not configured. Cannot send any messages/photos.")
+            self.outbox.mark_retry(item_id, "Bot token not configured", TELEGRAM_IDLE_POLL_SECONDS)
+            return
+
+        photos = get_item_photos(item)
+        known_file_ids = self.outbox.get_file_ids([get_photo_key(photo_data) for photo_data in photos])
+        attempt_started = time.perf_counter()
+        attempt_fields = {"attempt": attempt, "chat_id": current_chat_id, "item_type": item_type, "status": "error"}
+        try:
+            try:
+                response, uploaded_sizes = send_telegram_item(self._session(), current_token, current_chat_id, item,
+                                                              {path: file_id for path, (file_id, _) in known_file_ids.items()})
+                attempt_fields.update(status="ok" if response.ok else "error", http_status=response.status_code,
+                                      bytes=sum(uploaded_sizes.values()))
+            finally:
+                metrics.record(item.get('event_id'), "upload_attempt", (time.perf_counter() - attempt_started) * 1000,
+                               **attempt_fields)
+
+            if logs.verbose_payload_logging:
+                logging.debug(f"Worker: Telegram API response {response.status_code}: {trim_payload(response.text)}")
+
+            try:
+                result = response.json()
+            except ValueError:
+                response.raise_for_status()
+                raise
+            if not result.get("ok"):
+                retry_after = (result.get('parameters') or {}).get('retry_after')
+                raise TelegramApiError(result.get('description', f'Unknown API error (HTTP {response.status_code})'), retry_after)
+
+            self.outbox.mark_sent(item_id)
+            logging.info(f"Worker: {item_type.capitalize()} sent successfully to Telegram on attempt {attempt}.")
+            if photos:
+                new_file_ids = {path: file_id for path, file_id in extract_file_ids(photos, result.get('result')).items()
+                                if path in uploaded_sizes}
+                self.outbox.store_file_ids(new_file_ids, uploaded_sizes)
+                if known_file_ids:
+                    saved = sum(upload_bytes for _, upload_bytes in known_file_ids.values())
+                    with self.lock:
+                        self.reused_photo_count += len(known_file_ids)
+                        self.reused_bytes += saved
+                    logging.info(f"Worker: Reused {len(known_file_ids)} file_id(s) for chat {current_chat_id}, "
+                                 f"skipped {saved / 1e6:.2f} MB of uploads ({self.reused_bytes / 1e6:.1f} MB saved this session).")
+                for photo_data in photos:
+                    discard_upload_derivative(photo_data['image_path'])
+            if item.get('captured_at') is not None:
+                delivered_in = time.time() - item['captured_at']
+                telegram_delivery_times.append(delivered_in)
+                metrics.record(item.get('event_id'), "capture_to_delivered", delivered_in * 1000, chat_id=current_chat_id)
+                logging.info(f"Worker: Event delivered {delivered_in:.2f} s after capture "
+                             f"({time.time() - item['enqueued_at']:.2f} s after enqueue).")
+            if self.failing:
+                self.failing = False
+                released = self.outbox.release_backoff()
+                logging.info(f"Worker: Connection restored, flushing backlog ({self.outbox.pending_count()} pending, {released} released from backoff).")
+
+        except TelegramApiError as e:
+            error_desc = str(e)
+            if e.retry_after is not None:
+                # Rate limited: not the item's fault, so it does not count towards giving up.
+                logging.warning(f"Worker: Rate limited by Telegram for chat {current_chat_id}, retrying after {e.retry_after} s.")
+                self.limiter.block_chat(current_chat_id, e.retry_after)
+                self.outbox.mark_retry(item_id, error_desc, e.retry_after)
+                return
+            logging.error(f"Worker: Failed to send {item_type} (attempt {attempt}): {error_desc}")
+            if any(fatal in error_desc for fatal in TELEGRAM_TOKEN_ERRORS):
+                self.outbox.mark_failed(item_id, error_desc)
+                self.stopped = True
+                logging.critical("Worker: Fatal Telegram API error. Check the Bot Token. Stopping the sender for this error.")
+                state.after(0, lambda: messagebox.showerror("Telegram Error", f"Fatal Telegram API Error: {error_desc}. Please check your Bot Token carefully."))
+                return
+            if any(fatal in error_desc for fatal in TELEGRAM_CHAT_ERRORS):
+                self.outbox.mark_failed(item_id, error_desc)
+                self.disable_chat(current_chat_id, error_desc)
+                return
+            if attempt < TELEGRAM_MAX_API_ERROR_ATTEMPTS:
+                delay = get_backoff_seconds(attempt)
+                logging.info(f"Worker: Retrying {item_type} in {delay:.1f} seconds due to API error...")
+                self.outbox.mark_retry(item_id, error_desc, delay)
+            else:
+                logging.error(f"Worker: Max retries ({TELEGRAM_MAX_API_ERROR_ATTEMPTS}) reached for {item_type} with API error: {error_desc}. Giving up.")
+                self.outbox.mark_failed(item_id, error_desc)
+        except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+            # Network trouble: keep the item and retry until the connection is back.
+            self.failing = True
+            delay = get_backoff_seconds(attempt)
+            logging.error(f"Worker: Network error for {item_type} (Attempt {attempt}): {e}. "
+                          f"Retrying in {delay:.1f} seconds, {self.outbox.pending_count()} item(s) waiting.")
+            self.outbox.mark_retry(item_id, str(e), delay)
+        except requests.exceptions.RequestException as e:
+            logging.error(f"Worker: General Request error sending {item_type} (Attempt {attempt}): {e}")
+            if attempt < TELEGRAM_MAX_API_ERROR_ATTEMPTS:
+                self.outbox.mark_retry(item_id, str(e), get_backoff_seconds(attempt))
+            else:
+                logging.error(f"Worker: General Request error for {item_type} after {attempt} attempts. Giving up.")
+                self.outbox.mark_failed(item_id, str(e))
+        except (OSError, ValueError) as e:
+            # Missing/unreadable screenshot or malformed item: retrying cannot help.
+            logging.error(f"Worker: Cannot send {item_type} item {item_id}: {e}. Dropping it from the outbox.")
+            self.outbox.mark_failed(item_id, str(e))
+
+    def disable_chat(self, chat_id: str, error: str):
+        """Fails the chat's pending items and skips the chat from now on; other chats keep sending."""
+        with self.lock:
+            if chat_id in self.disabled_chats:
+                return
+            self.disabled_chats[chat_id] = error
+        failed = self.outbox.fail_chat(chat_id, f"Chat disabled: {error}")
+        logging.critical(f"Worker: Telegram chat {chat_id} is unreachable ({error}). Skipping it for this session, "
+                         f"{failed} pending item(s) for it failed.")
+        state.after(0, lambda: messagebox.showerror("Telegram Error", f"Telegram chat {chat_id} cannot be reached: {error}. "
+                                                    f"Nothing more is sent to it until restart; please check the Chat ID."))
+
+# ── Function to add items to Telegram Queue ───────────────────────────────────
+def add_to_telegram_queue(chat_id: str, item_type: str, **kwargs):
+    if not chat_id:
+        logging.warning(f"Attempted to add {item_type} to Telegram queue, but Chat ID is empty. Skipping.")
+        if state.root and hasattr(state.root, 'tk') and state.app.enable_telegram_send_var.get():
+             state.root.after(0, lambda: messagebox.showwarning("Telegram Setup", "Telegram Chat ID is not configured. Photos/messages will not be sent."))
+        return
+
+    item = {'chat_id': chat_id, 'type': item_type, 'enqueued_at': time.time()}
+    item.update(kwargs)
+    item_id = state.telegram_outbox.put(item)
+    logging.info(f"Added {item_type} for chat {chat_id} to Telegram outbox. Pending items: {state.telegram_outbox.pending_count()}")
+    return item_id
+
+# ── Telegram Upload Derivatives ───────────────────────────────────────────────
+# Telegram recompresses photos anyway, so uploads use a downscaled JPEG (or
+# lossy WebP) built in memory; the lossless original stays on disk. Derivatives
+# are built from the grabbed frame on their own pool right after capture, so
+# the sender only has to pick up the bytes. After a restart, or once evicted,
+# they are rebuilt from the saved file on demand.
+UPLOAD_FORMATS = {"jpeg": ("JPEG", ".jpg"), "webp": ("WEBP", ".webp")}
+UPLOAD_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+upload_settings = {"format": "jpeg", "max_side": 2560, "quality": 85} # Overwritten from config by start_gui()
+upload_prep_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="upload-prep")
+upload_derivatives = OrderedDict() # str(image path) -> Future resolving to the derivative bytes
+upload_derivatives_lock = threading.Lock()
+
+def make_upload_derivative(pil_img) -> bytes:
+    fmt = UPLOAD_FORMATS.get(upload_settings["format"], UPLOAD_FORMATS["jpeg"])[0]
+    max_side = int(upload_settings["max_side"])
+    width, height = pil_img.size
+    scale = min(1.0, max_side / max(width, height)) if max_side > 0 else 1.0
+    if scale < 1.0:
+        pil_img = pil_img.resize((round(width * scale), round(height * scale)), Image.BILINEAR, reducing_gap=2.0)
+    buf = io.BytesIO()
+    pil_img.convert("RGB").save(buf, fmt, quality=int(upload_settings["quality"]))
+    return buf.getvalue()
+
+def build_upload_derivative_from_shot(shot, image_path: Path, event_id: str = None) -> bytes:
+    started = time.perf_counter()
+    data = make_upload_derivative(Image.frombytes("RGB", shot.size, shot.rgb))
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    metrics.record(event_id, "upload_prep", elapsed_ms, file=image_path.name, bytes=len(data))
+    logging.debug(f"Upload copy of {image_path.name}: {len(data) / 1e6:.2f} MB in {elapsed_ms:.0f} ms")
+    return data
+
+def build_upload_derivative_from_file(image_path: Path) -> bytes:
+    with Image.open(image_path) as pil_img:
+        return make_upload_derivative(pil_img)
+
+def _trim_upload_derivatives():
+    total = sum(len(f.result()) for f in upload_derivatives.values() if f.done() and f.exception() is None)
+    for key in list(upload_derivatives):
+        if total <= UPLOAD_CACHE_MAX_BYTES:
+            break
+        future = upload_derivatives[key]
+        if future.done():
+            if future.exception() is None:
+                total -= len(future.result())
+            del upload_derivatives[key]
+
+def submit_upload_derivative(shot, image_path: Path, event_id: str = None):
+    future = upload_prep_executor.submit(build_upload_derivative_from_shot, shot, image_path, event_id)
+    with upload_derivatives_lock:
+        upload_derivatives[str(image_path)] = future
+        _trim_upload_derivatives()
+
+def discard_upload_derivative(image_path: Path):
+    with upload_derivatives_lock:
+        upload_derivatives.pop(str(image_path), None)
+
+def get_upload_picture(image_path: Path) -> io.BytesIO:
+    """Returns the upload copy of `image_path` as a named, readable stream."""
+    with upload_derivatives_lock:
+        future = upload_derivatives.get(str(image_path))
+    data = None
+    if future is not None:
+        try:
+            data = future.result()
+        except Exception as e:
+            logging.warning(f"Upload copy of {image_path.name} failed ({e}), rebuilding from disk.")
+    if data is None:
+        data = build_upload_derivative_from_file(image_path)
+    buf = io.BytesIO(data)
+    buf.name = image_path.stem + UPLOAD_FORMATS.get(upload_settings["format"], UPLOAD_FORMATS["jpeg"])[1]
+    return buf
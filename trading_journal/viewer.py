@@ -0,0 +1,720 @@
+"""Fullscreen viewer: HighGUI engine, event navigator and Entry/Exit comparison."""
+import queue
+import logging
+import threading
+import time
+import traceback
+import tkinter as tk
+from tkinter import ttk, messagebox, filedialog
+from pathlib import Path
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+
+from . import state
+from .archive import ARCHIVE_SUFFIX, journal_file_exists
+from .catalog import SCREENSHOT_NAME_RE, find_event_images
+from .config import MAIN_WINDOW_TITLE, get_base_path
+from .imaging import SCREENSHOT_EXTENSIONS, SCREENSHOT_TIMESTAMP_RE
+from .lazy import lazy_import
+from .metrics import metrics
+
+cv2 = lazy_import("cv2")
+np = lazy_import("numpy")
+screeninfo = lazy_import("screeninfo")
+
+# ── Viewer Engine ────────────────────────────────────────────────────────────
+# HighGUI windows must be created, pumped and destroyed from one thread. A
+# single engine thread owns every viewer window and takes commands from a
+# queue: with no windows open it blocks on the queue (no polling at all), with
+# windows open it drains pending commands and pumps the GUI with waitKey.
+VIEWER_PUMP_MS = 50
+VIEWER_CLOSE_KEYS = (27,)  # Esc
+
+
+class ViewerEngine:
+    def __init__(self):
+        self.commands = queue.Queue()
+        self.windows = {}  # window name -> window title
+        self.key_handlers = []
+        self.thread = None
+        self.lock = threading.Lock()
+
+    def start(self):
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, name="viewer-engine", daemon=True)
+                self.thread.start()
+
+    def _post(self, *command):
+        self.start()
+        self.commands.put(command)
+
+    def show(self, window_name: str, frame, monitor_info, title: str = None):
+        """Shows (or replaces the content of) one window, fullscreen on a monitor."""
+        self._post("show", window_name, frame, monitor_info, title or window_name)
+
+    def update(self, window_name: str, frame, title: str = None):
+        """Replaces the picture of an open window without recreating it."""
+        self._post("update", window_name, frame, title)
+
+    def close(self, window_name: str):
+        self._post("close", window_name)
+
+    def retain(self, window_names):
+        """Closes every window whose name is not in window_names."""
+        self._post("retain", frozenset(window_names))
+
+    def close_all(self, wait: bool = False, timeout: float = 2.0):
+        done = threading.Event()
+        self._post("close_all", done)
+        if wait:
+            done.wait(timeout)
+
+    def add_key_handler(self, handler):
+        """handler(key) is called on the engine thread for every key press in a viewer window."""
+        self.key_handlers.append(handler)
+
+    def open_windows(self) -> list:
+        return list(self.windows)
+
+    def _destroy(self, window_name: str):
+        self.windows.pop(window_name, None)
+        try:
+            cv2.destroyWindow(window_name)
+        except cv2.error:
+            pass  # Already gone (closed by the user)
+
+    def _execute(self, command):
+        kind = command[0]
+        if kind == "show":
+            _, window_name, frame, monitor_info, title = command
+            if window_name not in self.windows:
+                cv2.namedWindow(window_name, cv2.WINDOW_NORMAL)
+                cv2.resizeWindow(window_name, monitor_info.width, monitor_info.height)
+                cv2.moveWindow(window_name, monitor_info.x, monitor_info.y)
+            if self.windows.get(window_name) != title:
+                cv2.setWindowTitle(window_name, title)
+            self.windows[window_name] = title
+            cv2.imshow(window_name, frame)
+        elif kind == "update":
+            _, window_name, frame, title = command
+            if window_name in self.windows:
+                if title and self.windows[window_name] != title:
+                    cv2.setWindowTitle(window_name, title)
+                    self.windows[window_name] = title
+                cv2.imshow(window_name, frame)
+        elif kind == "close":
+            self._destroy(command[1])
+        elif kind == "retain":
+            for window_name in [n for n in self.windows if n not in command[1]]:
+                self._destroy(window_name)
+        elif kind == "close_all":
+            if self.windows:
+                self.windows.clear()
+                cv2.destroyAllWindows()
+                cv2.waitKey(1)  # Let HighGUI process the destruction
+            command[1].set()
+
+    def _drop_closed_windows(self):
+        # Windows closed with the title bar X are forgotten here instead of being polled by their own thread
+        for window_name in list(self.windows):
+            try:
+                visible = cv2.getWindowProperty(window_name, cv2.WND_PROP_VISIBLE)
+            except cv2.error:
+                visible = 0
+            if visible < 1:
+                logging.debug(f"Viewer window closed by user: {window_name}")
+                self._destroy(window_name)
+
+    def _run(self):
+        logging.info("Viewer engine started.")
+        while True:
+            try:
+                if not self.windows:
+                    self._execute(self.commands.get())  # Idle: block until there is something to show
+                while True:
+                    try:
+                        self._execute(self.commands.get_nowait())
+                    except queue.Empty:
+                        break
+                if not self.windows:
+                    continue
+                key = cv2.waitKeyEx(VIEWER_PUMP_MS)
+                if key != -1:
+                    if (key & 0xFF) in VIEWER_CLOSE_KEYS:
+                        self._execute(("close_all", threading.Event()))
+                        continue
+                    for handler in list(self.key_handlers):
+                        try:
+                            handler(key)
+                        except Exception:
+                            logging.error("Viewer key handler failed:\n" + traceback.format_exc())
+                self._drop_closed_windows()
+            except Exception:
+                logging.error("Viewer engine command failed:\n" + traceback.format_exc())
+
+
+viewer_engine = ViewerEngine()
+viewer_load_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="viewer-load")
+
+
+class DisplayFrameCache:
+    """Bounded in-memory LRU of decoded, monitor-sized display frames, so
+    stepping between events does not decode anything already seen or prefetched."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.frames = OrderedDict()  # (path, width, height) -> frame
+        self.loading = {}  # (path, width, height) -> Future
+        self.total_bytes = 0
+
+    def _load(self, key):
+        image_path, mon_width, mon_height = key
+        try:
+            frame = state.rendition_cache.get_display_frame(image_path, mon_width, mon_height)
+            if frame is not None:
+                with self.lock:
+                    if key not in self.frames:
+                        self.frames[key] = frame
+                        self.total_bytes += frame.nbytes
+                    while self.total_bytes > self.max_bytes and len(self.frames) > 1:
+                        _, evicted = self.frames.popitem(last=False)
+                        self.total_bytes -= evicted.nbytes
+            return frame
+        finally:
+            with self.lock:
+                self.loading.pop(key, None)
+
+    def prefetch(self, image_path: Path, mon_width: int, mon_height: int):
+        """Returns a Future for the frame, decoding it in the background unless cached or already loading."""
+        key = (Path(image_path), mon_width, mon_height)
+        with self.lock:
+            frame = self.frames.get(key)
+            if frame is not None:
+                self.frames.move_to_end(key)
+                future = Future()
+                future.set_result(frame)
+                return future
+            future = self.loading.get(key)
+            if future is None:
+                future = viewer_load_executor.submit(self._load, key)
+                self.loading[key] = future
+            return future
+
+    def get(self, image_path: Path, mon_width: int, mon_height: int):
+        return self.prefetch(image_path, mon_width, mon_height).result()
+
+
+display_frame_cache = DisplayFrameCache(768 * 1024 * 1024)
+
+
+def close_all_image_windows(wait: bool = False):
+    """Closes every OpenCV viewer window (asynchronously unless wait is set)."""
+    logging.info("Closing all viewer windows...")
+    viewer_engine.close_all(wait=wait)
+
+
+def display_image_fullscreen_on_monitor(image_path: Path, monitor_info, window_name: str, title: str = None):
+    """Displays an image fullscreen on a specific monitor, preserving aspect ratio,
+    and handling window positioning for multi-monitor setups with DPI scaling.
+    Takes the display frame from the decoded-frame cache and hands the window to the viewer engine.
+    """
+    try:
+        logging.debug(f"Displaying {image_path.name} on monitor at ({monitor_info.x}, {monitor_info.y})...")
+        
+        mon_width, mon_height = monitor_info.width, monitor_info.height
+        background = display_frame_cache.get(image_path, mon_width, mon_height)
+        if background is None:
+            return
+
+        viewer_engine.show(window_name, background, monitor_info, title=title or f"{MAIN_WINDOW_TITLE} - {image_path.stem}")
+
+    except Exception:
+        logging.error(f"Error displaying image {image_path.name}:\n" + traceback.format_exc())
+
+
+def map_images_to_monitors(image_files: list, monitor_names_str: str, current_monitors_info: list) -> list:
+    """Pairs each screenshot with the monitor it was captured from (matched by
+    name, then index, then sequentially). Returns [] when no monitor is detected."""
+    # Match images to monitors based on names, if possible
+    monitor_names_list = [n.strip() for n in monitor_names_str.split(',')]
+
+    images_to_display = []
+
+    for img_file in image_files:
+        filename_prefix = img_file.name.split('_')[0].split(' [')[0] # "Chart [DOM]_..." belongs to monitor "Chart"
+        matched_monitor_info = None
+
+        try:
+            # Try to find a direct match by filename prefix and monitor name
+            if filename_prefix in monitor_names_list:
+                monitor_idx_in_list = monitor_names_list.index(filename_prefix)
+                if monitor_idx_in_list < len(current_monitors_info):
+                    matched_monitor_info = current_monitors_info[monitor_idx_in_list]
+                    logging.debug(f"Direct match for {img_file.name}: {filename_prefix} -> Monitor {monitor_idx_in_list}")
+
+            if matched_monitor_info is None: # Fallback to trying to match by index if names are default
+                # If the filename is like "Monitor 1_...", try to parse the index
+                if filename_prefix.startswith("Monitor "):
+                    try:
+                        mon_num = int(filename_prefix.split(' ')[1])
+                        if mon_num > 0 and (mon_num - 1) < len(current_monitors_info):
+                            matched_monitor_info = current_monitors_info[mon_num - 1]
+                            logging.debug(f"Index match for {img_file.name}: Monitor {mon_num} -> Monitor {mon_num - 1}")
+                    except ValueError:
+                        pass # Not a simple Monitor N name
+
+            if matched_monitor_info is None:
+                # If still no match, log and will try sequential assignment later
+                logging.warning(f"Could not directly map image {img_file.name} to a specific monitor by name/index. Will try sequential.")
+
+        except Exception as e:
+            logging.warning(f"Error during image-to-monitor mapping for {img_file.name}: {e}")
+            matched_monitor_info = None
+
+        images_to_display.append({'path': img_file, 'monitor_info': matched_monitor_info})
+
+    # Fill in any missing monitor info sequentially based on the order of images found,
+    # preferring primary monitor if more images than monitors.
+    current_monitor_index = 0
+    primary_monitor = next((m for m in current_monitors_info if m.is_primary), current_monitors_info[0] if current_monitors_info else None)
+
+    if not primary_monitor: # Should not happen if screeninfo.get_monitors() returns anything
+        return []
+
+    for item in images_to_display:
+        if item['monitor_info'] is None:
+            if current_monitor_index < len(current_monitors_info):
+                item['monitor_info'] = current_monitors_info[current_monitor_index]
+                current_monitor_index += 1
+            else:
+                # If we run out of distinct monitors, assign remaining images to the primary
+                item['monitor_info'] = primary_monitor
+                logging.warning(f"Assigned {item['path'].name} to primary monitor as no specific or sequential monitor available.")
+
+    return images_to_display
+
+
+def present_event_images(images_to_display: list, current_monitors_info: list, title_suffix: str = "") -> int:
+    """Decodes (or takes from the cache) every frame of a mapped set in parallel,
+    then swaps all monitors to it at once. Returns the number of windows shown."""
+    # One window per monitor: a new set replaces the pictures in place and closes windows it does not use
+    monitors_in_use = []
+    shown = []
+    for img_data in images_to_display:
+        monitor_to_use = img_data['monitor_info']
+        if monitor_to_use:
+            slot = get_monitor_slot(monitor_to_use, current_monitors_info, monitors_in_use, get_region_label(img_data['path']))
+            window_name = f"{MAIN_WINDOW_TITLE} - Viewer {slot}"
+            shown.append((img_data['path'], monitor_to_use, window_name))
+        else:
+            logging.error(f"No monitor info available for {img_data['path'].name}. Skipping display.")
+    wait([display_frame_cache.prefetch(path, m.width, m.height) for path, m, _ in shown])
+    viewer_engine.retain(window_name for _, _, window_name in shown)
+    for path, monitor_to_use, window_name in shown:
+        display_image_fullscreen_on_monitor(path, monitor_to_use, window_name,
+                                            title=f"{MAIN_WINDOW_TITLE} - {path.stem}{title_suffix}")
+    return len(shown)
+
+
+def show_event_images(image_files: list, monitor_names_str: str) -> bool:
+    """Shows one event's screenshots fullscreen, each on the monitor it was captured from."""
+    current_monitors_info = screeninfo.get_monitors()
+    images_to_display = map_images_to_monitors(image_files, monitor_names_str, current_monitors_info)
+    if not current_monitors_info:
+        messagebox.showerror("Error", "No monitors detected. Cannot display screenshots.")
+        logging.error("No monitors detected by screeninfo.")
+        return False
+    if not images_to_display:
+        messagebox.showinfo("No Images", f"No displayable images found in:\n{image_files[0].parent if image_files else ''}")
+        return False
+
+    shown = present_event_images(images_to_display, current_monitors_info)
+    logging.info(f"Displayed {shown} image(s) through the viewer engine.")
+    return True
+
+
+def get_capture_name(image_path: Path) -> str:
+    """Monitor name plus region label of a screenshot ("Chart [DOM]"), the same for an event's Entry and Exit."""
+    match = SCREENSHOT_NAME_RE.match(image_path.name)
+    return match.group('monitor') if match else image_path.stem
+
+def get_region_label(image_path: Path):
+    """Region label of a region-profile crop ("DOM" for "Chart [DOM]_..."), or None for a full monitor."""
+    name = get_capture_name(image_path)
+    return name[name.index(" [") + 2:-1] if " [" in name and name.endswith("]") else None
+
+def get_monitor_slot(monitor_info, monitors: list, used: list, region: str = None) -> str:
+    """Stable window slot for a monitor, or for one region of it; repeats get their own slot."""
+    geometry = (monitor_info.x, monitor_info.y, monitor_info.width, monitor_info.height)
+    base = next((i for i, m in enumerate(monitors) if (m.x, m.y, m.width, m.height) == geometry), 0) + 1
+    key = str(base) if region is None else f"{base} [{region}]"
+    count = used.count(key)
+    used.append(key)
+    return key if count == 0 else f"{key}.{count + 1}"
+
+
+# ── Entry/Exit Comparison ────────────────────────────────────────────────────
+# The Entry and Exit screenshots of one monitor are shown in one window, either
+# side by side or blended, with the regions that changed between them outlined.
+# Differencing runs on the monitor-sized display frames at 1/COMPARE_DIFF_SCALE
+# resolution (a 4K pair is diffed at 960x540), and the resulting masks and
+# boxes are cached per image pair, so toggling modes or stepping back is instant.
+COMPARE_MODES = ("off", "side_by_side", "overlay")
+COMPARE_DIFF_SCALE = 4
+COMPARE_DIFF_THRESHOLD = 25  # per-pixel grey level change counted as a difference
+COMPARE_MIN_BOX_AREA = 16  # at diff resolution; ignores cursor blinks and anti-aliasing noise
+COMPARE_HIGHLIGHT_BGR = (0, 0, 255)
+DIFF_MASK_CACHE_ENTRIES = 64
+
+
+class DiffMaskCache:
+    """LRU of (mask, boxes, changed ratio) per Entry/Exit image pair and display size."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+
+    def get(self, entry_path: Path, exit_path: Path, entry_frame, exit_frame):
+        key = (entry_path, exit_path, entry_frame.shape[1], entry_frame.shape[0])
+        with self.lock:
+            cached = self.entries.get(key)
+            if cached is not None:
+                self.entries.move_to_end(key)
+                return cached
+        started = time.perf_counter()
+        result = compute_diff_mask(entry_frame, exit_frame)
+        metrics.record(None, "compare_diff", (time.perf_counter() - started) * 1000, boxes=len(result[1]))
+        with self.lock:
+            self.entries[key] = result
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return result
+
+
+def compute_diff_mask(entry_frame, exit_frame):
+    """Returns the changed-pixel mask (at diff resolution), the changed regions
+    as display-resolution (x, y, w, h) boxes and the changed fraction of the frame."""
+    height, width = entry_frame.shape[:2]
+    small_size = (max(1, width // COMPARE_DIFF_SCALE), max(1, height // COMPARE_DIFF_SCALE))
+    entry_small = cv2.cvtColor(cv2.resize(entry_frame, small_size, interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2GRAY)
+    exit_small = cv2.cvtColor(cv2.resize(exit_frame, small_size, interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2GRAY)
+    diff = cv2.absdiff(entry_small, exit_small)
+    _, mask = cv2.threshold(diff, COMPARE_DIFF_THRESHOLD, 255, cv2.THRESH_BINARY)
+    mask = cv2.dilate(mask, np.ones((3, 3), np.uint8), iterations=2)
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    boxes = []
+    for contour in contours:
+        x, y, w, h = cv2.boundingRect(contour)
+        if w * h >= COMPARE_MIN_BOX_AREA:
+            boxes.append((x * COMPARE_DIFF_SCALE, y * COMPARE_DIFF_SCALE, w * COMPARE_DIFF_SCALE, h * COMPARE_DIFF_SCALE))
+    return mask, boxes, float(np.count_nonzero(mask)) / mask.size
+
+
+def render_comparison(entry_frame, exit_frame, mask, boxes: list, mode: str):
+    """Composes one monitor-sized comparison frame from two monitor-sized display frames."""
+    height, width = entry_frame.shape[:2]
+    if mode == "overlay":
+        frame = cv2.addWeighted(entry_frame, 0.5, exit_frame, 0.5, 0)
+        changed = cv2.resize(mask, (width, height), interpolation=cv2.INTER_NEAREST) > 0
+        frame[changed] = (frame[changed] // 2) + (np.array(COMPARE_HIGHLIGHT_BGR, np.uint8) // 2)
+        return frame
+
+    # Side by side: Entry left, Exit right, both outlined where they differ
+    half_width = width // 2
+    halves = []
+    for source in (entry_frame, exit_frame):
+        half = cv2.resize(source, (half_width, height // 2), interpolation=cv2.INTER_AREA)
+        for x, y, w, h in boxes:
+            cv2.rectangle(half, (x // 2, y // 2), ((x + w) // 2, (y + h) // 2), COMPARE_HIGHLIGHT_BGR, 2)
+        halves.append(half)
+    frame = np.zeros_like(entry_frame)
+    y_offset = (height - height // 2) // 2
+    frame[y_offset:y_offset + height // 2, :half_width] = halves[0]
+    frame[y_offset:y_offset + height // 2, half_width:half_width * 2] = halves[1]
+    cv2.line(frame, (half_width, 0), (half_width, height - 1), (255, 255, 255), 1)
+    return frame
+
+
+diff_mask_cache = DiffMaskCache(DIFF_MASK_CACHE_ENTRIES)
+
+
+def pair_entry_exit_images(entry_images: list, exit_images: list) -> list:
+    """(entry path, exit path, monitor info) for every capture name (monitor plus region) both events have."""
+    exits_by_name = {get_capture_name(item['path']): item['path'] for item in exit_images if item['monitor_info']}
+    return [(item['path'], exits_by_name[get_capture_name(item['path'])], item['monitor_info']) for item in entry_images
+            if item['monitor_info'] and get_capture_name(item['path']) in exits_by_name]
+
+
+def present_comparison(entry_images: list, exit_images: list, current_monitors_info: list, mode: str,
+                       title_suffix: str = "") -> int:
+    """Shows the Entry/Exit pair of every monitor (or region-profile crop) both
+    events were captured on. Returns the number of windows shown."""
+    pairs = pair_entry_exit_images(entry_images, exit_images)
+    futures = []
+    for entry_path, exit_path, m in pairs:
+        futures += [display_frame_cache.prefetch(entry_path, m.width, m.height),
+                    display_frame_cache.prefetch(exit_path, m.width, m.height)]
+    wait(futures)
+
+    monitors_in_use = []
+    shown = []
+    for entry_path, exit_path, monitor_info in pairs:
+        entry_frame = display_frame_cache.get(entry_path, monitor_info.width, monitor_info.height)
+        exit_frame = display_frame_cache.get(exit_path, monitor_info.width, monitor_info.height)
+        if entry_frame is None or exit_frame is None:
+            continue
+        mask, boxes, changed = diff_mask_cache.get(entry_path, exit_path, entry_frame, exit_frame)
+        frame = render_comparison(entry_frame, exit_frame, mask, boxes, mode)
+        slot = get_monitor_slot(monitor_info, current_monitors_info, monitors_in_use, get_region_label(entry_path))
+        window_name = f"{MAIN_WINDOW_TITLE} - Viewer {slot}"
+        title = f"{MAIN_WINDOW_TITLE} - {entry_path.stem} vs {exit_path.stem} ({changed:.1%} changed){title_suffix}"
+        shown.append((window_name, frame, monitor_info, title))
+    viewer_engine.retain(window_name for window_name, _, _, _ in shown)
+    for window_name, frame, monitor_info, title in shown:
+        viewer_engine.show(window_name, frame, monitor_info, title=title)
+    return len(shown)
+
+
+# ── Event Navigator ──────────────────────────────────────────────────────────
+# Once a set is open, the viewer windows step through the journal with the
+# keyboard instead of the file dialog: the events of the same instrument come
+# from the catalog, and the neighbouring events (plus the matching Entry/Exit)
+# are decoded into the DisplayFrameCache in the background, so a step only
+# swaps already-decoded frames into the open windows.
+NAVIGATOR_KEYS_PREV = {2424832, 65361, 2162688, 65365, ord('a'), ord('b')}  # Left / PageUp (Windows, GTK), a, b
+NAVIGATOR_KEYS_NEXT = {2555904, 65363, 2228224, 65366, ord('d'), ord('n')}  # Right / PageDown (Windows, GTK), d, n
+NAVIGATOR_KEYS_PAIR = {9, ord('p')}  # Tab, p
+NAVIGATOR_KEYS_COMPARE = {ord('c')}  # cycles off / side by side / overlay
+NAVIGATOR_PREFETCH_EVENTS = 2  # on each side of the current event
+NAVIGATOR_MAX_EVENTS = 5000
+
+
+class EventNavigator:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.events = []  # catalog events of one instrument, oldest first
+        self.index = -1
+        self.monitor_names_str = ""
+        self.monitors = []
+        self.compare_mode = "off"
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="navigator")
+        self.key_handler_installed = False
+
+    def open(self, view_dir: Path, ts: str, image_files: list, monitor_names_str: str, compare_mode: str = "off") -> bool:
+        """Shows a set (or its Entry/Exit comparison) and makes it the navigator's current position."""
+        events = []
+        record = state.journal_catalog.parse_path(image_files[0]) if state.journal_catalog is not None else None
+        if record is not None:
+            events = state.journal_catalog.find_events(instrument=record[3], limit=NAVIGATOR_MAX_EVENTS)
+            events.sort(key=lambda e: (e['day'], e['ts'], e['event']))
+        index = next((i for i, e in enumerate(events) if e['event_dir'] == Path(view_dir) and e['ts'] == ts), None)
+        if index is None:
+            events, index = [{"day": "", "ts": ts, "instrument": "", "event": Path(view_dir).name,
+                              "event_dir": Path(view_dir), "images": len(image_files)}], 0
+        with self.lock:
+            self.events, self.index = events, index
+            self.monitor_names_str = monitor_names_str
+            self.monitors = screeninfo.get_monitors()
+            self.compare_mode = compare_mode
+        if not self.key_handler_installed:
+            viewer_engine.add_key_handler(self.on_key)
+            self.key_handler_installed = True
+        if compare_mode != "off":
+            if self.pair_index(index) is None:
+                messagebox.showinfo("No Matching Event", "This event has no matching Entry/Exit on the same day to compare with.")
+                return False
+            self.go_to(index)
+        elif not show_event_images(image_files, monitor_names_str):
+            return False
+        else:
+            self._prefetch_around(index)
+        messagebox.showinfo("Screenshots Displayed", 
+                             "Screenshots are displayed.\n\n"
+                             "Left/Right (or A/D) steps to the previous/next event, Tab (or P) jumps to the matching Entry/Exit, "
+                             "C cycles the Entry/Exit comparison (side by side / overlay / off).\n"
+                             "Press 'Esc' in a screenshot window to close all of them, or click 'X' to close a single window.")
+        return True
+
+    def on_key(self, key: int):
+        # Runs on the viewer engine thread: hand the step to the navigator thread so the GUI keeps pumping
+        if key in NAVIGATOR_KEYS_PREV or (key & 0xFF) in NAVIGATOR_KEYS_PREV:
+            self.executor.submit(self.step, -1)
+        elif key in NAVIGATOR_KEYS_NEXT or (key & 0xFF) in NAVIGATOR_KEYS_NEXT:
+            self.executor.submit(self.step, 1)
+        elif key in NAVIGATOR_KEYS_PAIR or (key & 0xFF) in NAVIGATOR_KEYS_PAIR:
+            self.executor.submit(self.jump_to_pair)
+        elif (key & 0xFF) in NAVIGATOR_KEYS_COMPARE:
+            self.executor.submit(self.cycle_compare_mode)
+
+    def cycle_compare_mode(self):
+        with self.lock:
+            self.compare_mode = COMPARE_MODES[(COMPARE_MODES.index(self.compare_mode) + 1) % len(COMPARE_MODES)]
+            index = self.index
+        logging.info(f"Event navigator: comparison mode {self.compare_mode}.")
+        if index >= 0:
+            self.go_to(index)
+
+    def pair_index(self, index: int):
+        """Index of the Exit closing an Entry (or the Entry opened before an Exit) on the same day."""
+        current = self.events[index]
+        if current['event'] == "Entry":
+            candidates = range(index + 1, len(self.events))
+        else:
+            candidates = range(index - 1, -1, -1)
+        for i in candidates:
+            other = self.events[i]
+            if other['day'] != current['day']:
+                break
+            if other['event'] == current['event']:
+                break  # Another trade of the same side: this one has no partner
+            if other['event'] in ("Entry", "Exit"):
+                return i
+        return None
+
+    def step(self, delta: int):
+        with self.lock:
+            target = self.index + delta
+        if 0 <= target < len(self.events):
+            self.go_to(target)
+        else:
+            logging.info("Event navigator: no further events in that direction.")
+
+    def jump_to_pair(self):
+        with self.lock:
+            target = self.pair_index(self.index) if self.events else None
+        if target is None:
+            logging.info("Event navigator: the current event has no matching Entry/Exit.")
+            return
+        self.go_to(target)
+
+    def _mapped_images(self, index: int) -> list:
+        event = self.events[index]
+        image_files = find_event_images(event['event_dir'], event['ts'])
+        return map_images_to_monitors(image_files, self.monitor_names_str, self.monitors) if image_files else []
+
+    def go_to(self, index: int):
+        started = time.perf_counter()
+        try:
+            images_to_display = self._mapped_images(index)
+            if not images_to_display:
+                logging.warning(f"Event navigator: no screenshots left for {self.events[index]['event_dir']} {self.events[index]['ts']}.")
+                return
+            event = self.events[index]
+            suffix = f"  [{event['day']} {event['event']} {index + 1}/{len(self.events)}]"
+            pair = self.pair_index(index) if self.compare_mode != "off" else None
+            if pair is not None:
+                pair_images = self._mapped_images(pair)
+                entry_images, exit_images = (images_to_display, pair_images) if event['event'] == "Entry" else (pair_images, images_to_display)
+                present_comparison(entry_images, exit_images, self.monitors, self.compare_mode, title_suffix=suffix)
+            else:
+                if self.compare_mode != "off":
+                    logging.info("Event navigator: no matching Entry/Exit, showing the event alone.")
+                present_event_images(images_to_display, self.monitors, title_suffix=suffix)
+            with self.lock:
+                self.index = index
+            duration_ms = (time.perf_counter() - started) * 1000
+            metrics.record(None, "viewer_step", duration_ms, images=len(images_to_display))
+            logging.info(f"Event navigator: showing {event['event_dir']} {event['ts']} ({duration_ms:.1f} ms).")
+            state.root.after(0, lambda: state.app.last_view_path_var.set(str(event['event_dir'])))
+            self._prefetch_around(index)
+        except Exception:
+            logging.error("Error in EventNavigator.go_to:\n" + traceback.format_exc())
+
+    def _prefetch_around(self, index: int):
+        neighbours = [index + d for d in range(1, NAVIGATOR_PREFETCH_EVENTS + 1)]
+        neighbours += [index - d for d in range(1, NAVIGATOR_PREFETCH_EVENTS + 1)]
+        pair = self.pair_index(index)
+        if pair is not None:
+            neighbours.insert(0, pair)
+        for i in neighbours:
+            if 0 <= i < len(self.events):
+                for img_data in self._mapped_images(i):
+                    monitor_info = img_data['monitor_info']
+                    if monitor_info:
+                        display_frame_cache.prefetch(img_data['path'], monitor_info.width, monitor_info.height)
+
+
+event_navigator = EventNavigator()
+
+
+## NEW FEATURE: View Screenshots - GUI function to ask for input and trigger display
+def view_screenshots_gui_task(monitor_names_str: tk.StringVar, view_button_ref: ttk.Button, last_view_path_var: tk.StringVar):
+    # Disable the button to prevent multiple simultaneous calls
+    state.root.after(0, lambda: view_button_ref.config(state=tk.DISABLED))
+    
+    # Windows of a previously viewed set stay open until the new set replaces them
+    selected_file_path = None
+    
+    try:
+        # Get the last viewed path from config, default to BASE_DIR if not set or invalid
+        initial_dir = Path(last_view_path_var.get())
+        while not initial_dir.is_dir() and initial_dir != initial_dir.parent: # Archived folders are gone: start at the archive
+            initial_dir = initial_dir.parent
+        if not initial_dir.is_dir():
+            initial_dir = get_base_path()
+        
+        selected_file_path = filedialog.askopenfilename(
+            title="Select a screenshot to view its set",
+            initialdir=str(initial_dir), # Start Browse from the last viewed path
+            filetypes=[("Screenshots", " ".join(f"*{ext}" for ext in SCREENSHOT_EXTENSIONS)),
+                       ("Journal archives", f"*{ARCHIVE_SUFFIX}"), ("All files", "*.*")],
+            parent=state.root
+        )
+        
+        if not selected_file_path:
+            logging.info("File selection cancelled by user.")
+            return # User cancelled file selection
+
+        selected_file_path = Path(selected_file_path)
+        if selected_file_path.suffix.lower() == ARCHIVE_SUFFIX:
+            # An archived day (or week) opens at its first screenshot; the navigator steps through the rest
+            archived = state.journal_archive.archived_files(selected_file_path) if state.journal_archive is not None else []
+            archived = sorted((f for f in archived if SCREENSHOT_TIMESTAMP_RE.search(f.name)),
+                              key=lambda f: (str(f.parent), SCREENSHOT_TIMESTAMP_RE.search(f.name).group(1)))
+            if not archived:
+                messagebox.showerror("Error", f"No screenshots found in the archive:\n{selected_file_path}")
+                logging.warning(f"Selected archive holds no journal screenshots: {selected_file_path}")
+                return
+            selected_file_path = archived[0]
+        view_dir = selected_file_path.parent # The directory containing the selected image
+
+        if not view_dir.exists() and not journal_file_exists(selected_file_path):
+            messagebox.showerror("Error", f"Directory not found for the selected image:\n{view_dir}")
+            logging.warning(f"Attempted to view screenshots from non-existent directory based on selected file: {view_dir}")
+            return
+
+        # ── MODIFIED: Extract timestamp from the selected file name ──────────
+        # Example filename: "Monitor 1_18-49-32.png" or "Chart_18-49-32.webp"
+        # We need to extract "18-49-32"
+        match = SCREENSHOT_TIMESTAMP_RE.search(selected_file_path.name)
+        if not match:
+            messagebox.showerror("Error", "Could not extract timestamp from the selected file name. Please select a valid screenshot.")
+            logging.error(f"Failed to extract timestamp from selected file: {selected_file_path.name}")
+            return
+        
+        target_timestamp = match.group(1)
+        logging.info(f"Target timestamp extracted from selected file: {target_timestamp}")
+
+        # Now, look up the screenshots with this timestamp (catalog first, folder listing as fallback)
+        image_files = find_event_images(view_dir, target_timestamp)
+        # ──────────────────────────────────────────────────────────────────────
+
+        if not image_files:
+            messagebox.showinfo("No Images Found", f"No screenshots matching the timestamp '{target_timestamp}' found in:\n{view_dir}")
+            logging.info(f"No screenshots matching timestamp {target_timestamp} found in {view_dir}.")
+            return
+
+        # Update last_view_path_var with the directory of the selected file
+        state.root.after(0, lambda: last_view_path_var.set(str(view_dir)))
+
+        event_navigator.open(view_dir, target_timestamp, image_files, monitor_names_str.get())
+
+    except Exception:
+        logging.error(f"Error in view_screenshots_gui_task:\n" + traceback.format_exc())
+        state.root.after(0, lambda: messagebox.showerror("Error", "Failed to view screenshots.\nSee app.log for details."))
+    finally:
+        # Re-enable the button when the task is finished (or an error occurs)
+        state.root.after(0, lambda: view_button_ref.config(state=tk.NORMAL))